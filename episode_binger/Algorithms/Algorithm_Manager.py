@@ -1,5 +1,8 @@
 from episode_binger.Dataclasses import Episode
 from episode_binger.Dataclasses import Chunk
+from episode_binger.Dataclasses import Deadline
+from episode_binger.Dataclasses import Calibration
+from episode_binger.Dataclasses import Retimed_Episode
 from episode_binger.Algorithms.Frames import Frame_Algorithm
 from episode_binger.Algorithms.Chunks import Boundary_Finder
 
@@ -22,7 +25,86 @@ class Algorithm_Manager():
         self.frame_algorithm = frame_algorithm
         self.chunk_boundary_finder = chunk_boundary_finder
 
-    def find_common_chunk(self, e1: Episode, e2: Episode, from_frames: tuple=(0,0), to_frames: tuple=None, chunk_min_seconds: int = 30) -> tuple:
+        # Parameters the algorithms were created with. Calibrations scale the thresholds and replace the rest, and they are restored for seasons without calibration
+        self._base_parameters = None
+
+    def set_seed(self, seed: int):
+        """
+        Description: Seeds every randomized algorithm so searches can be reproduced
+
+        Parameters:
+            - seed: Seed for the random number generators. None to seed them from system entropy
+        """
+        self.frame_algorithm.set_seed(seed)
+
+    # Parameters of every algorithm set by calibrations
+    _calibrated_parameters = ("thumbnail_resolution", "max_identical_frames_diff", "max_similar_frames_diff", "num_subsamples", "max_reshuffles", "max_loading_frames")
+
+    def _get_calibrated_algorithms(self) -> list:
+        """
+        Description: Gets the algorithms whose parameters are set by calibrations
+
+        Return Value: List with the identical frame finder, the frame locator and the boundary finder
+        """
+        return [self.frame_algorithm.identical_frame_finder, self.frame_algorithm.frame_locator, self.chunk_boundary_finder]
+
+    def apply_calibration(self, calibration: Calibration):
+        """
+        Description: Sets the performance parameters of a calibration in every algorithm that uses them. Thresholds are scaled from the ones the algorithms were created with, so calibrations of different seasons can be applied one after another
+
+        Parameters:
+            - calibration: A Calibration object
+        """
+        algorithms = self._get_calibrated_algorithms()
+        if self._base_parameters is None:
+            self._base_parameters = [{name: getattr(a, name) for name in Algorithm_Manager._calibrated_parameters if hasattr(a, name)} for a in algorithms]
+
+        for algorithm, base_parameters in zip(algorithms, self._base_parameters):
+            # Every algorithm must work with the same thumbnails
+            if "thumbnail_resolution" in base_parameters:
+                algorithm.thumbnail_resolution = tuple(calibration.thumbnail_resolution)
+            if base_parameters.get("max_identical_frames_diff") is not None:
+                algorithm.max_identical_frames_diff = base_parameters["max_identical_frames_diff"]*calibration.threshold_scale
+            if base_parameters.get("max_similar_frames_diff") is not None:
+                algorithm.max_similar_frames_diff = base_parameters["max_similar_frames_diff"]*calibration.threshold_scale
+
+        identical_frame_finder = self.frame_algorithm.identical_frame_finder
+        if hasattr(identical_frame_finder, "num_subsamples"):
+            identical_frame_finder.num_subsamples = calibration.num_subsamples
+        if hasattr(identical_frame_finder, "max_reshuffles"):
+            identical_frame_finder.max_reshuffles = calibration.max_reshuffles
+
+        frame_locator = self.frame_algorithm.frame_locator
+        if hasattr(frame_locator, "max_loading_frames"):
+            frame_locator.max_loading_frames = calibration.max_loading_frames
+
+    def reset_calibration(self):
+        """
+        Description: Sets back the parameters the algorithms were created with (For seasons that haven't been calibrated). Nothing changes if no calibration was applied
+        """
+        if self._base_parameters is None:
+            return
+
+        for algorithm, base_parameters in zip(self._get_calibrated_algorithms(), self._base_parameters):
+            for name, value in base_parameters.items():
+                setattr(algorithm, name, value)
+
+    @staticmethod
+    def _retime(episode: Episode, fps: float):
+        """
+        Description: Shows an episode at the frame rate of another one, so their frames can be compared one to one
+
+        Parameters:
+            - episode: Episode to show
+            - fps: Frame rate to show it at
+
+        Return Value: The same episode if it already has that frame rate, a Retimed_Episode object otherwise
+        """
+        if abs(episode.fps-fps) < 0.01:
+            return episode
+        return Retimed_Episode(episode, fps)
+
+    def find_common_chunk(self, e1: Episode, e2: Episode, from_frames: tuple=(0,0), to_frames: tuple=None, chunk_min_seconds: int = 30, deadline: Deadline = None) -> tuple:
         """
         Description: Function to find a common chunk of video between 2 files.
 
@@ -32,31 +114,42 @@ class Algorithm_Manager():
             - from_frames: Tuple indicating lower limit of frames to start the search (Shaped like: (e1_start_frame, e2_start_frame)). If omited will be from the beginning.
             - to_frames: Tuple indicating upper limit of frames to end the search (Shaped like: (e1_end_frame, e2_end_frame)). If omited will be until the end.
             - chunk_min_seconds: Minimum length in seconds to consider a chunk of interest
+            - deadline: Deadline object. Once it expires no more retries are made. If omited the search has no time limit
 
         Return Value: A tuple containing 2 identical chunks, like: (chunk_e1, chunk_e2). None if any could be found
         """
-        # Check if frame shapes are the same
-        if e1.frame_shape != e2.frame_shape:
-            raise Exception("Episodes have different frame shapes")
-
         # If no final frames for the search are given, take the last ones
         if to_frames is None:
             to_frames = (e1.frame_count, e2.frame_count)
 
+        # Episodes with different resolutions are compared through thumbnails of the same shape. With different frame rates, e2 is searched at the frame rate of e1
+        search_e2 = Algorithm_Manager._retime(e2, e1.fps)
+        if search_e2 is not e2:
+            from_frames = (from_frames[0], search_e2.from_frame(from_frames[1]))
+            to_frames = (to_frames[0], min(search_e2.frame_count, search_e2.from_frame(to_frames[1])))
+
         # Minimum lengths (in frames) to consider a chunk relevant
-        min_relevant_chunk_len = int(chunk_min_seconds*e1.fps)
+        min_relevant_chunk_len = (int(chunk_min_seconds*e1.fps), int(chunk_min_seconds*e2.fps))
 
         # Set Max Retries
         max_retries = 3
 
         blacklist = []
 
-        for _ in range(max_retries):
+        for retry in range(max_retries):
+            # Out of time
+            if retry and deadline is not None and deadline.expired():
+                break
+
             # Search for identical frames
-            identical_frames = self.frame_algorithm.find_identical_frames(e1,e2,(from_frames[0],from_frames[1]),(to_frames[0],to_frames[1]),blacklist=blacklist) 
+            identical_frames = self.frame_algorithm.find_identical_frames(e1,search_e2,(from_frames[0],from_frames[1]),(to_frames[0],to_frames[1]),blacklist=blacklist,deadline=deadline) 
+
+            # No similar frames found before the deadline
+            if identical_frames is None:
+                continue
 
             # Find boundaries of the chunk
-            chunks = self.chunk_boundary_finder.find_boundaries(e1, e2, identical_frames)
+            chunks = self.chunk_boundary_finder.find_boundaries(e1, search_e2, identical_frames)
 
             # If couldn't find the boundaries, try again
             if not chunks:
@@ -64,8 +157,13 @@ class Algorithm_Manager():
 
             chunk_e1, chunk_e2 = chunks
 
+            # Back to the frames of e2
+            if search_e2 is not e2:
+                chunk_e2 = Chunk(e2, search_e2.to_frame(chunk_e2.start_frame), search_e2.to_frame(chunk_e2.end_frame), chunk_e2.reliability)
+                chunks = (chunk_e1, chunk_e2)
+
             # Check if the chunk is big enough to have in consideration
-            if chunk_e1.end_frame-chunk_e1.start_frame < min_relevant_chunk_len or chunk_e2.end_frame-chunk_e2.start_frame < min_relevant_chunk_len:
+            if chunk_e1.end_frame-chunk_e1.start_frame < min_relevant_chunk_len[0] or chunk_e2.end_frame-chunk_e2.start_frame < min_relevant_chunk_len[1]:
                 continue
 
             # Return the chunk definition ((e1_start,e1_end),(e2_start, e2_end))
@@ -74,7 +172,7 @@ class Algorithm_Manager():
         # If couldn't find common chunks return None
         return None
     
-    def find_chunk_in_episode(self, episode: Episode, chunk: Chunk, starting_search_index: int = 0, ending_search_index: int = None, reverse_search: bool = False, minimum_reliability: float = 0.90) -> Chunk:
+    def find_chunk_in_episode(self, episode: Episode, chunk: Chunk, starting_search_index: int = 0, ending_search_index: int = None, reverse_search: bool = False, minimum_reliability: float = 0.90, deadline: Deadline = None) -> Chunk:
         """
         Description: Searches for a chunk in an episode.
 
@@ -85,12 +183,20 @@ class Algorithm_Manager():
             - ending_search_index: Ending frame in the episode to look for the chunk
             - reverse_search: True when the search should start from the end of the episode towards its beggining
             - minimum_reliability: Parameter to establish result reliability. Values closer to one might deliver better results but with a lower performance. Also, higher values might not find any matches
+            - deadline: Deadline object. Once it expires the best locations found so far are used (They still need the minimum reliability). If omited the search has no time limit
 
-        Return Value: Matching chunk in the search episode
+        Return Value: Matching chunk in the search episode, with the reliability of its worst located frames
         """
+        # With different frame rates, the episode is searched at the frame rate of the chunk
+        search_episode = Algorithm_Manager._retime(episode, chunk.episode.fps)
+        if search_episode is not episode:
+            starting_search_index = search_episode.from_frame(starting_search_index)
+            if ending_search_index is not None:
+                ending_search_index = search_episode.from_frame(ending_search_index)
+
         # Adjust ending_search_index
-        if ending_search_index is None or ending_search_index >= episode.frame_count:
-            ending_search_index = episode.frame_count
+        if ending_search_index is None or ending_search_index >= search_episode.frame_count:
+            ending_search_index = search_episode.frame_count
 
         # Check if starting search index is wrong
         if starting_search_index < 0 or starting_search_index >= ending_search_index:
@@ -101,10 +207,10 @@ class Algorithm_Manager():
         starting_frames=[chunk.start_frame + i for i in range(5)]
 
         # Locate those frames in the episode
-        starting_frames_relation, reliability = self.frame_algorithm.locate_frames(starting_frames, chunk.episode, episode, starting_search_index, ending_search_index, reverse_search)
+        starting_frames_relation, starting_reliability = self.frame_algorithm.locate_frames(starting_frames, chunk.episode, search_episode, starting_search_index, ending_search_index, reverse_search, deadline)
 
         # Check location reliability
-        if reliability < minimum_reliability:
+        if starting_reliability < minimum_reliability:
             # TODO: Raise Exception
             return None
 
@@ -112,24 +218,28 @@ class Algorithm_Manager():
         ending_frames=[chunk.end_frame-4+i for i in range(5)]
 
         # Locate those frames in the episode (Aim search to where they should be located)
-        ending_frames_relation, reliability = self.frame_algorithm.locate_frames(ending_frames, chunk.episode, episode, starting_frames_relation[starting_frames[-1]], starting_frames_relation[starting_frames[-1]] + (chunk.end_frame-chunk.start_frame)*2)
+        ending_frames_relation, ending_reliability = self.frame_algorithm.locate_frames(ending_frames, chunk.episode, search_episode, starting_frames_relation[starting_frames[-1]], starting_frames_relation[starting_frames[-1]] + (chunk.end_frame-chunk.start_frame)*2, deadline=deadline)
 
         # Check location reliability
-        if reliability < minimum_reliability:
+        if ending_reliability < minimum_reliability:
             # TODO: Raise Exception
             return None
 
-        # Return found chunk
-        found_chunk = Chunk(episode, starting_frames_relation[starting_frames[0]], ending_frames_relation[ending_frames[-1]])
+        # Return found chunk (In the frames of the episode)
+        start_frame, end_frame = starting_frames_relation[starting_frames[0]], ending_frames_relation[ending_frames[-1]]
+        if search_episode is not episode:
+            start_frame, end_frame = search_episode.to_frame(start_frame), search_episode.to_frame(end_frame)
+        found_chunk = Chunk(episode, start_frame, end_frame, min(starting_reliability, ending_reliability))
         return found_chunk
     
-    def locate_episodes(self, episodes: list, ref_episode: Episode) -> tuple:
+    def locate_episodes(self, episodes: list, ref_episode: Episode, deadline: Deadline = None) -> tuple:
         """
         Description: Locates opening and ending of a reference episode in the given episodes
 
         Parameters:
             - episodes: List of episodes where the opening and ending have not been located yet
             - ref_episode: Episode with its opening and ending located. The Episode object must contain the opening and ending chunks
+            - deadline: Deadline object shared by every search. Once it expires every search uses the best locations found so far. If omited the searches have no time limit
 
         Return Value: Tuple containing 2 lists, the first one with the opening chunk for every given episode and the second one with the endings
         """
@@ -140,15 +250,15 @@ class Algorithm_Manager():
         # Search for opening and ending in the episodes
         for episode in episodes:
             # Locate opening in the episode
-            opening = self.find_chunk_in_episode(episode, ref_episode.opening)
+            opening = self.find_chunk_in_episode(episode, ref_episode.opening, deadline=deadline)
 
             # Locate ending in the episode
             if opening:
                 # Save found opening
                 found_openings.append(opening)
-                ending = self.find_chunk_in_episode(episode, ref_episode.ending, opening.end_frame+1,reverse_search=True)
+                ending = self.find_chunk_in_episode(episode, ref_episode.ending, opening.end_frame+1,reverse_search=True, deadline=deadline)
             else:
-                ending = self.find_chunk_in_episode(episode, ref_episode.ending,reverse_search=True)
+                ending = self.find_chunk_in_episode(episode, ref_episode.ending,reverse_search=True, deadline=deadline)
 
             # Save found ending
             if ending:
@@ -157,24 +267,25 @@ class Algorithm_Manager():
         # Return found openings and endings
         return found_openings, found_endings
     
-    def locate_episode(self, episode: Episode, ref_episode: Episode) -> tuple:
+    def locate_episode(self, episode: Episode, ref_episode: Episode, deadline: Deadline = None) -> tuple:
         """
         Description: Locates opening and ending of a reference episode in a given episode
 
         Parameters:
             - episode: Episode where opening and ending should be located
             - ref_episode: Episode with its opening and ending located. The Episode object must contain the opening and ending chunks
+            - deadline: Deadline object shared by both searches. Once it expires they use the best locations found so far. If omited the searches have no time limit
 
         Return Value: A tuple with 2 chunks (opening and ending) of the search episode, like: (opening, ending)
         """
         # Locate opening in the episode
-        opening = self.find_chunk_in_episode(episode, ref_episode.opening)
+        opening = self.find_chunk_in_episode(episode, ref_episode.opening, deadline=deadline)
 
         # Locate ending in the episode
         if opening:
-            ending = self.find_chunk_in_episode(episode, ref_episode.ending, opening.end_frame+1,reverse_search=True)
+            ending = self.find_chunk_in_episode(episode, ref_episode.ending, opening.end_frame+1,reverse_search=True, deadline=deadline)
         else:
-            ending = self.find_chunk_in_episode(episode, ref_episode.ending,reverse_search=True)
+            ending = self.find_chunk_in_episode(episode, ref_episode.ending,reverse_search=True, deadline=deadline)
 
         # Return found openings and endings
         return opening, ending
\ No newline at end of file
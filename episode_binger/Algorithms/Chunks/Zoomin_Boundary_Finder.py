@@ -9,27 +9,137 @@ logger = logging.getLogger(__name__)
 
 class Zoomin_Boundary_Finder(Boundary_Finder):
     """
-    Class that holds an specific Boundary Finder Algorithm that finds the boundaries of a chunk performing a general scan and then zooming in into regions of interest
+    Class that holds an specific Boundary Finder Algorithm that finds the boundaries of a chunk galloping away from the identical pair of frames (With steps that double every time) until the frames stop being similar, and then zooming in into the transition with a binary search. It compares a few frames for every step, so chunks of any length are found comparing O(log n) frames
     """
-    def __init__(self, distance_algorithm: Distance_Algorithm, thumbnail_resolution: tuple = (36,64), max_frames_search_range: int = 180*24, max_loading_frames: int = 100, max_similar_frames_diff: float = 0.1, max_identical_frames_diff: float = 0.03):
+    def __init__(self, distance_algorithm: Distance_Algorithm, thumbnail_resolution: tuple = (36,64), num_probe_frames: int = 5, max_drift: int = 1, max_similar_frames_diff: float = 0.1, max_identical_frames_diff: float = 0.03):
         """
         Description: Creates a Zoomin_Boundary_Finder object
 
         Parameters:
             - distance_algorithm: An instance of the Distance_Algorithm object
             - thumbnail_resolution: Performance Parameter. It's the size to resize frames after loading them. Generally, the lower the better but a 10th part from the original resolution should be fine.
-            - max_frames_search_range: Max amount of frames to look forward and backwards from the starting point to find chunk boundaries
-            - max_loading_frames: Max amount of frames to load at once for the search
+            - num_probe_frames: Amount of consecutive frames compared at every step. A single frame that is too different (Noise, a scene cut) doesn't end the chunk
+            - max_drift: Max amount of frames the frames of e2 can be shifted from their pair in e1 (Rounding of different frame rates, inexact seeks)
             - max_similar_frames_diff: Max difference percentage (between 0 and 1) between frames to consider them similar
             - max_identical_frames_diff: Max difference percentage (between 0 and 1) between frames to consider them identical
         """
         self.distance_algorithm = distance_algorithm
-        self.max_frames_search_range = max_frames_search_range
         self.thumbnail_resolution = thumbnail_resolution
+        self.num_probe_frames = num_probe_frames
+        self.max_drift = max_drift
         self.max_similar_frames_diff = max_similar_frames_diff
         self.max_identical_frames_diff = max_identical_frames_diff
-        self.max_loading_frames = max_loading_frames
-        
+
+    def _align(self, e1: Episode, e2: Episode, identical_frames: tuple) -> tuple:
+        """
+        Description: Shifts the frame of e2 of an identical pair to the one that best follows the frames of e1 (Static scenes make near frames look identical)
+
+        Parameters:
+            - e1: An episode
+            - e2: Another episode
+            - identical_frames: Tuple containing frame indexes like: (frame_index_e1, frame_index_e2)
+
+        Return Value: Tuple containing the aligned frame indexes like: (frame_index_e1, frame_index_e2)
+        """
+        a, b = identical_frames
+        e1_frame_indexes = list(range(a, min(a+self.num_probe_frames, e1.frame_count)))
+        e2_frame_indexes = list(range(max(0, b-self.max_drift), min(b+len(e1_frame_indexes)+self.max_drift, e2.frame_count)))
+        distance_matrix = self.distance_algorithm.calculate_distance(e1, e2, e1_frame_indexes, e2_frame_indexes, self.thumbnail_resolution, True)
+
+        # Mean distance of every diagonal (Shift of the frames of e2)
+        best_shift, best_distance = 0, None
+        for shift in range(-self.max_drift, self.max_drift+1):
+            rows = [i for i in range(len(e1_frame_indexes)) if 0 <= b+shift+i-e2_frame_indexes[0] < len(e2_frame_indexes)]
+            if not rows:
+                continue
+            distance = np.mean([distance_matrix[i, b+shift+i-e2_frame_indexes[0]] for i in rows])
+            if best_distance is None or distance < best_distance:
+                best_shift, best_distance = shift, distance
+
+        return (a, b+best_shift)
+
+    def _probe(self, e1: Episode, e2: Episode, identical_frames: tuple, direction: int, offset: int) -> np.ndarray:
+        """
+        Description: Compares the pairs of frames at an offset from the identical pair and the ones before it (Towards the identical pair)
+
+        Parameters:
+            - e1: An episode
+            - e2: Another episode
+            - identical_frames: Tuple containing frame indexes like: (frame_index_e1, frame_index_e2)
+            - direction: 1 to move towards the end of the episodes, -1 towards their beginning
+            - offset: Amount of frames from the identical pair
+
+        Return Value: Numpy array with the distance of every pair, from the closest one to the identical pair to the farthest one. Each frame of e1 is compared with the closest frames of e2 (Up to max_drift frames away) and keeps the smallest distance
+        """
+        a, b = identical_frames
+        offsets = range(max(0, offset-self.num_probe_frames+1), offset+1)
+        e1_frame_indexes = sorted(a+direction*o for o in offsets)
+        e2_frame_indexes = list(range(max(0, e1_frame_indexes[0]+b-a-self.max_drift), min(e1_frame_indexes[-1]+b-a+self.max_drift+1, e2.frame_count)))
+        distance_matrix = self.distance_algorithm.calculate_distance(e1, e2, e1_frame_indexes, e2_frame_indexes, self.thumbnail_resolution, True)
+
+        distances = np.empty(len(e1_frame_indexes))
+        for i, index in enumerate(e1_frame_indexes):
+            first = max(0, index+b-a-self.max_drift-e2_frame_indexes[0])
+            last = min(len(e2_frame_indexes), index+b-a+self.max_drift+1-e2_frame_indexes[0])
+            distances[i] = distance_matrix[i, first:last].min()
+
+        return distances if direction > 0 else distances[::-1]
+
+    def _find_boundary(self, e1: Episode, e2: Episode, identical_frames: tuple, direction: int) -> int:
+        """
+        Description: Finds how far the chunk goes from the identical pair in one direction
+
+        Parameters:
+            - e1: An episode
+            - e2: Another episode
+            - identical_frames: Tuple containing frame indexes like: (frame_index_e1, frame_index_e2)
+            - direction: 1 to move towards the end of the episodes, -1 towards their beginning
+
+        Return Value: Amount of frames from the identical pair to the last identical pair of the chunk. None if it couldn't be found
+        """
+        a, b = identical_frames
+        if direction > 0:
+            max_offset = min(e1.frame_count-1-a, e2.frame_count-1-b)
+        else:
+            max_offset = min(a, b)
+
+        probes = {}
+        def is_similar(offset):
+            probes[offset] = self._probe(e1, e2, identical_frames, direction, offset)
+            return probes[offset].mean() <= self.max_similar_frames_diff
+
+        if not is_similar(0):
+            return None
+
+        # Gallop until the frames stop being similar (Or the episode ends)
+        similar_offset, different_offset, step = 0, None, 1
+        while similar_offset < max_offset:
+            offset = min(similar_offset+step, max_offset)
+            if not is_similar(offset):
+                different_offset = offset
+                break
+            similar_offset = offset
+            step *= 2
+
+        # Binary search of the transition
+        if different_offset is not None:
+            while different_offset-similar_offset > 1:
+                offset = (similar_offset+different_offset)//2
+                if is_similar(offset):
+                    similar_offset = offset
+                else:
+                    different_offset = offset
+
+        logger.debug(f"Boundary {similar_offset} frames {'after' if direction > 0 else 'before'} {identical_frames} ({len(probes)} probes)")
+
+        # Farthest identical pair of the last similar probe
+        distances = probes[similar_offset]
+        for i in reversed(range(len(distances))):
+            if distances[i] <= self.max_identical_frames_diff:
+                return similar_offset-(len(distances)-1-i)
+
+        return None
+
     def find_boundaries(self, e1: Episode, e2: Episode, identical_frames: tuple) -> tuple:
         """
         Description: Finds the upper and lower limit of a identical chunk in 2 episodes
@@ -41,104 +151,20 @@ class Zoomin_Boundary_Finder(Boundary_Finder):
 
         Return value: Tuple containing 2 chunks like: (chunk_e1, chunk_e2). Each chunk is defined by an start and end frame
         """
-        # Generate frame lists
-        e1_frame_indexes_aux = [i for i in range(identical_frames[0]-self.max_frames_search_range//2,identical_frames[0],self.max_frames_search_range//self.max_loading_frames)] + [i for i in range(identical_frames[0],identical_frames[0]+self.max_frames_search_range//2,self.max_frames_search_range//self.max_loading_frames)]
-        e2_frame_indexes_aux = [i for i in range(identical_frames[1]-self.max_frames_search_range//2,identical_frames[1],self.max_frames_search_range//self.max_loading_frames)] + [i for i in range(identical_frames[1], identical_frames[1]+self.max_frames_search_range//2,self.max_frames_search_range//self.max_loading_frames)]
-
-        # Only keep valid frames from lists
-        e1_frame_indexes = []
-        e2_frame_indexes = []
-        for i in range(len(e1_frame_indexes_aux)):
-            if e1_frame_indexes_aux[i] >= 0 and e2_frame_indexes_aux[i] >= 0 and e1_frame_indexes_aux[i] < e1.frame_count and e2_frame_indexes_aux[i] < e2.frame_count:
-                e1_frame_indexes.append(e1_frame_indexes_aux[i])
-                e2_frame_indexes.append(e2_frame_indexes_aux[i])
-        e1_frame_indexes_aux.clear()
-        e2_frame_indexes_aux.clear()
-
-        # Get frames lists comparison (One to one)
-        distance_matrix = self.distance_algorithm.calculate_distance(e1, e2, e1_frame_indexes, e2_frame_indexes,self.thumbnail_resolution)
-
-        # Iterate through distances and get the first and last that complies with the navigation_threshold
-        first_similar_pair=None
-        last_similar_pair=None
-        for i in range(len(e1_frame_indexes)):
-            if not first_similar_pair:
-                if distance_matrix[i,i] <= self.max_similar_frames_diff:
-                    first_similar_pair=(e1_frame_indexes[i], e2_frame_indexes[i])
-                    last_similar_pair=(e1_frame_indexes[i], e2_frame_indexes[i])
-            else:
-                if distance_matrix[i,i] <= self.max_similar_frames_diff:
-                    last_similar_pair=(e1_frame_indexes[i], e2_frame_indexes[i])
-                else:
-                    break
+        # The identical frames might carry their distance (Best match found before a deadline)
+        a, b = self._align(e1, e2, (identical_frames[0], identical_frames[1]))
 
-        if not first_similar_pair:
-            # Maybe throw an exception: "First Similar Pair of Frames not found"
-            return None
-        
         # Search for the first identical pair of frames
-        lower_boundary=None
-        e1_first_frame_indexes = [i for i in range(first_similar_pair[0]-self.max_frames_search_range//self.max_loading_frames if first_similar_pair[0]-self.max_frames_search_range//self.max_loading_frames > 0 else 0,first_similar_pair[0]+1)]
-        e2_first_frame_indexes = [i for i in range(first_similar_pair[1]-self.max_frames_search_range//self.max_loading_frames if first_similar_pair[1]-self.max_frames_search_range//self.max_loading_frames > 0 else 0,first_similar_pair[1]+1)]
-        distance_matrix = self.distance_algorithm.calculate_distance(e1, e2, e1_first_frame_indexes, e2_first_frame_indexes,self.thumbnail_resolution,True)
-        
-        # Get closest frames considering frame succession
-        diagonal_matrix = np.zeros((len(e1_first_frame_indexes),len(e2_first_frame_indexes)))
-        for i in range(len(e1_first_frame_indexes)):
-            for j in range(len(e2_first_frame_indexes)):
-                sum = 0
-                count = 0
-
-                for k in range(min(len(e1_first_frame_indexes)-i,len(e2_first_frame_indexes)-j)):
-                    sum += distance_matrix[i+k,j+k]
-                    count += 1
-                
-                diagonal_matrix[i,j] = sum/count
-        min_distance_index = np.unravel_index(np.argmin(diagonal_matrix),diagonal_matrix.shape)
-
-        checking_index = (min_distance_index[0]-min(min_distance_index[0],min_distance_index[1]),min_distance_index[1]-min(min_distance_index[0],min_distance_index[1]))
-        for i in range(len(e1_first_frame_indexes)-max(checking_index[0],checking_index[1])):
-            if diagonal_matrix[checking_index[0]+i,checking_index[1]+i] <= self.max_identical_frames_diff:
-                lower_boundary=(e1_first_frame_indexes[checking_index[0]+i],e2_first_frame_indexes[checking_index[1]+i])
-                break
-
-        if not lower_boundary:
-            # Maybe throw exception "Error finding lower boundary. Consider adjusting acceptance_threshold(Current value: {self.max_identical_frames_diff})"
+        lower_offset = self._find_boundary(e1, e2, (a, b), -1)
+        if lower_offset is None:
             logger.debug(f"Error finding lower boundary. Consider adjusting acceptance_threshold(Current value: {self.max_identical_frames_diff})")
             return None
-                
+
         # Search for the last identical pair of frames
-        upper_boundary=None
-        e1_last_frame_indexes = [i for i in range(last_similar_pair[0],last_similar_pair[0]+self.max_frames_search_range//self.max_loading_frames if last_similar_pair[0]+self.max_frames_search_range//self.max_loading_frames < e1.frame_count else e1.frame_count)]
-        e2_last_frame_indexes = [i for i in range(last_similar_pair[1],last_similar_pair[1]+self.max_frames_search_range//self.max_loading_frames if last_similar_pair[1]+self.max_frames_search_range//self.max_loading_frames < e2.frame_count else e2.frame_count)]
-        distance_matrix = self.distance_algorithm.calculate_distance(e1, e2, e1_last_frame_indexes, e2_last_frame_indexes,self.thumbnail_resolution,True,True)
-        e1_last_frame_indexes.reverse()
-        e2_last_frame_indexes.reverse()
-
-        # Get closest frames considering frame succession
-        diagonal_matrix = np.zeros((len(e1_last_frame_indexes),len(e2_last_frame_indexes)))
-        for i in range(len(e1_last_frame_indexes)):
-            for j in range(len(e2_last_frame_indexes)):
-                sum = 0
-                count = 0
-
-                for k in range(min(len(e1_last_frame_indexes)-i,len(e2_last_frame_indexes)-j)):
-                    sum += distance_matrix[i+k,j+k]
-                    count += 1
-                
-                diagonal_matrix[i,j] = sum/count
-        min_distance_index = np.unravel_index(np.argmin(diagonal_matrix),diagonal_matrix.shape)
-
-        checking_index = (min_distance_index[0]-min(min_distance_index[0],min_distance_index[1]),min_distance_index[1]-min(min_distance_index[0],min_distance_index[1]))
-        for i in range(len(e1_last_frame_indexes)-max(checking_index[0],checking_index[1])):
-            if diagonal_matrix[checking_index[0]+i,checking_index[1]+i] <= self.max_identical_frames_diff:
-                upper_boundary=(e1_last_frame_indexes[checking_index[0]+i],e2_last_frame_indexes[checking_index[1]+i])
-                break
-            
-        if not upper_boundary:
-            # Maybe throw exception "Error finding upper boundary. Consider adjusting acceptance_threshold(Current value: {self.max_identical_frames_diff})"
+        upper_offset = self._find_boundary(e1, e2, (a, b), 1)
+        if upper_offset is None:
             logger.debug(f"Error finding upper boundary. Consider adjusting acceptance_threshold(Current value: {self.max_identical_frames_diff})")
             return None
 
         # Return Result
-        return (Chunk(e1, lower_boundary[0], upper_boundary[0]),Chunk(e2, lower_boundary[1], upper_boundary[1]))
\ No newline at end of file
+        return (Chunk(e1, a-lower_offset, a+upper_offset),Chunk(e2, b-lower_offset, b+upper_offset))
@@ -1,10 +1,14 @@
 from enum import Enum
-from episode_binger.Algorithms.Chunks.Boundary_Finder import Boundary_Finder
-from episode_binger.Algorithms.Chunks.Zoomin_Boundary_Finder import Zoomin_Boundary_Finder
-
+from episode_binger.Lazy_Module import make_lazy
 
 class Boundary_Finder_Type(Enum):
     """
     Enumeration Class with the types of Boundary Finder Algorithms in the project
     """
-    ZOOMIN_FINDER = 0
\ No newline at end of file
+    ZOOMIN_FINDER = 0
+
+# Classes are imported the first time they are requested
+make_lazy(__name__, {
+    "Boundary_Finder": "episode_binger.Algorithms.Chunks.Boundary_Finder",
+    "Zoomin_Boundary_Finder": "episode_binger.Algorithms.Chunks.Zoomin_Boundary_Finder",
+})
\ No newline at end of file
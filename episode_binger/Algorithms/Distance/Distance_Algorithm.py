@@ -21,4 +21,32 @@ class Distance_Algorithm(ABC):
 
         Return Value: A numpy matrix containing difference percentage between each pair of frames.
         """
-        pass
\ No newline at end of file
+        pass
+
+    def _load_frames(self, e1: Episode, e2: Episode, index_frames_e1: list, index_frames_e2: list, thumbnail_resolution: tuple, consecutive_frames: bool=False, reversed_list: bool=False) -> tuple:
+        """
+        Description: Loads the frames to compare from both episodes. Frames from e1 are decoded by its frame provider in the background while frames from e2 are decoded in the calling thread.
+
+        Parameters:
+            - e1: An episode
+            - e2: Another episode
+            - index_frames_e1: List of frame indexes from e1 to load
+            - index_frames_e2: List of frame indexes from e2 to load
+            - thumbnail_resolution: Performance Parameter. It's the size to resize frames after loading them.
+            - consecutive_frames: Performance Parameter. True if the lists of frames are consecutive.
+            - reversed_list: True if the lists of frames should be reversed.
+
+        Return Value: A tuple containing 2 uint8 numpy arrays with the loaded frames, like: (e1_frames, e2_frames)
+        """
+        # If frames to load are not consecutive
+        if not consecutive_frames:
+            e1.prefetch_frame_list(index_frames_e1, thumbnail_resolution)
+            e2_frames = e2.load_frame_list(index_frames_e2, thumbnail_resolution, reversed_list)
+            e1_frames = e1.load_frame_list(index_frames_e1, thumbnail_resolution, reversed_list)
+        # If frames to load are consecutive
+        else:
+            e1.prefetch_consecutive_frames(index_frames_e1[0], len(index_frames_e1), thumbnail_resolution)
+            e2_frames = e2.load_consecutive_frames(index_frames_e2[0], len(index_frames_e2), thumbnail_resolution, reversed_list)
+            e1_frames = e1.load_consecutive_frames(index_frames_e1[0], len(index_frames_e1), thumbnail_resolution, reversed_list)
+
+        return e1_frames, e2_frames
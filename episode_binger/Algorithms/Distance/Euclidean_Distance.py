@@ -1,13 +1,80 @@
 from episode_binger.Algorithms.Distance import Distance_Algorithm
 from episode_binger.Dataclasses import Episode
+from episode_binger.Memory_Governor import Memory_Governor
+from collections import OrderedDict
+from threading import Lock
 from math import sqrt
 import numpy as np
-from threading import Thread
 
 class Euclidean_Distance(Distance_Algorithm):
     """
-    Class that holds an specific Distance Algorithm that calculates the distance between frames using the Manhattan Distances
+    Class that holds an specific Distance Algorithm that calculates the distance between frames using the Euclidean Distances
     """
+    def __init__(self, gram_matrix: bool = False, max_cached_norms: int = 100000, memory_governor: Memory_Governor = None):
+        """
+        Description: Creates an Euclidean_Distance object
+
+        Parameters:
+            - gram_matrix: Performance Parameter. True to compute the distance between whole frames as ||a||² + ||b||² - 2a·b with one matrix multiplication. False to compute the mean of the distances of every pixel (Much slower and memory hungry for big sets of frames). They are different metrics: The distance between whole frames is the root mean square of the pixel distances, so it's never below the mean (Equal when every pixel changes alike) and never above its square root. No threshold scale turns one into the other: A few very different pixels (A logo, subtitles) weigh up to 10 times more with 1% of the pixels changed, so the similarity thresholds of the algorithms must be raised to use it
+            - max_cached_norms: Max amount of frame norms to keep cached between calls
+            - memory_governor: Memory_Governor object to size the tiles of frames compared at once pixel by pixel. If omited every frame is compared at once
+        """
+        self.gram_matrix = gram_matrix
+        self.max_cached_norms = max_cached_norms
+        self.memory_governor = memory_governor
+        self._norms_cache = OrderedDict()
+        self._norms_cache_lock = Lock()
+
+    def __getstate__(self):
+        # Locks can't be sent to other processes
+        state = self.__dict__.copy()
+        state["_norms_cache"] = OrderedDict()
+        del state["_norms_cache_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._norms_cache_lock = Lock()
+
+    def _get_squared_norms(self, episode: Episode, indexes: list, frame_vectors: np.ndarray, thumbnail_resolution: tuple) -> np.ndarray:
+        """
+        Description: Gets the squared norm of every frame vector. Norms computed in previous calls are taken from the cache
+
+        Parameters:
+            - episode: Episode the frames belong to
+            - indexes: Frame indexes of every frame vector
+            - frame_vectors: Matrix with one flattened frame per row
+            - thumbnail_resolution: Size the frames were resized to
+
+        Return Value: Numpy array with the squared norm of every frame
+        """
+        squared_norms = np.empty(len(indexes), dtype=np.float32)
+        # Keyed by content, so copies of the same file share their norms (Path if the content is unknown)
+        content = getattr(episode, "fingerprint", None) or episode.path
+        keys = [(content, index, tuple(thumbnail_resolution)) for index in indexes]
+        missing = []
+
+        with self._norms_cache_lock:
+            for i, key in enumerate(keys):
+                norm = self._norms_cache.get(key)
+                if norm is None:
+                    missing.append(i)
+                else:
+                    squared_norms[i] = norm
+
+        if not missing:
+            return squared_norms
+
+        squared_norms[missing] = np.einsum("ij,ij->i", frame_vectors[missing], frame_vectors[missing])
+
+        with self._norms_cache_lock:
+            for i in missing:
+                self._norms_cache[keys[i]] = squared_norms[i]
+            while len(self._norms_cache) > self.max_cached_norms:
+                self._norms_cache.popitem(last=False)
+
+        return squared_norms
+
     def calculate_distance(self, e1: Episode, e2: Episode, index_frames_e1: list, index_frames_e2: list, thumbnail_resolution: tuple, consecutive_frames: bool=False, reversed_list: bool=False):
         """
         Description: Calculates how different are the given frames from episode e1 and e2. It compares every specified frame from e1 with every specified frame from e2.
@@ -23,34 +90,52 @@ class Euclidean_Distance(Distance_Algorithm):
 
         Return Value: A numpy matrix containing difference percentage between each pair of frames.
         """
-        e1_frames = []
-        e2_frames = []
+        e1_frames, e2_frames = self._load_frames(e1, e2, index_frames_e1, index_frames_e2, thumbnail_resolution, consecutive_frames, reversed_list)
+
+        if not self.gram_matrix:
+            max_distance = thumbnail_resolution[1]*thumbnail_resolution[0]*sqrt(3*(255**2)) # Max Euclidean Distance
+
+            # Frames of e1 compared at once (Their differences with every frame of e2 take int32 and float64 copies)
+            tile = len(e1_frames)
+            if self.memory_governor is not None:
+                tile = self.memory_governor.get_tile(len(e1_frames), len(e2_frames)*e2_frames[0].size*(4+8))
+
+            comparing_matrix = np.empty((len(e1_frames), len(e2_frames)))
+            for t in range(0, len(e1_frames), tile):
+                # Calculate Euclidean Distance (int32 so squared differences don't overflow)
+                tile_matrix = e1_frames[t:t+tile, np.newaxis].astype(np.int32)-e2_frames
+                tile_matrix **= 2
+                tile_matrix = np.sum(tile_matrix, axis=-1)
+                tile_matrix = np.sqrt(tile_matrix)
+                comparing_matrix[t:t+tile] = np.sum(tile_matrix, axis=(-1,-2))
 
-        max_distance = thumbnail_resolution[1]*thumbnail_resolution[0]*sqrt(3*(255**2)) # Max Euclidean Distance
+            return comparing_matrix / max_distance  # Return relative distances
 
-        # If frames to load are not consecutive
-        if not consecutive_frames:
-            e1_thread = Thread(target=e1.load_frame_list, args=(index_frames_e1, thumbnail_resolution, reversed_list, e1_frames))
-            e2_thread = Thread(target=e2.load_frame_list, args=(index_frames_e2, thumbnail_resolution, reversed_list, e2_frames))
-        # If frames to load are consecutive
-        else:
-            e1_thread = Thread(target=e1.load_consecutive_frames, args=(index_frames_e1[0],len(index_frames_e1),thumbnail_resolution, reversed_list, e1_frames))
-            e2_thread = Thread(target=e2.load_consecutive_frames, args=(index_frames_e2[0],len(index_frames_e2),thumbnail_resolution, reversed_list, e2_frames))
+        max_distance = sqrt(thumbnail_resolution[1]*thumbnail_resolution[0]*3*(255**2))    # Max Euclidean Distance between whole frames
 
-        e1_thread.start()
-        e2_thread.start()
+        # Frame indexes in the order they were loaded
+        if consecutive_frames:
+            index_frames_e1 = list(range(index_frames_e1[0], index_frames_e1[0]+len(index_frames_e1)))
+            index_frames_e2 = list(range(index_frames_e2[0], index_frames_e2[0]+len(index_frames_e2)))
+        if reversed_list:
+            index_frames_e1 = index_frames_e1[::-1]
+            index_frames_e2 = index_frames_e2[::-1]
 
-        e1_thread.join()
-        e2_thread.join()
+        # Flatten frames into vectors centered around 0 (Distances don't change and float32 keeps more precision)
+        e1_vectors = e1_frames.reshape(len(e1_frames), -1).astype(np.float32)
+        e2_vectors = e2_frames.reshape(len(e2_frames), -1).astype(np.float32)
+        e1_vectors -= 128
+        e2_vectors -= 128
 
-        e1_frames = np.array(e1_frames)
-        e2_frames = np.array(e2_frames)
+        e1_squared_norms = self._get_squared_norms(e1, index_frames_e1, e1_vectors, thumbnail_resolution)
+        e2_squared_norms = self._get_squared_norms(e2, index_frames_e2, e2_vectors, thumbnail_resolution)
 
-        # Calculate Euclidean Distance
-        comparing_matrix = e1_frames[:, np.newaxis]-e2_frames
-        comparing_matrix **= 2
-        comparing_matrix = np.sum(comparing_matrix, axis=-1)
-        comparing_matrix = np.sqrt(comparing_matrix)
-        comparing_matrix = np.sum(comparing_matrix, axis=(-1,-2))
+        # Calculate Euclidean Distance: ||a-b||² = ||a||² + ||b||² - 2a·b
+        comparing_matrix = e1_vectors @ e2_vectors.T
+        comparing_matrix *= -2
+        comparing_matrix += e1_squared_norms[:, np.newaxis]
+        comparing_matrix += e2_squared_norms[np.newaxis, :]
+        np.maximum(comparing_matrix, 0, out=comparing_matrix)  # Rounding errors could make identical frames slightly negative
+        np.sqrt(comparing_matrix, out=comparing_matrix)
 
-        return comparing_matrix / max_distance  # Return relative distances
\ No newline at end of file
+        return comparing_matrix / max_distance  # Return relative distances
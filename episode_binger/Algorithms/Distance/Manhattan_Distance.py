@@ -1,12 +1,21 @@
-from threading import Thread
 import numpy as np
 from episode_binger.Dataclasses import Episode
 from episode_binger.Algorithms.Distance import Distance_Algorithm
+from episode_binger.Memory_Governor import Memory_Governor
 
 class Manhattan_Distance(Distance_Algorithm):
     """
     Class that holds an specific Distance Algorithm that calculates the distance between frames using the Manhattan Distances
     """
+    def __init__(self, memory_governor: Memory_Governor = None):
+        """
+        Description: Creates a Manhattan_Distance object
+
+        Parameters:
+            - memory_governor: Memory_Governor object to size the tiles of frames compared at once. If omited every frame of e1 is compared with all the frames of e2 at once
+        """
+        self.memory_governor = memory_governor
+
     def calculate_distance(self, e1: Episode, e2: Episode, index_frames_e1: list, index_frames_e2: list, thumbnail_resolution: tuple, consecutive_frames: bool=False, reversed_list: bool=False):
         """
         Description: Calculates how different are the given frames from episode e1 and e2. It compares every specified frame from e1 with every specified frame from e2.
@@ -22,32 +31,24 @@ class Manhattan_Distance(Distance_Algorithm):
 
         Return Value: A numpy matrix containing difference percentage between each pair of frames.
         """
-        e1_frames = []
-        e2_frames = []
-
         max_distance = thumbnail_resolution[1]*thumbnail_resolution[0]*3*255    # Max Manhattan Distance
 
-        # If frames to load are not consecutive
-        if not consecutive_frames:
-            e1_thread = Thread(target=e1.load_frame_list, args=(index_frames_e1, thumbnail_resolution, reversed_list, e1_frames))
-            e2_thread = Thread(target=e2.load_frame_list, args=(index_frames_e2, thumbnail_resolution, reversed_list, e2_frames))
-        # If frames to load are consecutive
-        else:
-            e1_thread = Thread(target=e1.load_consecutive_frames, args=(index_frames_e1[0],len(index_frames_e1),thumbnail_resolution, reversed_list, e1_frames))
-            e2_thread = Thread(target=e2.load_consecutive_frames, args=(index_frames_e2[0],len(index_frames_e2),thumbnail_resolution, reversed_list, e2_frames))
-
-        e1_thread.start()
-        e2_thread.start()
+        e1_frames, e2_frames = self._load_frames(e1, e2, index_frames_e1, index_frames_e2, thumbnail_resolution, consecutive_frames, reversed_list)
 
-        e1_thread.join()
-        e2_thread.join()
+        # Calculate Manhattan Distance one frame of e1 at a time (|a-b| = max(a,b)-min(a,b) keeps uint8 without building an (n, m, h, w, 3) tensor)
+        e2_vectors = e2_frames.reshape(len(e2_frames), -1)
+        comparing_matrix = np.empty((len(e1_frames), len(e2_frames)))
 
-        e1_frames = np.array(e1_frames)
-        e2_frames = np.array(e2_frames)
+        # Frames of e2 compared at once (Two temporary copies of them)
+        tile = len(e2_vectors)
+        if self.memory_governor is not None:
+            tile = self.memory_governor.get_tile(len(e2_vectors), 2*e2_vectors.shape[1])
 
-        # Calculate Manhattan Distance
-        comparing_matrix = e1_frames[:, np.newaxis]-e2_frames
-        comparing_matrix = np.abs(comparing_matrix)
-        comparing_matrix = np.sum(comparing_matrix,axis=(-1,-2,-3))
+        for i in range(len(e1_frames)):
+            e1_vector = e1_frames[i].ravel()
+            for t in range(0, len(e2_vectors), tile):
+                differences = np.maximum(e2_vectors[t:t+tile], e1_vector)
+                differences -= np.minimum(e2_vectors[t:t+tile], e1_vector)
+                comparing_matrix[i, t:t+tile] = differences.sum(axis=1, dtype=np.uint32)
 
         return comparing_matrix / max_distance  # Return relative distances
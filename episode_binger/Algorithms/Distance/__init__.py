@@ -1,11 +1,16 @@
 from enum import Enum
-from episode_binger.Algorithms.Distance.Distance_Algorithm import Distance_Algorithm
-from episode_binger.Algorithms.Distance.Euclidean_Distance import Euclidean_Distance
-from episode_binger.Algorithms.Distance.Manhattan_Distance import Manhattan_Distance
+from episode_binger.Lazy_Module import make_lazy
 
 class Distance_Algorithm_Type(Enum):
     """
     Enumeration Class with the types of Distance Algorithms in the project
     """
     MANHATTAN_DISTANCE = 0
-    EUCLIDEAN_DISTANCE = 1
\ No newline at end of file
+    EUCLIDEAN_DISTANCE = 1
+
+# Classes are imported the first time they are requested
+make_lazy(__name__, {
+    "Distance_Algorithm": "episode_binger.Algorithms.Distance.Distance_Algorithm",
+    "Euclidean_Distance": "episode_binger.Algorithms.Distance.Euclidean_Distance",
+    "Manhattan_Distance": "episode_binger.Algorithms.Distance.Manhattan_Distance",
+})
\ No newline at end of file
@@ -0,0 +1,271 @@
+from episode_binger.Algorithms.Frames.FrameLocator import Frame_Locator
+from episode_binger.Dataclasses import Episode
+from episode_binger.Dataclasses import Deadline
+from episode_binger.Algorithms.Distance import Distance_Algorithm
+from episode_binger.Memory_Governor import Memory_Governor
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Correlation_Frame_Locator(Frame_Locator):
+    """
+    Class that holds an specific Frame Locator algorithm that turns frames into small descriptors (Mean color of a grid of blocks) and finds where the frames to locate fit best in the search range by normalized cross-correlation, computed with FFTs.
+    Only the best candidates are compared with the distance algorithm, the rest of the search range is compared through the descriptors, so longer lists of frames to locate barely increase the cost
+    """
+    def __init__(self, distance_algorithm: Distance_Algorithm, thumbnail_resolution: tuple = (36,64), descriptor_grid: tuple = (4,4), max_loading_frames: int = 5000, max_candidates: int = 3, verification_radius: int = 2, max_identical_frames_diff: float = 0.03, memory_governor: Memory_Governor = None):
+        """
+        Description: Creates a Correlation_Frame_Locator object
+
+        Parameters:
+            - distance_algorithm: An instance of the Distance_Algorithm object. Used to verify the candidates
+            - thumbnail_resolution: Performance Parameter. It's the size to resize frames after loading them. Generally, the lower the better but a 10th part from the original resolution should be fine.
+            - descriptor_grid: Amount of blocks (rows, columns) every frame is divided in. The descriptor of a frame is the mean color of every block
+            - max_loading_frames: Max amount of frames to load at once when searching
+            - max_candidates: Amount of best correlated positions of every section to verify with the distance algorithm
+            - verification_radius: Amount of frames around every candidate position that are verified too
+            - max_identical_frames_diff: Max difference percentage (between 0 and 1) between frames to consider them identical
+            - memory_governor: Memory_Governor object. Sections are shortened to fit in the memory left and the search waits while the memory is over the ceiling. If omited sections always have max_loading_frames
+        """
+        self.distance_algorithm = distance_algorithm
+        self.thumbnail_resolution = thumbnail_resolution
+        self.descriptor_grid = descriptor_grid
+        self.max_loading_frames = max_loading_frames
+        self.max_candidates = max_candidates
+        self.verification_radius = verification_radius
+        self.max_identical_frames_diff = max_identical_frames_diff
+        self.memory_governor = memory_governor
+
+    def _get_descriptors(self, frames: np.ndarray) -> np.ndarray:
+        """
+        Description: Computes the descriptor of every frame: The mean color of every block of the descriptor grid
+
+        Parameters:
+            - frames: uint8 numpy array with the frames, shaped like (n, height, width, 3)
+
+        Return Value: float64 numpy array shaped like (n, rows*columns*3)
+        """
+        rows, columns = self.descriptor_grid
+        block_height = frames.shape[1] // rows
+        block_width = frames.shape[2] // columns
+
+        # Crop the pixels that don't fit in the grid and average every block
+        frames = frames[:, :rows*block_height, :columns*block_width]
+        blocks = frames.reshape(len(frames), rows, block_height, columns, block_width, 3)
+        return blocks.mean(axis=(2,4), dtype=np.float64).reshape(len(frames), -1)
+
+    def _get_sections(self, num_probe_frames: int, starting_search_index: int, ending_search_index: int, reverse_search: bool, section_len: int = None) -> list:
+        """
+        Description: Divides the search range in sections to load. Every section overlaps the next one so no position is left out
+
+        Parameters:
+            - num_probe_frames: Amount of frames to locate
+            - starting_search_index: First frame of the search range
+            - ending_search_index: Last frame of the search range (Not included)
+            - reverse_search: True if the sections should be searched from the ending of the range
+            - section_len: Amount of positions searched in every section. If omited, max_loading_frames
+
+        Return Value: List of tuples like (first_frame, number_of_frames) in search order
+        """
+        if section_len is None:
+            section_len = self.max_loading_frames
+
+        sections = []
+        for start in range(starting_search_index, ending_search_index, section_len):
+            end = min(start + section_len + num_probe_frames - 1, ending_search_index)
+            sections.append((start, end - start))
+            if end == ending_search_index:
+                break
+
+        if reverse_search:
+            sections.reverse()
+
+        return sections
+
+    def _correlate(self, probe: np.ndarray, signal: np.ndarray) -> np.ndarray:
+        """
+        Description: Scores how well the probe descriptors fit every position of the signal. Normalized cross-correlation between the probe and every window of the signal (Invariant to brightness and contrast changes).
+        If the probe has no variation (Like black frames) the negated squared distance is used instead
+
+        Parameters:
+            - probe: Descriptors of the frames to locate, shaped like (m, d)
+            - signal: Descriptors of the search frames, shaped like (n, d)
+
+        Return Value: Numpy array with the score of every position (n-m+1 values). The higher the better
+        """
+        m, n = len(probe), len(signal)
+        num_values = probe.size
+
+        # Window sums of the signal values and their squares
+        value_sums = np.concatenate(([0], np.cumsum(signal.sum(axis=1))))
+        square_sums = np.concatenate(([0], np.cumsum((signal**2).sum(axis=1))))
+        window_sums = value_sums[m:] - value_sums[:n-m+1]
+        window_square_sums = square_sums[m:] - square_sums[:n-m+1]
+
+        probe_std = probe.std()
+        if probe_std >= 1:
+            probe = (probe - probe.mean()) / probe_std
+
+        # Cross-correlation of every descriptor dimension, summed in the frequency domain (One inverse FFT)
+        padded_probe = np.zeros_like(signal)
+        padded_probe[:m] = probe
+        spectrum = (np.fft.rfft(signal, axis=0) * np.conj(np.fft.rfft(padded_probe, axis=0))).sum(axis=1)
+        correlation = np.fft.irfft(spectrum, n)[:n-m+1]
+
+        # Flat probe: Squared distance ||w||² - 2w·p + ||p||²
+        if probe_std < 1:
+            return -(window_square_sums - 2*correlation + (probe**2).sum())
+
+        window_means = window_sums / num_values
+        window_stds = np.sqrt(np.maximum(window_square_sums / num_values - window_means**2, 0))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = correlation / (num_values * window_stds)
+        scores[window_stds < 1e-6] = -1     # Flat windows can't be correlated
+
+        return scores
+
+    def _correlate_frames(self, probe: np.ndarray, signal: np.ndarray) -> np.ndarray:
+        """
+        Description: Scores every position of the signal by its best correlated single frame. Frames to locate taken from a chunk boundary might only partially belong to the chunk, so only some of them match
+
+        Parameters:
+            - probe: Descriptors of the frames to locate, shaped like (m, d)
+            - signal: Descriptors of the search frames, shaped like (n, d)
+
+        Return Value: Numpy array with the score of every position (n-m+1 values). The higher the better
+        """
+        m, n = len(probe), len(signal)
+
+        # Correlation of every pair of frames (Flat frames are not correlated with any other)
+        def normalize(descriptors):
+            stds = descriptors.std(axis=1, keepdims=True)
+            return np.where(stds >= 1, (descriptors - descriptors.mean(axis=1, keepdims=True)) / np.maximum(stds, 1), 0)
+        frame_correlations = normalize(probe) @ normalize(signal).T / probe.shape[1]
+
+        # Best frame of every position
+        return np.max([frame_correlations[i, i:i+n-m+1] for i in range(m)], axis=0)
+
+    def _get_candidates(self, scores: np.ndarray, num_probe_frames: int, candidates: list) -> list:
+        """
+        Description: Adds the best scored positions to a list of candidates, apart from the rest of candidates at least the amount of frames to locate
+
+        Parameters:
+            - scores: Score of every position
+            - num_probe_frames: Amount of frames to locate
+            - candidates: List of positions already selected
+
+        Return Value: List of positions
+        """
+        max_candidates = len(candidates) + self.max_candidates
+        for position in np.argsort(scores)[::-1]:
+            if all(abs(position - candidate) >= num_probe_frames for candidate in candidates):
+                candidates.append(int(position))
+                if len(candidates) == max_candidates:
+                    break
+
+        return candidates
+
+    def _verify(self, frames_to_locate: list, ref_episode: Episode, search_episode: Episode, position: int, starting_search_index: int, ending_search_index: int) -> tuple:
+        """
+        Description: Measures with the distance algorithm how different the frames to locate are from the search frames at a candidate position and around it
+
+        Parameters:
+            - frames_to_locate: The list of frame indexes from the ref_episode to locate
+            - ref_episode: The reference episode
+            - search_episode: The episode to search frames in
+            - position: Candidate search frame for the first frame to locate
+            - starting_search_index: First frame of the search range
+            - ending_search_index: Last frame of the search range (Not included)
+
+        Return Value: A tuple like (search_frame, diagonal_diff, min_frame_diff) for the best position found: The search frame of the first frame to locate, the mean difference of every frame and the smallest difference of one of them. Positions are compared by their best matching frame first
+        """
+        m = len(frames_to_locate)
+        first_frame = max(position - self.verification_radius, starting_search_index)
+        last_frame = min(position + m + self.verification_radius, ending_search_index)
+        search_frames = list(range(first_frame, last_frame))
+
+        distance_matrix = self.distance_algorithm.calculate_distance(ref_episode, search_episode, frames_to_locate, search_frames, self.thumbnail_resolution, True, False)
+
+        best = None
+        for offset in range(len(search_frames) - m + 1):
+            diagonal = distance_matrix[np.arange(m), np.arange(m) + offset]
+            match = (search_frames[offset], diagonal.mean(), diagonal.min())
+            if best is None or self._match_key(match) < self._match_key(best):
+                best = match
+
+        return best
+
+    def _match_key(self, match: tuple) -> tuple:
+        # Best matching frame first (Like the reliability of the match), then the mean difference of every frame
+        return (round(match[2], 3), match[1])
+
+    def locate_frames(self, frames_to_locate: list, ref_episode: Episode, search_episode: Episode, starting_search_index: int = 0, ending_search_index: int = None, reverse_search: bool = False, deadline: Deadline = None):
+        """
+        Description: Locates a list of consecutive frames from a given episode in another episode.
+
+        Parameters:
+            - frames_to_locate: The list of consecutive frame indexes from the ref_episode to locate in the search_episode
+            - ref_episode: The reference episode
+            - search_episode: The episode to search frames in
+            - reverse_search: True if the search should start from the ending of the episode instead of the beggining
+            - deadline: Deadline object. Once it expires the best match found so far is returned (At least one section of the search range is searched). If omited the search has no time limit
+
+        Return Value: A tuple containing a dictionary relating the frames of the reference episode with the ones in the search episode and a measure of how similar they are (The closer to 1 the better). Example: ({1234: 2345, 1235: 2346, 1236: 2347}, 0.95)
+        """
+        # Adjust ending search index
+        if ending_search_index is None or ending_search_index >= search_episode.frame_count:
+            ending_search_index = search_episode.frame_count    # Note that last accessed index will be ending_search_index - 1
+
+        m = len(frames_to_locate)
+
+        # Check if the frames fit in the search range
+        if starting_search_index < 0 or ending_search_index - starting_search_index < m:
+            # TODO: Raise Exception
+            return ({frame: starting_search_index+i for i, frame in enumerate(frames_to_locate)}, 0.0)
+
+        probe = self._get_descriptors(ref_episode.load_frame_list(frames_to_locate, self.thumbnail_resolution))
+
+        # Sections that fit in the memory left (The section in use and the prefetched one)
+        section_len = self.max_loading_frames
+        if self.memory_governor is not None:
+            self.memory_governor.wait_for_memory()
+            section_len = self.memory_governor.get_window(section_len, self.thumbnail_resolution[0]*self.thumbnail_resolution[1]*3, copies=2, min_frames=max(100, m))
+
+        sections = self._get_sections(m, starting_search_index, ending_search_index, reverse_search, section_len)
+        best_match = None
+        for s, (first_frame, number_of_frames) in enumerate(sections):
+            # Start decoding the next section while the current one is correlated. Not on the first section: Matches are usually found there
+            prefetched = s > 0 and s+1 < len(sections)
+            if prefetched:
+                search_episode.prefetch_consecutive_frames(*sections[s+1], self.thumbnail_resolution)
+
+            signal = self._get_descriptors(search_episode.load_consecutive_frames(first_frame, number_of_frames, self.thumbnail_resolution))
+            if len(signal) < m:
+                continue
+
+            # Verify the best correlated positions (Of the whole frames to locate and of single frames)
+            candidates = self._get_candidates(self._correlate(probe, signal), m, [])
+            candidates = self._get_candidates(self._correlate_frames(probe, signal), m, candidates)
+            for position in candidates:
+                match = self._verify(frames_to_locate, ref_episode, search_episode, first_frame + position, starting_search_index, ending_search_index)
+                logger.debug(f"Candidate {first_frame + position}: {match}")
+                if best_match is None or self._match_key(match) < self._match_key(best_match):
+                    best_match = match
+
+            if best_match[1] <= self.max_identical_frames_diff or best_match[2] < 0.01:
+                # The section read ahead won't be used
+                if prefetched:
+                    search_episode.cancel_prefetch_consecutive_frames(*sections[s+1], self.thumbnail_resolution)
+                break
+
+            # Out of time, keep the best match found so far
+            if deadline is not None and deadline.expired():
+                logger.debug(f"Deadline expired after {s+1} of {len(sections)} sections")
+                if prefetched:
+                    search_episode.cancel_prefetch_consecutive_frames(*sections[s+1], self.thumbnail_resolution)
+                break
+
+        search_frame, _, min_frame_diff = best_match
+        result = {frame: search_frame+i for i, frame in enumerate(frames_to_locate)}
+
+        return (result, (1-min_frame_diff))
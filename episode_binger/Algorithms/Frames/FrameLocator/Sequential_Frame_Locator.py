@@ -1,6 +1,8 @@
 from episode_binger.Algorithms.Frames.FrameLocator import Frame_Locator
 from episode_binger.Dataclasses import Episode
+from episode_binger.Dataclasses import Deadline
 from episode_binger.Algorithms.Distance import Distance_Algorithm
+from episode_binger.Memory_Governor import Memory_Governor
 import numpy as np
 import logging
 
@@ -10,7 +12,7 @@ class Sequential_Frame_Locator(Frame_Locator):
     """
     Class that holds an specific Frame Locator algorithm that loads sequential sections of frames for the search
     """
-    def __init__(self, distance_algorithm: Distance_Algorithm, thumbnail_resolution: tuple = (36,64), max_loading_frames: int = 500, max_identical_frames_diff: float = 0.03):
+    def __init__(self, distance_algorithm: Distance_Algorithm, thumbnail_resolution: tuple = (36,64), max_loading_frames: int = 500, max_identical_frames_diff: float = 0.03, keyframe_scan: bool = False, max_keyframe_candidates: int = 3, max_similar_frames_diff: float = 0.1, memory_governor: Memory_Governor = None):
         """
         Description: Creates a Sequential_Frame_Locator object
 
@@ -19,13 +21,105 @@ class Sequential_Frame_Locator(Frame_Locator):
             - thumbnail_resolution: Performance Parameter. It's the size to resize frames after loading them. Generally, the lower the better but a 10th part from the original resolution should be fine.
             - max_loading_frames: Max amount of frames to load at once when searching
             - max_identical_frames_diff: Max difference percentage (between 0 and 1) between frames to consider them identical
+            - keyframe_scan: True to compare the frames to locate with the keyframes of the search range first (A coarse scan that decodes a small fraction of the frames) and search only around the most similar ones. If the frames aren't found there the whole range is searched. Ignored if the episode can't tell its keyframes
+            - max_keyframe_candidates: Amount of most similar keyframes to search around
+            - max_similar_frames_diff: Max difference percentage (between 0 and 1) between a frame to locate and a keyframe to search around it
+            - memory_governor: Memory_Governor object. Sections are shortened to fit in the memory left and every section waits while the memory is over the ceiling. If omited sections always have max_loading_frames
         """
         self.distance_algorithm = distance_algorithm
         self.thumbnail_resolution = thumbnail_resolution
         self.max_loading_frames = max_loading_frames
         self.max_identical_frames_diff = max_identical_frames_diff
+        self.keyframe_scan = keyframe_scan
+        self.max_keyframe_candidates = max_keyframe_candidates
+        self.max_similar_frames_diff = max_similar_frames_diff
+        self.memory_governor = memory_governor
 
-    def locate_frames(self, frames_to_locate: list, ref_episode: Episode, search_episode: Episode, starting_search_index: int = 0, ending_search_index: int = None, reverse_search: bool = False):
+    def _get_section_frames(self, s: int, num_sections: int, section_len: int, starting_search_index: int, ending_search_index: int, reverse_search: bool) -> list:
+        """
+        Description: Gets the frame indexes of a section of the search range
+
+        Parameters:
+            - s: Number of the section (In search order)
+            - num_sections: Amount of sections the search range is divided in
+            - section_len: Amount of frames in every section (The last one in search order might have more)
+            - starting_search_index: First frame of the search range
+            - ending_search_index: Last frame of the search range (Not included)
+            - reverse_search: True if the sections are searched from the ending of the range
+
+        Return Value: List of frame indexes of the section
+        """
+        # Load episode forward
+        if not reverse_search:
+            if s < num_sections-1:
+                return [f for f in range(s*section_len+starting_search_index,starting_search_index+(s+1)*section_len)]
+            return [f for f in range(s*section_len+starting_search_index,ending_search_index)]
+
+        # Load episode backwards
+        if s == 0:
+            return [f for f in range((num_sections-1-s)*section_len+starting_search_index,ending_search_index)]
+        return [f for f in range((num_sections-1-s)*section_len+starting_search_index,starting_search_index+(num_sections-s)*section_len)]
+
+    def _cancel_prefetch(self, search_episode: Episode, search_frames: list):
+        """
+        Description: Discards the section read ahead when the search ends before comparing it
+
+        Parameters:
+            - search_episode: Episode where the frames are searched
+            - search_frames: Frames of the section read ahead. None if no section was read ahead
+        """
+        if search_frames is not None:
+            search_episode.cancel_prefetch_consecutive_frames(search_frames[0], len(search_frames), self.thumbnail_resolution)
+
+    def _locate_around_keyframes(self, frames_to_locate: list, ref_episode: Episode, search_episode: Episode, starting_search_index: int, ending_search_index: int) -> tuple:
+        """
+        Description: Coarse scan. Compares the frames to locate with the keyframes of the search range and searches the frames between the keyframes around the most similar ones
+
+        Parameters:
+            - frames_to_locate: The list of consecutive frame indexes from the ref_episode to locate in the search_episode
+            - ref_episode: The reference episode
+            - search_episode: The episode to search frames in
+            - starting_search_index: First frame of the search range
+            - ending_search_index: Last frame of the search range (Not included)
+
+        Return Value: A tuple like the one returned by locate_frames. None if the frames weren't found
+        """
+        keyframes = search_episode.get_keyframes()
+        if not keyframes:
+            return None
+
+        keyframes = [k for k in keyframes if starting_search_index <= k < ending_search_index]
+        if not keyframes:
+            return None
+
+        # Most similar keyframes to any of the frames to locate
+        keyframe_diffs = self.distance_algorithm.calculate_distance(ref_episode, search_episode, frames_to_locate, keyframes, self.thumbnail_resolution).min(axis=0)
+        candidates = [k for k in np.argsort(keyframe_diffs)[:self.max_keyframe_candidates] if keyframe_diffs[k] <= self.max_similar_frames_diff]
+
+        m = len(frames_to_locate)
+        best_match = None
+        for k in candidates:
+            # From the previous keyframe to the next one
+            first_frame = max(keyframes[k-1] if k > 0 else keyframes[k], starting_search_index)
+            last_frame = min((keyframes[k+1] if k+1 < len(keyframes) else keyframes[k]) + m, ending_search_index)
+            search_frames = list(range(first_frame, last_frame))
+            if len(search_frames) < m:
+                continue
+
+            distance_matrix = self.distance_algorithm.calculate_distance(ref_episode, search_episode, frames_to_locate, search_frames, self.thumbnail_resolution, True, False)
+            for offset in range(len(search_frames) - m + 1):
+                diagonal = distance_matrix[np.arange(m), np.arange(m) + offset]
+                if best_match is None or diagonal.mean() < best_match[1]:
+                    best_match = (search_frames[offset], diagonal.mean(), diagonal.min())
+
+        if best_match is None or not (best_match[1] <= self.max_identical_frames_diff or best_match[2] < 0.01):
+            logger.debug(f"Frames not found around keyframes {[keyframes[k] for k in candidates]}")
+            return None
+
+        search_frame, _, min_frame_diff = best_match
+        return ({frame: search_frame+i for i, frame in enumerate(frames_to_locate)}, (1-min_frame_diff))
+
+    def locate_frames(self, frames_to_locate: list, ref_episode: Episode, search_episode: Episode, starting_search_index: int = 0, ending_search_index: int = None, reverse_search: bool = False, deadline: Deadline = None):
         """
         Description: Locates a list of frames from a given episode in another episode.
 
@@ -34,6 +128,7 @@ class Sequential_Frame_Locator(Frame_Locator):
             - ref_episode: The reference episode
             - search_episode: The episode to search frames in
             - reverse_search: True if the search should start from the ending of the episode instead of the beggining
+            - deadline: Deadline object. Once it expires the best match found so far is returned (At least one section of the search range is searched). If omited the search has no time limit
 
         Return Value: A tuple containing a dictionary relating the frames of the reference episode with the ones in the search episode and a measure of how similar they are (The closer to 1 the better). Example: ({1234: 2345, 1235: 2346, 1236: 2347}, 0.95)
         """
@@ -46,8 +141,18 @@ class Sequential_Frame_Locator(Frame_Locator):
             # TODO: Raise Exception
             pass
 
+        # Coarse scan first
+        if self.keyframe_scan:
+            located_frames = self._locate_around_keyframes(frames_to_locate, ref_episode, search_episode, starting_search_index, ending_search_index)
+            if located_frames is not None:
+                return located_frames
+
         # Divide search range in chunks to avoid running out of memory
         section_len = self.max_loading_frames
+        if self.memory_governor is not None:
+            self.memory_governor.wait_for_memory()
+            # The section in use, the prefetched one and the frames of the extra iteration
+            section_len = self.memory_governor.get_window(section_len, self.thumbnail_resolution[0]*self.thumbnail_resolution[1]*3, copies=3, min_frames=max(100, 2*len(frames_to_locate)))
         num_sections = (ending_search_index - starting_search_index) // section_len
 
         if num_sections == 0:
@@ -66,24 +171,21 @@ class Sequential_Frame_Locator(Frame_Locator):
         while s < num_sections:
             # Common iteration
             if not extra_iteration:
-                # Load episode forward
-                if not reverse_search:
-                    # Get frame indexes to compare with
-                    if s < num_sections-1:
-                        search_frames = [f for f in range(s*section_len+starting_search_index,starting_search_index+(s+1)*section_len)]
-                    else:
-                        search_frames = [f for f in range(s*section_len+starting_search_index,ending_search_index)]
-                # Load episode backwards
-                else:
-                    # Get frame indexes to compare with
-                    if s == 0:
-                        search_frames = [f for f in range((num_sections-1-s)*section_len+starting_search_index,ending_search_index)]
-                    else:
-                        search_frames = [f for f in range((num_sections-1-s)*section_len+starting_search_index,starting_search_index+(num_sections-s)*section_len)]
+                search_frames = self._get_section_frames(s, num_sections, section_len, starting_search_index, ending_search_index, reverse_search)
             # Extra iteration
             else:
                 extra_iteration=False
 
+            # Backpressure: Wait for memory before loading more frames
+            if self.memory_governor is not None and s > 0:
+                self.memory_governor.wait_for_memory()
+
+            # Start decoding the next section while the current one is compared. Not on the first section: Matches are usually found there
+            next_search_frames = None
+            if s > 0 and s+1 < num_sections:
+                next_search_frames = self._get_section_frames(s+1, num_sections, section_len, starting_search_index, ending_search_index, reverse_search)
+                search_episode.prefetch_consecutive_frames(next_search_frames[0], len(next_search_frames), self.thumbnail_resolution)
+
             # Compare reference frames with current search frames
             distance_matrix = self.distance_algorithm.calculate_distance(ref_episode, search_episode, frames_to_locate, search_frames, self.thumbnail_resolution, True, False)
 
@@ -123,6 +225,13 @@ class Sequential_Frame_Locator(Frame_Locator):
                 best_match["min_frame_diff"]=diff_value[1]
 
             if diff_value[0] <= self.max_identical_frames_diff or diff_value[1] < 0.01:
+                self._cancel_prefetch(search_episode, next_search_frames)
+                break
+
+            # Out of time, keep the best match found so far
+            if deadline is not None and deadline.expired():
+                logger.debug(f"Deadline expired after {s+1} of {num_sections} sections")
+                self._cancel_prefetch(search_episode, next_search_frames)
                 break
             
             # Update loop variable
@@ -1,9 +1,16 @@
 from enum import Enum
-from episode_binger.Algorithms.Frames.FrameLocator.Frame_Locator import Frame_Locator
-from episode_binger.Algorithms.Frames.FrameLocator.Sequential_Frame_Locator import Sequential_Frame_Locator
+from episode_binger.Lazy_Module import make_lazy
 
 class Frame_Locator_Type(Enum):
     """
     Enumeration Class with the types of Frame Locator Algorithms in the project
     """
-    SEQUENTIAL_FRAME_LOCATOR = 0
\ No newline at end of file
+    SEQUENTIAL_FRAME_LOCATOR = 0
+    CORRELATION_FRAME_LOCATOR = 1
+
+# Classes are imported the first time they are requested
+make_lazy(__name__, {
+    "Frame_Locator": "episode_binger.Algorithms.Frames.FrameLocator.Frame_Locator",
+    "Sequential_Frame_Locator": "episode_binger.Algorithms.Frames.FrameLocator.Sequential_Frame_Locator",
+    "Correlation_Frame_Locator": "episode_binger.Algorithms.Frames.FrameLocator.Correlation_Frame_Locator",
+})
\ No newline at end of file
@@ -1,4 +1,5 @@
 from episode_binger.Dataclasses import Episode
+from episode_binger.Dataclasses import Deadline
 from episode_binger.Algorithms.Frames.IdenticalFrameFinder import Identical_Frame_Finder
 from episode_binger.Algorithms.Frames.FrameLocator import Frame_Locator
 
@@ -17,8 +18,11 @@ class Frame_Algorithm():
         self.identical_frame_finder = identical_frame_finder
         self.frame_locator = frame_locator
 
-    def find_identical_frames(self, e1: Episode, e2: Episode, initial_frames: tuple, final_frames: tuple, blacklist: list=[]) -> tuple:
-        return self.identical_frame_finder.find_identical_frames(e1,e2,initial_frames,final_frames,blacklist)
+    def find_identical_frames(self, e1: Episode, e2: Episode, initial_frames: tuple, final_frames: tuple, blacklist: list=[], deadline: Deadline = None) -> tuple:
+        return self.identical_frame_finder.find_identical_frames(e1,e2,initial_frames,final_frames,blacklist,deadline)
 
-    def locate_frames(self, frames_to_locate: list, ref_episode: Episode, search_episode: Episode, starting_search_index: int = 0, ending_search_index: int = None, reverse_search: bool = False):
-        return self.frame_locator.locate_frames(frames_to_locate, ref_episode, search_episode, starting_search_index, ending_search_index, reverse_search)
+    def locate_frames(self, frames_to_locate: list, ref_episode: Episode, search_episode: Episode, starting_search_index: int = 0, ending_search_index: int = None, reverse_search: bool = False, deadline: Deadline = None):
+        return self.frame_locator.locate_frames(frames_to_locate, ref_episode, search_episode, starting_search_index, ending_search_index, reverse_search, deadline)
+
+    def set_seed(self, seed: int):
+        self.identical_frame_finder.set_seed(seed)
\ No newline at end of file
@@ -0,0 +1,189 @@
+from episode_binger.Algorithms.Frames.IdenticalFrameFinder import Identical_Frame_Finder
+from episode_binger.Dataclasses import Episode
+from episode_binger.Dataclasses import Deadline
+from episode_binger.Algorithms.Distance import Distance_Algorithm
+import numpy as np
+import heapq
+import itertools
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Best_First_Frame_Finder(Identical_Frame_Finder):
+    """
+    Class that holds an specific Identical Frame Finder algorithm that searches the pairs of frames of both episodes best first. The search space is split into regions (A range of frames of e1 and a range of frames of e2), every region is ranked by the distance of the frames at its center and the most promising one of all is split into finer regions next.
+    It stops when an identical pair of frames is confirmed by the frames that follow it. The search is deterministic (No reshuffles)
+    """
+    deterministic = True
+
+    def __init__(self, distance_algorithm: Distance_Algorithm, thumbnail_resolution: tuple = (36,64), num_subsamples: int = 50, branching: int = 4, num_confirm_frames: int = 5, max_expansions: int = 500, exclusion_frames: int = 48, max_identical_frames_diff: float = 0.01, max_similar_frames_diff: float = 0.10):
+        """
+        Description: Creates a Best_First_Frame_Finder object
+
+        Parameters:
+            - distance_algorithm: An instance of a Distance_Algorithm object
+            - thumbnail_resolution: Performance Parameter. It's the size to resize frames after loading them. Generally, the lower the better but a 10th part from the original resolution should be fine.
+            - num_subsamples: Number of frames of every episode compared in the first step (The search space is split in num_subsamples*num_subsamples regions)
+            - branching: Amount of parts every range of frames of a region is split into when the region is expanded
+            - num_confirm_frames: Amount of consecutive frames compared to confirm an identical pair
+            - max_expansions: Max amount of regions expanded in a search
+            - exclusion_frames: Pairs of frames are excluded when their offset (frame_e2-frame_e1) is this close to the offset of a blacklisted pair (They would belong to the same chunk)
+            - max_identical_frames_diff: Max difference percentage (between 0 and 1) between frames to consider them identical
+            - max_similar_frames_diff: Max difference percentage (between 0 and 1) between frames to consider them similar
+        """
+        self.distance_algorithm = distance_algorithm
+        self.thumbnail_resolution = thumbnail_resolution
+        self.num_subsamples = num_subsamples
+        self.branching = branching
+        self.num_confirm_frames = num_confirm_frames
+        self.max_expansions = max_expansions
+        self.exclusion_frames = exclusion_frames
+        self.max_identical_frames_diff = max_identical_frames_diff
+        self.max_similar_frames_diff = max_similar_frames_diff
+
+    @staticmethod
+    def _split(start: int, end: int, parts: int) -> list:
+        """
+        Description: Splits a range of frames into parts of about the same length
+
+        Parameters:
+            - start: First frame of the range
+            - end: Last frame of the range (Not included)
+            - parts: Amount of parts. Fewer if the range has fewer frames
+
+        Return Value: List of tuples like (start, end, center) for every part
+        """
+        bounds = np.unique(np.linspace(start, end, min(parts, end-start)+1).astype(int))
+        return [(int(s), int(e), int((s+e-1)//2)) for s, e in zip(bounds[:-1], bounds[1:])]
+
+    def _get_exclusion_key(self, pair: tuple) -> int:
+        """
+        Description: Gets the band of offsets a pair of frames belongs to
+
+        Parameters:
+            - pair: Tuple containing frame indexes like: (frame_e1, frame_e2)
+
+        Return Value: Number of the band of offsets
+        """
+        return (pair[1]-pair[0])//self.exclusion_frames
+
+    def _is_excluded(self, pair: tuple, excluded_bands: set) -> bool:
+        """
+        Description: Checks if a pair of frames is close to a blacklisted one
+
+        Parameters:
+            - pair: Tuple containing frame indexes like: (frame_e1, frame_e2)
+            - excluded_bands: Set with the bands of offsets of the blacklisted pairs
+
+        Return Value: True if the pair must not be returned
+        """
+        band = self._get_exclusion_key(pair)
+        return band in excluded_bands or band-1 in excluded_bands or band+1 in excluded_bands
+
+    def _confirm(self, e1: Episode, e2: Episode, pair: tuple) -> tuple:
+        """
+        Description: Checks if the frames that follow an identical pair are identical too. Near frames of e2 are tried too (Static scenes make near frames look identical)
+
+        Parameters:
+            - e1: An episode
+            - e2: Another episode
+            - pair: Tuple containing frame indexes like: (frame_e1, frame_e2)
+
+        Return Value: The confirmed pair of frames (Aligned with the frames that follow it). None if it isn't confirmed
+        """
+        e1_frame_indexes = list(range(pair[0], min(pair[0]+self.num_confirm_frames, e1.frame_count)))
+        e2_frame_indexes = list(range(max(0, pair[1]-1), min(pair[1]+len(e1_frame_indexes)+1, e2.frame_count)))
+        distances = self.distance_algorithm.calculate_distance(e1, e2, e1_frame_indexes, e2_frame_indexes, self.thumbnail_resolution, True)
+
+        # Mean distance of every diagonal (Shift of the frames of e2)
+        best_pair, best_distance = None, None
+        for shift in (0, -1, 1):
+            rows = [i for i in range(len(e1_frame_indexes)) if 0 <= pair[1]+shift+i-e2_frame_indexes[0] < len(e2_frame_indexes)]
+            if len(rows) < len(e1_frame_indexes):
+                continue
+            distance = np.mean([distances[i, pair[1]+shift+i-e2_frame_indexes[0]] for i in rows])
+            if best_distance is None or distance < best_distance:
+                best_pair, best_distance = (pair[0], pair[1]+shift), distance
+
+        if best_distance is None or best_distance > self.max_identical_frames_diff:
+            return None
+        return best_pair
+
+    def find_identical_frames(self, e1: Episode, e2: Episode, initial_frames: tuple, final_frames: tuple, blacklist: list = None, deadline: Deadline = None) -> tuple:
+        """
+        Description: Performs a blind search for identical frames between 2 episodes.
+
+        Parameters:
+            - e1: An episode
+            - e2: Another episode
+            - initial_frames: A tuple containing the starting frame to analyze in each episode like: (initial_frame_e1, initial_frame_e2)
+            - final_frames: A tuple containing the final frame to analyze in each episode like: (final_frame_e1, final_frame_e2)
+            - blacklist: A list of pairs of frames found before. Pairs of their chunks are not considered. The found pair is added to it
+            - deadline: Deadline object. Once it expires the most similar pair of frames found so far is returned. If omited the search has no time limit
+
+        Return Value: A tuple containing an identical pair of frame indexes like: (identical_frame_e1, identical_frame_e2). None if none could be found
+        """
+        if blacklist is None:
+            blacklist = []
+        excluded_bands = {self._get_exclusion_key(pair) for pair in blacklist}
+        e1_range = (max(0, initial_frames[0]), min(final_frames[0], e1.frame_count))
+        e2_range = (max(0, initial_frames[1]), min(final_frames[1], e2.frame_count))
+        if e1_range[0] >= e1_range[1] or e2_range[0] >= e2_range[1]:
+            return None
+
+        # Regions like (distance, order, e1_part, e2_part). The order breaks ties between regions at the same distance
+        queue = []
+        order = itertools.count()
+        evaluated_pairs = set()
+        best_match = None
+        num_comparisons = 0
+
+        # First step: The whole search space
+        e1_parts, e2_parts = self._split(*e1_range, self.num_subsamples), self._split(*e2_range, self.num_subsamples)
+        expansions = 0
+        while True:
+            distances = self.distance_algorithm.calculate_distance(e1, e2, [p[2] for p in e1_parts], [p[2] for p in e2_parts], self.thumbnail_resolution)
+            num_comparisons += distances.size
+
+            # Identical pairs are checked from the closest one
+            for i, j in zip(*np.unravel_index(np.argsort(distances, axis=None), distances.shape)):
+                pair = (e1_parts[i][2], e2_parts[j][2])
+                distance = float(distances[i, j])
+                if self._is_excluded(pair, excluded_bands):
+                    continue
+
+                # Centers of regions expanded along one episode only were already checked
+                if pair not in evaluated_pairs:
+                    evaluated_pairs.add(pair)
+                    if distance <= self.max_similar_frames_diff and (best_match is None or distance < best_match[2]):
+                        best_match = (pair[0], pair[1], distance)
+
+                    if distance <= self.max_identical_frames_diff:
+                        confirmed_pair = self._confirm(e1, e2, pair)
+                        num_comparisons += 3*self.num_confirm_frames
+                        if confirmed_pair is not None and not self._is_excluded(confirmed_pair, excluded_bands):
+                            logger.debug(f"Identical frames {confirmed_pair} found after {expansions} expansions ({num_comparisons} comparisons)")
+                            blacklist.append(confirmed_pair)
+                            return confirmed_pair
+
+                # Regions of a single pair of frames can't be expanded
+                if e1_parts[i][1]-e1_parts[i][0] > 1 or e2_parts[j][1]-e2_parts[j][0] > 1:
+                    heapq.heappush(queue, (distance, next(order), e1_parts[i], e2_parts[j]))
+
+            # Out of regions or expansions, the best match found so far is used
+            if not queue or expansions >= self.max_expansions:
+                break
+            if deadline is not None and deadline.expired():
+                logger.debug(f"Deadline expired after {expansions} expansions")
+                break
+
+            # Expand the most promising region of the whole search
+            distance, _, e1_part, e2_part = heapq.heappop(queue)
+            e1_parts, e2_parts = self._split(e1_part[0], e1_part[1], self.branching), self._split(e2_part[0], e2_part[1], self.branching)
+            expansions += 1
+
+        logger.debug(f"No identical frames confirmed after {expansions} expansions ({num_comparisons} comparisons)")
+        if best_match is not None:
+            blacklist.append((best_match[0], best_match[1]))
+            return (best_match[0], best_match[1])
+        return None
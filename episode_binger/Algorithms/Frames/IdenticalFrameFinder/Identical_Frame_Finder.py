@@ -1,12 +1,16 @@
 from abc import ABC, abstractmethod
 from episode_binger.Dataclasses import Episode
+from episode_binger.Dataclasses import Deadline
 
 class Identical_Frame_Finder(ABC):
     """
     Abstract Class that defines how Identical Frame Finder Algorithms should behave
     """
+    # True if the same search always gives the same result (Repeating a failed search is useless)
+    deterministic = False
+
     @abstractmethod
-    def find_identical_frames(self, e1: Episode, e2: Episode, initial_frames: tuple, final_frames: tuple, blacklist: list=[]) -> tuple:
+    def find_identical_frames(self, e1: Episode, e2: Episode, initial_frames: tuple, final_frames: tuple, blacklist: list=[], deadline: Deadline = None) -> tuple:
         """
         Description: Performs a blind search for identical frames between 2 episodes.
 
@@ -16,7 +20,17 @@ class Identical_Frame_Finder(ABC):
             - initial_frames: A tuple containing the starting frame to analyze in each episode like: (initial_frame_e1, initial_frame_e2)
             - final_frames: A tuple containing the final frame to analyze in each episode like: (final_frame_e1, final_frame_e2)
             - blacklist: A list of frames not to consider in the search. Useful to search for different matches
+            - deadline: Deadline object. Once it expires the most similar pair of frames found so far is returned. If omited the search has no time limit
 
         Return Value: A tuple containing an identical pair of frame indexes like: (identical_frame_e1, identical_frame_e2)
         """
+        pass
+
+    def set_seed(self, seed: int):
+        """
+        Description: Seeds the random number generator of the algorithm so its results can be reproduced. Algorithms without randomness ignore it.
+
+        Parameters:
+            - seed: Seed for the random number generator. None to seed it from system entropy
+        """
         pass
\ No newline at end of file
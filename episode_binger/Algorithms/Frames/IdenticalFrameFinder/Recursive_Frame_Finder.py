@@ -1,6 +1,7 @@
 from episode_binger.Algorithms.Frames.IdenticalFrameFinder import Identical_Frame_Finder
 from episode_binger.Dataclasses import Episode
-from random import randint
+from episode_binger.Dataclasses import Deadline
+from random import Random
 import numpy as np
 from episode_binger.Algorithms.Distance import Distance_Algorithm
 import logging
@@ -11,7 +12,7 @@ class Recursive_Frame_Finder(Identical_Frame_Finder):
     """
     Class that holds an specific Identical Frame Finder algorithm that uses recursivity to operate
     """
-    def __init__(self, distance_algorithm: Distance_Algorithm, thumbnail_resolution: tuple = (36,64), num_subsamples: int = 50, max_reshuffles: int = 20, max_identical_frames_diff: float = 0.01, max_similar_frames_diff: float = 0.10,):
+    def __init__(self, distance_algorithm: Distance_Algorithm, thumbnail_resolution: tuple = (36,64), num_subsamples: int = 50, max_reshuffles: int = 20, max_identical_frames_diff: float = 0.01, max_similar_frames_diff: float = 0.10, seed: int = None, low_discrepancy_offsets: bool = False, keyframe_scan: bool = False):
         """
         Description: Creates a Recursive_Frame_Finder object
 
@@ -22,6 +23,9 @@ class Recursive_Frame_Finder(Identical_Frame_Finder):
             - max_reshuffles: Max amount of random shuffles to pick frames to compare
             - max_identical_frames_diff: Max difference percentage (between 0 and 1) between frames to consider them identical
             - max_similar_frames_diff: Max difference percentage (between 0 and 1) between frames to consider them similar
+            - seed: Seed for the random offsets. Same seed and episodes lead to the same search. If omited it's seeded from system entropy
+            - low_discrepancy_offsets: True to pick the subsample offsets of every reshuffle from a low discrepancy sequence instead of independently at random. Reshuffles cover the offset combinations more evenly
+            - keyframe_scan: True to compare only keyframes in the first reshuffle (A coarse scan that decodes a small fraction of the frames). Ignored if the episodes can't tell their keyframes
         """
         self.max_reshuffles = max_reshuffles
         self.distance_algorithm = distance_algorithm
@@ -29,8 +33,61 @@ class Recursive_Frame_Finder(Identical_Frame_Finder):
         self.num_subsamples = num_subsamples
         self.max_similar_frames_diff = max_similar_frames_diff
         self.max_identical_frames_diff = max_identical_frames_diff
+        self.low_discrepancy_offsets = low_discrepancy_offsets
+        self.keyframe_scan = keyframe_scan
+        self.random = Random(seed)
 
-    def _recursive_identical_frames(self, e1: Episode, e2: Episode, initial_frames: tuple, final_frames: tuple, max_reshuffles: int, blacklist: list=[], best_match: list=[],level:int = 0):
+    def set_seed(self, seed: int):
+        """
+        Description: Seeds the random number generator of the algorithm so its results can be reproduced
+
+        Parameters:
+            - seed: Seed for the random number generator. None to seed it from system entropy
+        """
+        self.random.seed(seed)
+
+    def _get_section_offsets(self, n: int, e1_subsection_len: int, e2_subsection_len: int, sequence_start: tuple) -> tuple:
+        """
+        Description: Gets the offsets of the subsamples for a reshuffle
+
+        Parameters:
+            - n: Number of the offset combination to get
+            - e1_subsection_len: Amount of frames between subsamples of e1
+            - e2_subsection_len: Amount of frames between subsamples of e2
+            - sequence_start: Random starting point of the low discrepancy sequence like: (start_e1, start_e2)
+
+        Return Value: A tuple with the offsets like: (e1_section_offset, e2_section_offset)
+        """
+        if not self.low_discrepancy_offsets:
+            return (self.random.randint(0,e1_subsection_len-1), self.random.randint(0,e2_subsection_len-1))
+
+        # R2 sequence (Additive recurrence based on the plastic number)
+        g = 1.32471795724474602596
+        e1_point = (sequence_start[0] + n/g) % 1
+        e2_point = (sequence_start[1] + n/(g*g)) % 1
+        return (int(e1_point*e1_subsection_len), int(e2_point*e2_subsection_len))
+
+    def _get_keyframe_subsamples(self, episode: Episode, initial_frame: int, final_frame: int) -> list:
+        """
+        Description: Gets evenly spaced keyframes of a range of an episode
+
+        Parameters:
+            - episode: An episode
+            - initial_frame: First frame of the range
+            - final_frame: Last frame of the range (Not included)
+
+        Return Value: Sorted list with num_subsamples keyframe indexes at most. None if the episode can't tell its keyframes
+        """
+        keyframes = episode.get_keyframes()
+        if not keyframes:
+            return None
+
+        keyframes = [k for k in keyframes if initial_frame <= k < min(final_frame, episode.frame_count)]
+        if len(keyframes) > self.num_subsamples:
+            keyframes = [keyframes[i] for i in np.linspace(0, len(keyframes)-1, self.num_subsamples).astype(int)]
+        return keyframes
+
+    def _recursive_identical_frames(self, e1: Episode, e2: Episode, initial_frames: tuple, final_frames: tuple, max_reshuffles: int, blacklist: list=[], best_match: list=[],level:int = 0, deadline: Deadline = None):
         """
         Description: Performs a blind search for identical frames between 2 episodes.
 
@@ -40,6 +97,7 @@ class Recursive_Frame_Finder(Identical_Frame_Finder):
             - initial_frames: A tuple containing the starting frame to analyze in each episode like: (initial_frame_e1, initial_frame_e2)
             - final_frames: A tuple containing the final frame to analyze in each episode like: (final_frame_e1, final_frame_e2)
             - blacklist: A list of frames not to consider in the search. Useful to search for different matches
+            - deadline: Deadline object. Once it expires no more reshuffles are made. If omited the search has no time limit
 
         Return Value: A tuple containing an identical pair of frame indexes like: (identical_frame_e1, identical_frame_e2)
         """
@@ -64,16 +122,22 @@ class Recursive_Frame_Finder(Identical_Frame_Finder):
 
         max_possible_offset_combinations = e1_subsection_len*e2_subsection_len
         reshuffle = 0
+        sequence_start = (self.random.random(), self.random.random())
 
         while reshuffle < max_reshuffles and len(used_offsets) < max_possible_offset_combinations:       
-            # Get Random offsets
-            e1_section_offset = randint(0,e1_subsection_len-1)
-            e2_section_offset = randint(0,e2_subsection_len-1)
+            # Out of time, the best match found so far is used
+            if deadline is not None and deadline.expired():
+                logger.debug(f"Deadline expired after {reshuffle} reshuffles")
+                break
+
+            # Get offsets
+            n = len(used_offsets)
+            e1_section_offset, e2_section_offset = self._get_section_offsets(n, e1_subsection_len, e2_subsection_len, sequence_start)
 
             # Check offset combination hasn't been used before
             while ((e1_section_offset,e2_section_offset) in used_offsets):
-                e1_section_offset = randint(0,e1_subsection_len-1)
-                e2_section_offset = randint(0,e2_subsection_len-1)
+                n+=1
+                e1_section_offset, e2_section_offset = self._get_section_offsets(n, e1_subsection_len, e2_subsection_len, sequence_start)
 
             # Mark offset combination as used
             used_offsets.append((e1_section_offset,e2_section_offset))
@@ -86,6 +150,13 @@ class Recursive_Frame_Finder(Identical_Frame_Finder):
             e1_frame_list = e1_frame_list[np.where(np.logical_and(e1_frame_list>=0, e1_frame_list<e1.frame_count))].tolist()
             e2_frame_list = e2_frame_list[np.where(np.logical_and(e2_frame_list>=0, e2_frame_list<e2.frame_count))].tolist()
 
+            # Coarse scan: The first reshuffle of the search compares only keyframes
+            if self.keyframe_scan and level == 0 and reshuffle == 0:
+                e1_keyframes = self._get_keyframe_subsamples(e1, initial_frames[0], final_frames[0])
+                e2_keyframes = self._get_keyframe_subsamples(e2, initial_frames[1], final_frames[1])
+                if e1_keyframes and e2_keyframes:
+                    e1_frame_list, e2_frame_list = e1_keyframes, e2_keyframes
+
             # Get distances between all selected frames
             frames_relative_distances = self.distance_algorithm.calculate_distance(e1, e2, e1_frame_list, e2_frame_list,self.thumbnail_resolution)
 
@@ -159,7 +230,7 @@ class Recursive_Frame_Finder(Identical_Frame_Finder):
                 # Get the result in zoomed in section
                 if e1_full_section_len >= self.num_subsamples and e2_full_section_len >= self.num_subsamples:
                     # Nested Identical frames searchs cannot reshuffle
-                    zoomed_in_result = self._recursive_identical_frames(e1, e2, (e1_subsection[0], e2_subsection[0]),(e1_subsection[1], e2_subsection[1]), 1, blacklist, best_match)
+                    zoomed_in_result = self._recursive_identical_frames(e1, e2, (e1_subsection[0], e2_subsection[0]),(e1_subsection[1], e2_subsection[1]), 1, blacklist, best_match, level+1, deadline)
                     num_zoom_ins+=1
 
                     if zoomed_in_result is not None:
@@ -175,10 +246,11 @@ class Recursive_Frame_Finder(Identical_Frame_Finder):
         
         return None # No identical frames found
 
-    def find_identical_frames(self, e1: Episode, e2: Episode, initial_frames: tuple, final_frames: tuple, blacklist: list=[]) -> tuple:
+    def find_identical_frames(self, e1: Episode, e2: Episode, initial_frames: tuple, final_frames: tuple, blacklist: list=[], deadline: Deadline = None) -> tuple:
         best_match = []
-        identical_frames = self._recursive_identical_frames(e1,e2,initial_frames,final_frames,self.max_reshuffles,blacklist,best_match,0)
+        identical_frames = self._recursive_identical_frames(e1,e2,initial_frames,final_frames,self.max_reshuffles,blacklist,best_match,0,deadline)
 
-        if identical_frames is None and best_match[0] is not None:
+        # The deadline might expire before any similar frames are found
+        if identical_frames is None and best_match:
             return best_match[0]
         return identical_frames
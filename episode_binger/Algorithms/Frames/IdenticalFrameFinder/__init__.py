@@ -1,9 +1,16 @@
 from enum import Enum
-from episode_binger.Algorithms.Frames.IdenticalFrameFinder.Identical_Frame_Finder import Identical_Frame_Finder
-from episode_binger.Algorithms.Frames.IdenticalFrameFinder.Recursive_Frame_Finder import Recursive_Frame_Finder
+from episode_binger.Lazy_Module import make_lazy
 
 class Identical_Frames_Algorithm_Type(Enum):
     """
     Enumeration Class with the types of Identical Frames Finder Algorithms in the project
     """
-    RECURSIVE_FINDER = 0
\ No newline at end of file
+    RECURSIVE_FINDER = 0
+    BEST_FIRST_FINDER = 1
+
+# Classes are imported the first time they are requested
+make_lazy(__name__, {
+    "Best_First_Frame_Finder": "episode_binger.Algorithms.Frames.IdenticalFrameFinder.Best_First_Frame_Finder",
+    "Identical_Frame_Finder": "episode_binger.Algorithms.Frames.IdenticalFrameFinder.Identical_Frame_Finder",
+    "Recursive_Frame_Finder": "episode_binger.Algorithms.Frames.IdenticalFrameFinder.Recursive_Frame_Finder",
+})
\ No newline at end of file
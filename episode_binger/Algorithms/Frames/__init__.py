@@ -1 +1,6 @@
-from episode_binger.Algorithms.Frames.Frame_Algorithm import Frame_Algorithm
\ No newline at end of file
+from episode_binger.Lazy_Module import make_lazy
+
+# Classes are imported the first time they are requested
+make_lazy(__name__, {
+    "Frame_Algorithm": "episode_binger.Algorithms.Frames.Frame_Algorithm",
+})
\ No newline at end of file
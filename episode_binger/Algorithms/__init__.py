@@ -1 +1,6 @@
-from episode_binger.Algorithms.Algorithm_Manager import Algorithm_Manager
\ No newline at end of file
+from episode_binger.Lazy_Module import make_lazy
+
+# Classes are imported the first time they are requested
+make_lazy(__name__, {
+    "Algorithm_Manager": "episode_binger.Algorithms.Algorithm_Manager",
+})
\ No newline at end of file
@@ -0,0 +1,147 @@
+from episode_binger.Algorithms.Distance import Distance_Algorithm
+from episode_binger.Dataclasses import Calibration
+from episode_binger.Memory_Governor import Memory_Governor
+from random import Random
+import numpy as np
+import time
+import math
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Calibrator():
+    """
+    Class that picks the performance parameters of a season from a few of its episodes. It measures how fast they are decoded, how much memory is available and how far apart unrelated frames are at every candidate thumbnail resolution, and picks the cheapest parameters that keep the matches reliable
+    """
+    def __init__(self, distance_algorithm: Distance_Algorithm, candidate_resolutions: list = [(18,32),(27,48),(36,64)], max_similar_frames_diff: float = 0.10, num_sample_episodes: int = 3, num_sample_frames: int = 48, separation_margin: float = 2.0, chunk_min_seconds: int = 30, subsamples_per_chunk: int = 4, max_attempt_seconds: float = 30, num_workers: int = 1, memory_fraction: float = 0.25, seed: int = None):
+        """
+        Description: Creates a Calibrator object
+
+        Parameters:
+            - distance_algorithm: An instance of the Distance_Algorithm object used by the searches
+            - candidate_resolutions: Thumbnail resolutions to pick from, from the cheapest to the most expensive
+            - max_similar_frames_diff: Default max difference percentage (between 0 and 1) between frames to consider them similar
+            - num_sample_episodes: Amount of episodes of the season to measure
+            - num_sample_frames: Amount of frames of every episode to measure
+            - separation_margin: How many times the similarity threshold unrelated frames must be apart for a resolution to be reliable
+            - chunk_min_seconds: Length in seconds of the shortest chunk that must be found
+            - subsamples_per_chunk: Amount of subsamples of the identical frame finder that must fall in the shortest chunk
+            - max_attempt_seconds: Seconds the reshuffles of one identical frames search should take at most
+            - num_workers: Amount of searches that run at once (Their loaded frames share the available memory)
+            - memory_fraction: Fraction of the available memory the loaded frames of the searches can take
+            - seed: Seed for the selection of episodes and frames. If omited it's seeded from system entropy
+        """
+        self.distance_algorithm = distance_algorithm
+        self.candidate_resolutions = [tuple(r) for r in candidate_resolutions]
+        self.max_similar_frames_diff = max_similar_frames_diff
+        self.num_sample_episodes = num_sample_episodes
+        self.num_sample_frames = num_sample_frames
+        self.separation_margin = separation_margin
+        self.chunk_min_seconds = chunk_min_seconds
+        self.subsamples_per_chunk = subsamples_per_chunk
+        self.max_attempt_seconds = max_attempt_seconds
+        self.num_workers = num_workers
+        self.memory_fraction = memory_fraction
+        self.random = Random(seed)
+
+    def _measure_decoding(self, episode) -> tuple:
+        """
+        Description: Measures how fast an episode is decoded in order and at random positions
+
+        Parameters:
+            - episode: Episode to measure
+
+        Return Value: A tuple like (decode_fps, seek_fps)
+        """
+        num_frames = min(self.num_sample_frames, episode.frame_count)
+        resolution = self.candidate_resolutions[-1]
+
+        start = self.random.randint(0, episode.frame_count-num_frames)
+        start_time = time.perf_counter()
+        episode.load_consecutive_frames(start, num_frames, resolution)
+        decode_fps = num_frames/max(time.perf_counter()-start_time, 1e-6)
+
+        indexes = sorted(self.random.sample(range(episode.frame_count), num_frames))
+        start_time = time.perf_counter()
+        episode.load_frame_list(indexes, resolution)
+        seek_fps = num_frames/max(time.perf_counter()-start_time, 1e-6)
+
+        return decode_fps, seek_fps
+
+    def _measure_separation(self, e1, e2, e1_indexes: list, e2_indexes: list, thumbnail_resolution: tuple) -> float:
+        """
+        Description: Measures how far apart unrelated frames are at a thumbnail resolution
+
+        Parameters:
+            - e1: An episode
+            - e2: Another episode (Or the same one with different frames)
+            - e1_indexes: Random frame indexes of e1
+            - e2_indexes: Random frame indexes of e2
+            - thumbnail_resolution: Resolution to measure
+
+        Return Value: The distance of the closest unrelated frames (1st percentile, a few pairs might show the same scene) divided by the default similarity threshold
+        """
+        distances = self.distance_algorithm.calculate_distance(e1, e2, e1_indexes, e2_indexes, thumbnail_resolution)
+        return float(np.percentile(distances, 1))/self.max_similar_frames_diff
+
+    def calibrate(self, episodes: list) -> Calibration:
+        """
+        Description: Picks the performance parameters for a season
+
+        Parameters:
+            - episodes: Episodes of the season. A few of them are sampled
+
+        Return Value: A Calibration object
+        """
+        if not episodes:
+            raise Exception("There are no episodes to calibrate")
+
+        sample = self.random.sample(episodes, min(self.num_sample_episodes, len(episodes)))
+
+        # Decoding speed (The slowest episode sets the pace)
+        measures = [self._measure_decoding(e) for e in sample]
+        decode_fps = min(m[0] for m in measures)
+        seek_fps = min(m[1] for m in measures)
+
+        # Frames of different episodes are unrelated (Except a few of the opening and ending). With one episode its halves are compared
+        e1, e2 = sample[0], sample[1] if len(sample) > 1 else sample[0]
+        num_frames = min(self.num_sample_frames, e1.frame_count//2, e2.frame_count//2)
+        if e1 is e2:
+            e1_indexes = sorted(self.random.sample(range(e1.frame_count//2), num_frames))
+            e2_indexes = sorted(self.random.sample(range(e2.frame_count//2, e2.frame_count), num_frames))
+        else:
+            e1_indexes = sorted(self.random.sample(range(e1.frame_count), num_frames))
+            e2_indexes = sorted(self.random.sample(range(e2.frame_count), num_frames))
+
+        # Cheapest resolution that keeps unrelated frames apart. If none does, the best one with tighter thresholds
+        best_resolution, best_separation = None, -1
+        for resolution in self.candidate_resolutions:
+            separation = self._measure_separation(e1, e2, e1_indexes, e2_indexes, resolution)
+            logger.debug(f"Separation at {resolution}: {separation:.2f}")
+            if separation > best_separation:
+                best_resolution, best_separation = resolution, separation
+            if separation >= self.separation_margin:
+                break
+        threshold_scale = min(1.0, best_separation/self.separation_margin) if best_separation > 0 else 1.0
+
+        # Enough subsamples for the shortest chunk to get some of them in the longest search range (Half an episode)
+        frame_count = max(e.frame_count for e in sample)
+        fps = min(e.fps for e in sample)
+        num_subsamples = math.ceil(self.subsamples_per_chunk*(frame_count/2)/(self.chunk_min_seconds*fps))
+        num_subsamples = max(20, min(200, num_subsamples))
+
+        # Reshuffles that fit in an attempt (Each one decodes the subsamples of both episodes)
+        max_reshuffles = int(self.max_attempt_seconds*seek_fps/(2*num_subsamples))
+        max_reshuffles = max(5, min(20, max_reshuffles))
+
+        # Loaded sections don't need to be longer than a search range. Every search holds a few of them (Prefetched and in use)
+        thumbnail_bytes = best_resolution[0]*best_resolution[1]*3
+        max_loading_frames = math.ceil(frame_count/2)
+        available_memory = Memory_Governor.get_available_memory()
+        if available_memory is not None:
+            max_loading_frames = min(max_loading_frames, int(available_memory*self.memory_fraction/(3*self.num_workers*thumbnail_bytes)))
+        max_loading_frames = max(100, max_loading_frames)
+
+        calibration = Calibration(best_resolution, num_subsamples, max_reshuffles, max_loading_frames, threshold_scale, decode_fps, seek_fps, best_separation)
+        logger.debug(f"Calibrated {calibration} from {len(sample)} episodes ({decode_fps:.1f} fps in order, {seek_fps:.1f} fps at random positions)")
+        return calibration
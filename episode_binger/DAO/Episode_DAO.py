@@ -1,26 +1,143 @@
 from episode_binger.Dataclasses import Episode
 from episode_binger.Dataclasses import Chunk
-from random import sample
+from episode_binger.Dataclasses import Episode_Template
+from episode_binger.Dataclasses import Calibration
+from episode_binger.DAO.Indexed_Set import Indexed_Set
+from episode_binger.Video import Frame_Source_Type
+from episode_binger.Video import Frame_Provider
+from random import Random
 import json
+import os
 
 class Episode_DAO:
     """
-    Class that holds the results and data of the episode binger
+    Class that holds the results and data of the episode binger. Episodes are indexed by their state (unlocated, partially located or fully located) and season (Directory of the episode file), so queries and random selections don't have to go through every episode.
+    Openings and endings must be set through add_openings and add_endings to keep the indexes updated
     """
-    def __init__(self):
+    def __init__(self, seed: int = None, frame_source_type: Frame_Source_Type = Frame_Source_Type.OPENCV):
+        """
+        Description: Creates an Episode_DAO object
+
+        Parameters:
+            - seed: Seed for the random selections of episodes. If omited it's seeded from system entropy
+            - frame_source_type: A Frame_Source_Type object to specify which backend decodes the added episodes
+        """
+        self.random = Random(seed)
+        self.frame_source_type = frame_source_type
+
         # Episodes Dictionary
         self.episodes = {}
         self.episode_order=[]
 
+        # Indexes with the paths of the episodes in every state and season
+        self.all_paths = Indexed_Set()
+        self.unlocated_paths = Indexed_Set()
+        self.partially_located_paths = Indexed_Set()
+        self.fully_located_paths = Indexed_Set()
+        self.seasons = {}
+
+        # Paths of the episodes with every file content and the results of contents whose files aren't loaded (From previous runs)
+        self.fingerprint_paths = {}
+        self.known_results = {}
+
+        # Reference template loaded from a previous run
+        self.template = None
+
+        # Calibrated performance parameters of every season
+        self.calibrations = {}
+
+    def _update_state_index(self, episode: Episode):
+        """
+        Description: Moves an episode to the index of its current state
+
+        Parameters:
+            - episode: Episode whose opening or ending changed
+        """
+        self.unlocated_paths.discard(episode.path)
+        self.partially_located_paths.discard(episode.path)
+        self.fully_located_paths.discard(episode.path)
+
+        if episode.opening is not None and episode.ending is not None:
+            self.fully_located_paths.add(episode.path)
+        elif episode.opening is not None or episode.ending is not None:
+            self.partially_located_paths.add(episode.path)
+        else:
+            self.unlocated_paths.add(episode.path)
+
+    def _sample_paths(self, path_sets: list, num_episodes: int) -> list:
+        """
+        Description: Selects a random sample of episodes from the union of disjoint path indexes. It takes constant time for every selected episode
+
+        Parameters:
+            - path_sets: List of disjoint Indexed_Set objects with episode paths
+            - num_episodes: Amount of episodes to select
+
+        Return Value: List of Episodes
+        """
+        positions = self.random.sample(range(sum(len(paths) for paths in path_sets)), num_episodes)
+
+        episodes = []
+        for position in positions:
+            for paths in path_sets:
+                if position < len(paths):
+                    episodes.append(self.episodes[paths.get(position)])
+                    break
+                position -= len(paths)
+
+        return episodes
+
+    def _get_known_results(self, fingerprint: str) -> dict:
+        """
+        Description: Gets the results found for a file content: From a loaded episode with the same content (A copy) or from a previous run
+
+        Parameters:
+            - fingerprint: Fingerprint of the file content
+
+        Return Value: Dictionary that might have "opening" and "ending" chunk records. None if there are no results
+        """
+        for path in self.fingerprint_paths.get(fingerprint, []):
+            episode = self.episodes[path]
+            if episode.opening is not None or episode.ending is not None:
+                results = {}
+                if episode.opening is not None:
+                    results["opening"] = episode.opening.to_record()
+                if episode.ending is not None:
+                    results["ending"] = episode.ending.to_record()
+                return results
+
+        return self.known_results.get(fingerprint)
+
     def add_episode(self, path: str):
         """
-        Description: Stores the path of an episode and loads it
+        Description: Stores the path of an episode and loads it. If its content was located before (In a copy or a file moved since a previous run) its opening and ending are reused
 
         Parameters:
             - path: Valid path of the episode to load
         """
-        self.episodes[path] = Episode(path)
+        episode = Episode(path, self.frame_source_type)
+
+        # Reuse the results of the same content
+        results = self._get_known_results(episode.fingerprint)
+        if results is not None:
+            if "opening" in results:
+                episode.opening = Chunk(episode, *results["opening"])
+            if "ending" in results:
+                episode.ending = Chunk(episode, *results["ending"])
+
+        self.episodes[path] = episode
+        self.fingerprint_paths.setdefault(episode.fingerprint, [])
+        if path not in self.fingerprint_paths[episode.fingerprint]:
+            self.fingerprint_paths[episode.fingerprint].append(path)
         self.episode_order.append(path)
+        self.all_paths.add(path)
+        self._update_state_index(self.episodes[path])
+
+        # Group episodes by season
+        season = os.path.dirname(path)
+        if season not in self.seasons:
+            self.seasons[season] = []
+        if path not in self.seasons[season]:
+            self.seasons[season].append(path)
 
     def get_random_episodes(self, num_episodes: int) -> list:
         """
@@ -32,12 +149,12 @@ class Episode_DAO:
         Return Value: List of random loaded episodes
         """
         # Check if there are enough episodes loaded
-        if len(self.episodes.keys()) < num_episodes:
+        if len(self.all_paths) < num_episodes:
             # TODO: Raise exception (There are not that many episodes loaded)
             return []
 
         # Select x randomly
-        return sample(list(self.episodes.values()),num_episodes)
+        return self._sample_paths([self.all_paths], num_episodes)
     
     def get_all_fully_located_episodes(self) -> list:
         """
@@ -45,14 +162,7 @@ class Episode_DAO:
 
         Return Value: List of Episodes
         """
-        located_episodes = []
-
-        # Check every episode to see if it's located
-        for episode_path in self.episodes.keys():
-            if self.episodes[episode_path].opening != None and self.episodes[episode_path].ending != None:
-                located_episodes.append(self.episodes[episode_path])
-        
-        return located_episodes
+        return [self.episodes[path] for path in self.fully_located_paths]
 
     def get_all_located_episodes(self) -> list:
         """
@@ -60,29 +170,15 @@ class Episode_DAO:
 
         Return Value: List of Episodes
         """
-        located_episodes = []
+        return [self.episodes[path] for paths in [self.partially_located_paths, self.fully_located_paths] for path in paths]
 
-        # Check every episode to see if it's located
-        for episode_path in self.episodes.keys():
-            if self.episodes[episode_path].opening != None or self.episodes[episode_path].ending != None:
-                located_episodes.append(self.episodes[episode_path])
-        
-        return located_episodes
-    
     def get_all_unlocated_episodes(self) -> list:
         """
         Description: Selects all the unlocated episodes. That means every episode where the opening and ending have not been located
 
         Return Value: List of Episodes
         """
-        unlocated_episodes = []
-
-        # Check every episode to see if it's unlocated
-        for episode_path in self.episodes.keys():
-            if self.episodes[episode_path].opening == None and self.episodes[episode_path].ending == None:
-                unlocated_episodes.append(self.episodes[episode_path])
-        
-        return unlocated_episodes
+        return [self.episodes[path] for path in self.unlocated_paths]
 
     def get_random_located_episodes(self, num_episodes: int) -> list:
         """
@@ -93,16 +189,13 @@ class Episode_DAO:
 
         Return Value: List of Episodes
         """
-        # Get all located episodes
-        located_episodes = self.get_all_located_episodes()
-
         # Check if there are enough located episodes
-        if len(located_episodes) < num_episodes:
+        if len(self.partially_located_paths)+len(self.fully_located_paths) < num_episodes:
             # TODO: Raise exception (There are not that many located episodes)
             return []
-        
+
         # Select x randomly
-        return sample(located_episodes,num_episodes)
+        return self._sample_paths([self.partially_located_paths, self.fully_located_paths], num_episodes)
 
     def get_random_fully_located_episodes(self, num_episodes: int) -> list:
         """
@@ -113,16 +206,13 @@ class Episode_DAO:
 
         Return Value: List of Episodes
         """
-        # Get all fully located episodes
-        located_episodes = self.get_all_fully_located_episodes()
-
         # Check if there are enough fully located episodes
-        if len(located_episodes) < num_episodes:
+        if len(self.fully_located_paths) < num_episodes:
             # TODO: Raise exception (There are not that many fully located episodes)
             return []
-        
+
         # Select x randomly
-        return sample(located_episodes,num_episodes)
+        return self._sample_paths([self.fully_located_paths], num_episodes)
 
     def get_random_opening(self) -> Chunk:
         """
@@ -158,6 +248,32 @@ class Episode_DAO:
         
         return episode_list
 
+    def get_season_list(self) -> list:
+        """
+        Description: Returns the seasons of the episodes in the order they were added. Episodes are grouped in seasons by the directory of their files
+        """
+        return list(self.seasons.keys())
+
+    def get_season_episode_list(self, season: str) -> list:
+        """
+        Description: Returns the episodes of a season in order
+
+        Parameters:
+            - season: Directory of the season episodes
+        """
+        return [self.episodes[path] for path in self.seasons.get(season, [])]
+
+    def get_calibration(self, path: str) -> Calibration:
+        """
+        Description: Returns the calibration of the season of an episode
+
+        Parameters:
+            - path: Path of an episode
+
+        Return Value: A Calibration object or None if the season hasn't been calibrated
+        """
+        return self.calibrations.get(os.path.dirname(path))
+
     def add_openings(self, openings: list):
         """
         Description: Adds a list of opening chunks
@@ -167,6 +283,7 @@ class Episode_DAO:
         """
         for opening in openings:
             self.episodes[opening.episode.path].opening = opening
+            self._update_state_index(self.episodes[opening.episode.path])
 
     def add_endings(self, endings: list):
         """
@@ -177,13 +294,31 @@ class Episode_DAO:
         """
         for ending in endings:
             self.episodes[ending.episode.path].ending = ending
+            self._update_state_index(self.episodes[ending.episode.path])
+
+    def create_template(self, thumbnail_resolution: tuple = (36,64)) -> Episode_Template:
+        """
+        Description: Creates the reference template of a random fully located episode. It can be used as reference episode even if its file is not available
+
+        Parameters:
+            - thumbnail_resolution: Resolution of the stored thumbnails. It should be the one used to locate frames
+
+        Return Value: An Episode_Template object or None if there are no fully located episodes
+        """
+        # Keep the loaded template if there are no episodes to create a new one from
+        if len(self.fully_located_paths) == 0:
+            return self.template
+
+        return Episode_Template.from_episode(self.get_random_fully_located_episodes(1)[0], thumbnail_resolution)
 
-    def save_episodes_info(self, output_path: str):
+    def save_episodes_info(self, output_path: str, include_template: bool = False, thumbnail_resolution: tuple = (36,64)):
         """
         Description: Saves the information gathered from the episodes in a file in json format
 
         Parameters:
             -output_path: Valid path of the file to be written with the information
+            -include_template: True to store also a reference template (Thumbnails of the frames needed to locate the opening and ending) so new episodes can be located without the files of the previous ones
+            -thumbnail_resolution: Resolution of the template thumbnails
         """
         # Build output info dictionary
         episode_info={}
@@ -191,35 +326,80 @@ class Episode_DAO:
         episode_info["episodes"]={}
         for e_path in self.episodes:
             e=self.episodes[e_path]
-            episode_info["episodes"][e.path]={}
+            episode_info["episodes"][e.path]={"fingerprint": e.fingerprint}
+            keyframes = Frame_Provider.get_known_keyframes(e.fingerprint)
+            if keyframes is not None:
+                episode_info["episodes"][e.path]["keyframes"]=keyframes
             if e.opening:
                 episode_info["episodes"][e.path]["opening"]=[e.opening.start_frame, e.opening.end_frame]
             if e.ending:
                 episode_info["episodes"][e.path]["ending"]=[e.ending.start_frame, e.ending.end_frame]
 
+        # Results of contents whose files weren't loaded this time are kept for when they are added again
+        known_episodes = {fingerprint: results for fingerprint, results in self.known_results.items() if fingerprint not in self.fingerprint_paths}
+        if known_episodes:
+            episode_info["known_episodes"]=known_episodes
+
+        if self.calibrations:
+            episode_info["calibrations"]={season: calibration.to_dict() for season, calibration in self.calibrations.items()}
+
+        if include_template:
+            template = self.create_template(thumbnail_resolution)
+            if template is not None:
+                episode_info["template"]=template.to_dict()
+
         # Open output file. Rewrite if exists
         with open(output_path, "w") as file:
             # Dump Json
             file.write(json.dumps(episode_info))
             
-    def load_episodes_info(self, input_path: str):
+    def load_episodes_info(self, input_path: str, template_only: bool = False):
         """
-        Description: Loads the information from the episodes into the program from a file in json format
+        Description: Loads the information from the episodes into the program from a file in json format. Episodes whose files are missing are skipped, their results are reused once their files are added again (Even with a different path)
 
         Parameters:
             -input_path: Valid path of the file to load the information from
+            -template_only: True to load only the reference template. Previous episodes are not opened, so their files don't need to be available
         """
         # Load input info into dictionary
         with open(input_path, "r") as file:
             # Load Json
             episode_info=json.load(file)
 
+        if "template" in episode_info:
+            self.template = Episode_Template.from_dict(episode_info["template"])
+
+        # Calibrations are kept even with template_only (They belong to the season, not to its files)
+        for season, calibration_info in episode_info.get("calibrations", {}).items():
+            self.calibrations[season] = Calibration.from_dict(calibration_info)
+
+        # Results are indexed by the content of their files, so they are found even if the files are moved or renamed
+        known_episodes = dict(episode_info.get("known_episodes", {}))
+        for e_path in episode_info["episodes"]:
+            if "fingerprint" in episode_info["episodes"][e_path]:
+                known_episodes[episode_info["episodes"][e_path]["fingerprint"]] = episode_info["episodes"][e_path]
+        for fingerprint, results in known_episodes.items():
+            self.known_results[fingerprint] = {key: results[key] for key in ("opening", "ending") if key in results}
+            if "keyframes" in results:
+                Frame_Provider.add_known_keyframes(fingerprint, results["keyframes"])
+
+        if template_only:
+            if self.template is None:
+                raise Exception(f"There is no reference template in {input_path}")
+            return
+
         # Prepare openings and endings lists
         openings=[]
         endings=[]
 
         # Insert info in DAO
         for e_path in episode_info["episode_order"]:
+            # Episodes with a fingerprint get their results when they are added (Now or once their files are found again)
+            if "fingerprint" in episode_info["episodes"][e_path]:
+                if os.path.exists(e_path):
+                    self.add_episode(e_path)
+                continue
+
             # Add episode in order
             self.add_episode(e_path)
 
@@ -231,4 +411,4 @@ class Episode_DAO:
             if "ending" in episode_info["episodes"][e_path]:
                 endings.append(Chunk(self.episodes[e_path], *episode_info["episodes"][e_path]["ending"]))
         self.add_openings(openings)
-        self.add_endings(endings)
+        self.add_endings(endings)
\ No newline at end of file
@@ -0,0 +1,59 @@
+class Indexed_Set():
+    """
+    Class that holds a set of items that, unlike python sets, allows picking random items in constant time
+    """
+    __slots__ = ("_items", "_positions")
+
+    def __init__(self):
+        """
+        Description: Creates an empty Indexed_Set
+        """
+        self._items = []
+        self._positions = {}
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, item):
+        return item in self._positions
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def add(self, item):
+        """
+        Description: Adds an item to the set. Nothing is done if it's already there
+
+        Parameters:
+            - item: Hashable item to add
+        """
+        if item not in self._positions:
+            self._positions[item] = len(self._items)
+            self._items.append(item)
+
+    def discard(self, item):
+        """
+        Description: Removes an item from the set if it's there. The last item takes its place so no other item has to be moved
+
+        Parameters:
+            - item: Item to remove
+        """
+        position = self._positions.pop(item, None)
+        if position is None:
+            return
+
+        last_item = self._items.pop()
+        if position < len(self._items):
+            self._items[position] = last_item
+            self._positions[last_item] = position
+
+    def get(self, position: int):
+        """
+        Description: Gets the item stored in a position
+
+        Parameters:
+            - position: Position between 0 and the size of the set
+
+        Return Value: The item in that position
+        """
+        return self._items[position]
\ No newline at end of file
@@ -1 +1,6 @@
-from episode_binger.DAO.Episode_DAO import Episode_DAO
\ No newline at end of file
+from episode_binger.Lazy_Module import make_lazy
+
+# Classes are imported the first time they are requested
+make_lazy(__name__, {
+    "Episode_DAO": "episode_binger.DAO.Episode_DAO",
+})
\ No newline at end of file
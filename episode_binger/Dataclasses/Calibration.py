@@ -0,0 +1,53 @@
+class Calibration():
+    """
+    Class that holds the performance parameters picked for a season and the measurements they were picked from. It's stored with the episodes info so the season doesn't need to be calibrated again
+    """
+    __slots__ = ("thumbnail_resolution", "num_subsamples", "max_reshuffles", "max_loading_frames", "threshold_scale", "decode_fps", "seek_fps", "separation")
+
+    def __init__(self, thumbnail_resolution: tuple, num_subsamples: int, max_reshuffles: int, max_loading_frames: int, threshold_scale: float = 1.0, decode_fps: float = None, seek_fps: float = None, separation: float = None):
+        """
+        Description: Creates a new Calibration
+
+        Parameters:
+            - thumbnail_resolution: Size to resize frames to after loading them
+            - num_subsamples: Number of subsamples taken by the identical frame finder in every step
+            - max_reshuffles: Max amount of reshuffles of the identical frame finder
+            - max_loading_frames: Max amount of frames the frame locator loads at once
+            - threshold_scale: Factor applied to the similarity thresholds of every algorithm (Under 1 when unrelated frames are too alike to use the default ones)
+            - decode_fps: Measured frames per second decoded in order
+            - seek_fps: Measured frames per second decoded at random positions
+            - separation: Measured distance between unrelated frames divided by the default similarity threshold (The higher the more reliable the matches)
+        """
+        self.thumbnail_resolution = tuple(thumbnail_resolution)
+        self.num_subsamples = num_subsamples
+        self.max_reshuffles = max_reshuffles
+        self.max_loading_frames = max_loading_frames
+        self.threshold_scale = threshold_scale
+        self.decode_fps = decode_fps
+        self.seek_fps = seek_fps
+        self.separation = separation
+
+    def __str__(self):
+        return f"Calibration({self.thumbnail_resolution}, subsamples:{self.num_subsamples}, reshuffles:{self.max_reshuffles}, loading frames:{self.max_loading_frames}, threshold scale:{self.threshold_scale:.2f})"
+
+    def to_dict(self) -> dict:
+        """
+        Description: Converts the calibration into a dictionary that can be stored in json format
+
+        Return Value: Dictionary with every field of the calibration
+        """
+        calibration_info = {attribute: getattr(self, attribute) for attribute in self.__slots__}
+        calibration_info["thumbnail_resolution"] = list(self.thumbnail_resolution)
+        return calibration_info
+
+    @classmethod
+    def from_dict(cls, calibration_info: dict):
+        """
+        Description: Creates a calibration from a dictionary created by to_dict
+
+        Parameters:
+            - calibration_info: Dictionary with the fields of the calibration
+
+        Return Value: A Calibration object
+        """
+        return cls(**{attribute: calibration_info[attribute] for attribute in cls.__slots__ if attribute in calibration_info})
@@ -4,7 +4,9 @@ class Chunk():
     """
     Class that represents a video chunk and holds its information
     """
-    def __init__(self, episode: Episode, start_frame: int, end_frame: int):
+    __slots__ = ("episode", "start_frame", "end_frame", "reliability")
+
+    def __init__(self, episode: Episode, start_frame: int, end_frame: int, reliability: float = None):
         """
         Description: Creates a new chunk
 
@@ -12,13 +14,23 @@ class Chunk():
             - episode: Episode object where the chunk belongs
             - start_frame: First frame of the chunk
             - end_frame: Last frame of the chunk
+            - reliability: Measure of how similar the chunk is to the one it was located from (The closer to 1 the better). None if unknown
         """
         self.episode = episode
         self.start_frame = start_frame
         self.end_frame = end_frame
+        self.reliability = reliability
 
     def __str__(self):
         return f"Chunk({self.episode.path}):[{self.start_frame},{self.end_frame}]"
+
+    def to_record(self) -> tuple:
+        """
+        Description: Converts the chunk into a compact record to send it to other processes. Its episode is not included
+
+        Return Value: A tuple like (start_frame, end_frame, reliability)
+        """
+        return (self.start_frame, self.end_frame, self.reliability)
     
     def isOpening(self):
         """
@@ -0,0 +1,61 @@
+import time
+
+class Deadline():
+    """
+    Class that represents a time budget for a search. Searches check it between their steps and return the best result found so far once it expires.
+    It holds the time it expires at, so it can be sent to other processes of the same machine (Cancelling it only affects this process)
+    """
+    __slots__ = ("end_time", "cancelled")
+
+    def __init__(self, seconds: float = None):
+        """
+        Description: Creates a new Deadline
+
+        Parameters:
+            - seconds: Seconds from now until it expires. If omited it never expires (Unless it's cancelled)
+        """
+        self.end_time = time.time() + seconds if seconds is not None else None
+        self.cancelled = False
+
+    def __str__(self):
+        return f"Deadline({'cancelled' if self.cancelled else self.remaining()})"
+
+    @classmethod
+    def from_budget(cls, budget):
+        """
+        Description: Gets a Deadline from a budget given by the user
+
+        Parameters:
+            - budget: Seconds, a Deadline object (Returned as is) or None for no limit
+
+        Return Value: A Deadline object
+        """
+        if isinstance(budget, Deadline):
+            return budget
+        return cls(budget)
+
+    def cancel(self):
+        """
+        Description: Expires the deadline right away
+        """
+        self.cancelled = True
+
+    def expired(self) -> bool:
+        """
+        Description: Checks if the deadline has expired
+
+        Return Value: True if the time is over or it was cancelled, False otherwise
+        """
+        return self.cancelled or (self.end_time is not None and time.time() >= self.end_time)
+
+    def remaining(self) -> float:
+        """
+        Description: Gets the time left until the deadline expires
+
+        Return Value: Seconds left (0 if it expired). None if it has no limit
+        """
+        if self.cancelled:
+            return 0
+        if self.end_time is None:
+            return None
+        return max(self.end_time - time.time(), 0)
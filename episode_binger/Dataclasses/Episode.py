@@ -1,81 +1,176 @@
-import cv2 as cv
+from episode_binger.Video import Frame_Source_Type
+from episode_binger.Video.Frame_Provider import Frame_Provider
+from episode_binger.Video.Frame_Source import Frame_Source
+from episode_binger.Video.File_Fingerprint import File_Fingerprint
 import numpy as np
 
 class Episode():
     """
     Class that represents an episode an holds its information
     """
-    def __init__(self, path: str):
+    __slots__ = ("path", "frame_count", "frame_shape", "fps", "opening", "ending", "frame_source_type", "fingerprint", "_frame_provider")
+
+    def __init__(self, path: str, frame_source_type: Frame_Source_Type = Frame_Source_Type.OPENCV):
         """
         Description: Creates a new Episode
 
         Parameters:
             - path: Valid path of the episode to load
+            - frame_source_type: A Frame_Source_Type object to specify which backend decodes the episode
         """
         self.path = path
-        cap=cv.VideoCapture(path)
-        width  = cap.get(cv.CAP_PROP_FRAME_WIDTH)
-        height  = cap.get(cv.CAP_PROP_FRAME_HEIGHT)
-        self.frame_count = int(cap.get(cv.CAP_PROP_FRAME_COUNT))
-        self.frame_shape = (int(height), int(width),3)
-        self.fps = cap.get(cv.CAP_PROP_FPS)
-        cap.release()
+        self.frame_source_type = frame_source_type
+        source = Frame_Source.create(path, frame_source_type)
+        self.frame_count = source.frame_count
+        self.frame_shape = source.frame_shape
+        self.fps = source.fps
+        source.release()
+
+        # Identifies the content of the file wherever it is (Results and caches are keyed by it)
+        self.fingerprint = File_Fingerprint.compute(path)
 
         self.opening = None
         self.ending = None
 
+        # Frame provider is created on first use (It holds open capture handles and a background decoder)
+        self._frame_provider = None
+
+    def __getstate__(self):
+        # Open capture handles and threads can't be sent to other processes
+        state = {attribute: getattr(self, attribute) for attribute in self.__slots__}
+        state["_frame_provider"] = None
+        return state
+
+    def __setstate__(self, state):
+        for attribute, value in state.items():
+            setattr(self, attribute, value)
+
+    def to_record(self) -> tuple:
+        """
+        Description: Converts the episode into a compact record to send it to other processes (Plain values only, no open handles or nested objects)
+
+        Return Value: A tuple like (path, frame_count, frame_shape, fps, opening, ending, frame_source_type, fingerprint). Opening and ending are chunk records or None and the frame source type is its value
+        """
+        return (self.path, self.frame_count, self.frame_shape, self.fps,
+                self.opening.to_record() if self.opening else None, self.ending.to_record() if self.ending else None, self.frame_source_type.value, self.fingerprint)
+
+    @classmethod
+    def from_record(cls, record: tuple):
+        """
+        Description: Creates an episode from a record created by to_record. The video file is not opened until its frames are requested
+
+        Parameters:
+            - record: Tuple like (path, frame_count, frame_shape, fps, opening, ending, frame_source_type, fingerprint)
+
+        Return Value: An Episode object
+        """
+        from episode_binger.Dataclasses.Chunk import Chunk
+
+        path, frame_count, frame_shape, fps, opening, ending, frame_source_type, fingerprint = record
+        episode = cls.__new__(cls)
+        episode.path = path
+        episode.frame_count = frame_count
+        episode.frame_shape = tuple(frame_shape)
+        episode.fps = fps
+        episode.opening = Chunk(episode, *opening) if opening else None
+        episode.ending = Chunk(episode, *ending) if ending else None
+        episode.frame_source_type = Frame_Source_Type(frame_source_type)
+        episode.fingerprint = fingerprint
+        episode._frame_provider = None
+
+        return episode
+
+    @property
+    def frame_provider(self) -> Frame_Provider:
+        """
+        Description: Frame_Provider object that serves the frames of this episode
+        """
+        if self._frame_provider is None:
+            self._frame_provider = Frame_Provider(self.path, frame_source_type=self.frame_source_type, fingerprint=self.fingerprint)
+        return self._frame_provider
+
     def __eq__(self, other):
         return self.path == other.path
 
+    def __hash__(self):
+        return hash(self.path)
+
     def __str__(self):
         return f"Episode({self.path}): Opening:{self.opening}, Ending:{self.ending}"
 
-    def load_frame_list(self, indexes: list, thumbnail_resolution: tuple, reversed_list: bool, output_frames: list):
+    def load_frame_list(self, indexes: list, thumbnail_resolution: tuple, reversed_list: bool = False, output_frames: np.ndarray = None) -> np.ndarray:
         """
-        Description: Function meant for threads that loads the frames in the given output_frames list
+        Description: Loads the given frames into one contiguous buffer
 
         Parameters:
             - indexes: List of frame indexes to load
             - thumbnail_resolution: Thumbnail dimensions for frame processing
             - reversed_list: Flag to indicate if the frame list should be reversed
-            - output_frames: Output parameter that holds the list with the loaded frames
-
-        Return Value: List of loaded frames
-        """
-        cap = cv.VideoCapture(self.path)
-        for index in indexes:
-            cap.set(1,index)    # Set frame to start
-            ret, frame = cap.read()
-            frame=cv.resize(frame,(thumbnail_resolution[1],thumbnail_resolution[0]),interpolation=cv.INTER_AREA)
-            output_frames.append(frame.astype(np.int16))
-        
-        cap.release()
+            - output_frames: uint8 buffer shaped like (n, height, width, 3) to load the frames in. It can be reused between calls. If omited a new one is allocated
+
+        Return Value: Numpy array with the loaded frames, shaped like (len(indexes), height, width, 3). Reversed lists are a view of the buffer
+        """
+        frames = self.frame_provider.load_frame_list(indexes, thumbnail_resolution, output_frames)
         if reversed_list:
-            output_frames.reverse()
+            return frames[::-1]
 
-        return output_frames
+        return frames
 
-    def load_consecutive_frames(self, start_frame_index: int, number_of_frames: int, thumbnail_resolution: tuple, reversed_list: bool, output_frames: list):
+    def load_consecutive_frames(self, start_frame_index: int, number_of_frames: int, thumbnail_resolution: tuple, reversed_list: bool = False, output_frames: np.ndarray = None) -> np.ndarray:
         """
-        Description: Function meant for threads that loads the frames in the given output_frames list
+        Description: Loads a window of consecutive frames into one contiguous buffer
 
         Parameters:
             - start_frame_index: Index of the first frame to load
             - number_of_frames: Amount of frames to load
             - thumbnail_resolution: Performance Parameter. It's the size to resize frames. Generally, the lower the better but a 10th part from the original resolution should be fine.
-            - output_frames: Output parameter that holds the list with the loaded frames
-
-        Return Value: List of loaded frames
-        """
-        cap = cv.VideoCapture(self.path)
-        cap.set(1,start_frame_index)    # Set frame to start
-        for i in range(number_of_frames):
-            ret, frame = cap.read()
-            frame=cv.resize(frame,(thumbnail_resolution[1],thumbnail_resolution[0]),interpolation=cv.INTER_AREA)
-            output_frames.append(frame.astype(np.int16))
-            
-        cap.release()
+            - reversed_list: Flag to indicate if the frame list should be reversed
+            - output_frames: uint8 buffer shaped like (n, height, width, 3) to load the frames in. It can be reused between calls. If omited a new one is allocated
+
+        Return Value: Numpy array with the loaded frames, shaped like (number_of_frames, height, width, 3). Reversed lists are a view of the buffer
+        """
+        frames = self.frame_provider.load_consecutive_frames(start_frame_index, number_of_frames, thumbnail_resolution, output_frames)
         if reversed_list:
-            output_frames.reverse()
+            return frames[::-1]
+
+        return frames
+
+    def get_keyframes(self) -> list:
+        """
+        Description: Gets the indexes of the keyframes of the episode. Lists of only keyframes are cheap to load (Coarse scans)
 
-        return output_frames
\ No newline at end of file
+        Return Value: Sorted list of frame indexes. None if the frame source can't tell them
+        """
+        return self.frame_provider.get_keyframes()
+
+    def prefetch_consecutive_frames(self, start_frame_index: int, number_of_frames: int, thumbnail_resolution: tuple):
+        """
+        Description: Starts loading a window of consecutive frames in the background. A later load_consecutive_frames call with the same window won't have to wait for the decoding
+
+        Parameters:
+            - start_frame_index: Index of the first frame to load
+            - number_of_frames: Amount of frames to load
+            - thumbnail_resolution: Performance Parameter. It's the size to resize frames. Generally, the lower the better but a 10th part from the original resolution should be fine.
+        """
+        self.frame_provider.prefetch_consecutive_frames(start_frame_index, number_of_frames, thumbnail_resolution)
+
+    def cancel_prefetch_consecutive_frames(self, start_frame_index: int, number_of_frames: int, thumbnail_resolution: tuple):
+        """
+        Description: Discards a window of consecutive frames started by prefetch_consecutive_frames that won't be loaded. If its decoding didn't start it never does
+
+        Parameters:
+            - start_frame_index: Index of the first frame of the window
+            - number_of_frames: Amount of frames of the window
+            - thumbnail_resolution: Performance Parameter. It's the size to resize frames.
+        """
+        self.frame_provider.cancel_prefetch_consecutive_frames(start_frame_index, number_of_frames, thumbnail_resolution)
+
+    def prefetch_frame_list(self, indexes: list, thumbnail_resolution: tuple):
+        """
+        Description: Starts loading the given frames in the background. A later load_frame_list call with the same frames won't have to wait for the decoding
+
+        Parameters:
+            - indexes: List of frame indexes to load
+            - thumbnail_resolution: Thumbnail dimensions for frame processing
+        """
+        self.frame_provider.prefetch_frame_list(indexes, thumbnail_resolution)
\ No newline at end of file
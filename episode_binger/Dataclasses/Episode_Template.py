@@ -0,0 +1,166 @@
+from episode_binger.Dataclasses.Episode import Episode
+from episode_binger.Dataclasses.Chunk import Chunk
+from episode_binger.Video.Thumbnailer import Thumbnailer
+import cv2 as cv
+import numpy as np
+import base64
+
+class Episode_Template():
+    """
+    Class that holds a compact template of a located episode: Its information, opening, ending and thumbnails of the frames used to locate them. It can replace the episode as reference to locate its opening and ending in other episodes without the episode file
+    """
+    def __init__(self, path: str, frame_count: int, frame_shape: tuple, fps: float, thumbnail_resolution: tuple, thumbnails: dict):
+        """
+        Description: Creates a new Episode_Template
+
+        Parameters:
+            - path: Path of the episode the template was created from
+            - frame_count: Amount of frames of the episode
+            - frame_shape: Shape of the frames of the episode
+            - fps: Frames per second of the episode
+            - thumbnail_resolution: Resolution of the stored thumbnails
+            - thumbnails: Dictionary relating frame indexes with their thumbnails (uint8 numpy arrays)
+        """
+        self.path = path
+        self.frame_count = frame_count
+        self.frame_shape = frame_shape
+        self.fps = fps
+        self.thumbnail_resolution = tuple(thumbnail_resolution)
+        self.thumbnails = thumbnails
+
+        self.opening = None
+        self.ending = None
+
+        # Fingerprint of the episode file. None if unknown
+        self.fingerprint = None
+
+    def __str__(self):
+        return f"Episode_Template({self.path}): Opening:{self.opening}, Ending:{self.ending}"
+
+    @classmethod
+    def from_episode(cls, episode: Episode, thumbnail_resolution: tuple = (36,64), num_probe_frames: int = 5, num_body_samples: int = 16):
+        """
+        Description: Creates the template of a fully located episode
+
+        Parameters:
+            - episode: Episode with its opening and ending located
+            - thumbnail_resolution: Resolution of the stored thumbnails. It should be the one used by the frame locator
+            - num_probe_frames: Amount of frames stored at the start and end of the opening and ending (The frames searched when locating them)
+            - num_body_samples: Amount of frames sampled evenly along the opening and ending
+
+        Return Value: An Episode_Template object
+        """
+        indexes = set()
+        for chunk in (episode.opening, episode.ending):
+            # Start and end probes
+            indexes.update(range(chunk.start_frame, chunk.start_frame+num_probe_frames))
+            indexes.update(range(chunk.end_frame-num_probe_frames+1, chunk.end_frame+1))
+
+            # Sparse body sample
+            indexes.update(np.linspace(chunk.start_frame, chunk.end_frame, num_body_samples, dtype=int).tolist())
+        indexes = sorted(i for i in indexes if 0 <= i < episode.frame_count)
+
+        frames = episode.load_frame_list(indexes, thumbnail_resolution)
+        template = cls(episode.path, episode.frame_count, episode.frame_shape, episode.fps, thumbnail_resolution, {index: frames[i].copy() for i, index in enumerate(indexes)})
+        template.opening = Chunk(template, episode.opening.start_frame, episode.opening.end_frame)
+        template.ending = Chunk(template, episode.ending.start_frame, episode.ending.end_frame)
+        template.fingerprint = episode.fingerprint
+
+        return template
+
+    def to_dict(self) -> dict:
+        """
+        Description: Converts the template into a dictionary that can be stored in json format (Thumbnails are stored as base64 PNG images)
+
+        Return Value: Dictionary with the template
+        """
+        return {
+            "path": self.path,
+            "fingerprint": self.fingerprint,
+            "frame_count": self.frame_count,
+            "frame_shape": list(self.frame_shape),
+            "fps": self.fps,
+            "thumbnail_resolution": list(self.thumbnail_resolution),
+            "opening": [self.opening.start_frame, self.opening.end_frame],
+            "ending": [self.ending.start_frame, self.ending.end_frame],
+            "thumbnails": {str(index): base64.b64encode(cv.imencode(".png", thumbnail)[1].tobytes()).decode("ascii") for index, thumbnail in self.thumbnails.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, template_info: dict):
+        """
+        Description: Creates a template from a dictionary created by to_dict
+
+        Parameters:
+            - template_info: Dictionary with the template
+
+        Return Value: An Episode_Template object
+        """
+        thumbnails = {int(index): cv.imdecode(np.frombuffer(base64.b64decode(thumbnail), dtype=np.uint8), cv.IMREAD_COLOR) for index, thumbnail in template_info["thumbnails"].items()}
+        template = cls(template_info["path"], template_info["frame_count"], tuple(template_info["frame_shape"]), template_info["fps"], template_info["thumbnail_resolution"], thumbnails)
+        template.opening = Chunk(template, *template_info["opening"])
+        template.ending = Chunk(template, *template_info["ending"])
+        template.fingerprint = template_info.get("fingerprint")
+
+        return template
+
+    def load_frame_list(self, indexes: list, thumbnail_resolution: tuple, reversed_list: bool = False, output_frames: np.ndarray = None) -> np.ndarray:
+        """
+        Description: Loads the given frames from the stored thumbnails
+
+        Parameters:
+            - indexes: List of frame indexes to load. They must be stored in the template
+            - thumbnail_resolution: Thumbnail dimensions for frame processing. Thumbnails are resized if they were stored with a different one
+            - reversed_list: Flag to indicate if the frame list should be reversed
+            - output_frames: uint8 buffer shaped like (n, height, width, 3) to load the frames in. If omited a new one is allocated
+
+        Return Value: Numpy array with the loaded frames, shaped like (len(indexes), height, width, 3)
+        """
+        if output_frames is None:
+            output_frames = np.empty((len(indexes), thumbnail_resolution[0], thumbnail_resolution[1], 3), dtype=np.uint8)
+        frames = output_frames[:len(indexes)]
+
+        for i, index in enumerate(indexes):
+            if index not in self.thumbnails:
+                raise Exception(f"Frame {index} is not stored in the template of {self.path}")
+
+            thumbnail = self.thumbnails[index]
+            if tuple(thumbnail_resolution) != self.thumbnail_resolution:
+                thumbnail = Thumbnailer.create(thumbnail, thumbnail_resolution)
+            frames[i] = thumbnail
+
+        if reversed_list:
+            return frames[::-1]
+
+        return frames
+
+    def load_consecutive_frames(self, start_frame_index: int, number_of_frames: int, thumbnail_resolution: tuple, reversed_list: bool = False, output_frames: np.ndarray = None) -> np.ndarray:
+        """
+        Description: Loads a window of consecutive frames from the stored thumbnails
+
+        Parameters:
+            - start_frame_index: Index of the first frame to load
+            - number_of_frames: Amount of frames to load. They must be stored in the template
+            - thumbnail_resolution: Thumbnail dimensions for frame processing
+            - reversed_list: Flag to indicate if the frame list should be reversed
+            - output_frames: uint8 buffer shaped like (n, height, width, 3) to load the frames in. If omited a new one is allocated
+
+        Return Value: Numpy array with the loaded frames, shaped like (number_of_frames, height, width, 3)
+        """
+        return self.load_frame_list(list(range(start_frame_index, start_frame_index+number_of_frames)), thumbnail_resolution, reversed_list, output_frames)
+
+    def get_keyframes(self) -> list:
+        # Only some frames are stored, there are no cheaper ones
+        return None
+
+    def prefetch_consecutive_frames(self, start_frame_index: int, number_of_frames: int, thumbnail_resolution: tuple):
+        # Thumbnails are already in memory
+        pass
+
+    def cancel_prefetch_consecutive_frames(self, start_frame_index: int, number_of_frames: int, thumbnail_resolution: tuple):
+        # Nothing is read ahead
+        pass
+
+    def prefetch_frame_list(self, indexes: list, thumbnail_resolution: tuple):
+        # Thumbnails are already in memory
+        pass
@@ -0,0 +1,164 @@
+from episode_binger.Dataclasses.Episode import Episode
+import numpy as np
+
+class Retimed_Episode():
+    """
+    Class that shows an episode at another frame rate, so it can be compared frame by frame with episodes of that frame rate. Its frame v is the frame of the episode shown at the time v/fps (The closest one)
+    """
+    __slots__ = ("episode", "path", "frame_count", "frame_shape", "fps", "opening", "ending", "frame_source_type", "fingerprint")
+
+    def __init__(self, episode: Episode, fps: float):
+        """
+        Description: Creates a new Retimed_Episode
+
+        Parameters:
+            - episode: Episode to show
+            - fps: Frame rate to show it at
+        """
+        self.episode = episode
+        self.path = episode.path
+        self.frame_count = int(episode.frame_count*fps/episode.fps)
+        self.frame_shape = episode.frame_shape
+        self.fps = fps
+        self.frame_source_type = episode.frame_source_type
+
+        # Caches keyed by the content must not mix both frame rates
+        self.fingerprint = f"{episode.fingerprint or episode.path}@{fps:g}"
+
+        self.opening = None
+        self.ending = None
+
+    def __eq__(self, other):
+        return self.path == other.path and self.fps == other.fps
+
+    def __hash__(self):
+        return hash((self.path, self.fps))
+
+    def __str__(self):
+        return f"Retimed_Episode({self.path}@{self.fps:g})"
+
+    def to_frame(self, index: int) -> int:
+        """
+        Description: Converts a frame index of this view into a frame index of the episode
+
+        Parameters:
+            - index: Frame index at the frame rate of the view
+
+        Return Value: Frame index of the episode
+        """
+        return max(0, min(self.episode.frame_count-1, round(index*self.episode.fps/self.fps)))
+
+    def from_frame(self, index: int) -> int:
+        """
+        Description: Converts a frame index of the episode into a frame index of this view
+
+        Parameters:
+            - index: Frame index of the episode
+
+        Return Value: Frame index at the frame rate of the view
+        """
+        return round(index*self.fps/self.episode.fps)
+
+    def _to_frames(self, indexes: list) -> tuple:
+        """
+        Description: Converts frame indexes of this view into the frames of the episode that have to be loaded
+
+        Parameters:
+            - indexes: Frame indexes at the frame rate of the view
+
+        Return Value: A tuple like (frames, positions). Frames are the sorted frame indexes of the episode (Without repetitions) and positions the place of every given index in them
+        """
+        frames, positions = np.unique([self.to_frame(i) for i in indexes], return_inverse=True)
+        return frames.tolist(), positions
+
+    def load_frame_list(self, indexes: list, thumbnail_resolution: tuple, reversed_list: bool = False, output_frames: np.ndarray = None) -> np.ndarray:
+        """
+        Description: Loads the given frames into one contiguous buffer
+
+        Parameters:
+            - indexes: List of frame indexes to load (At the frame rate of the view)
+            - thumbnail_resolution: Thumbnail dimensions for frame processing
+            - reversed_list: Flag to indicate if the frame list should be reversed
+            - output_frames: uint8 buffer shaped like (n, height, width, 3) to load the frames in. If omited a new one is allocated
+
+        Return Value: Numpy array with the loaded frames, shaped like (len(indexes), height, width, 3). Reversed lists are a view of the buffer
+        """
+        frames, positions = self._to_frames(indexes)
+        loaded_frames = self.episode.load_frame_list(frames, thumbnail_resolution)
+        frames = np.take(loaded_frames, positions, axis=0, out=output_frames[:len(indexes)] if output_frames is not None else None)
+        if reversed_list:
+            return frames[::-1]
+
+        return frames
+
+    def load_consecutive_frames(self, start_frame_index: int, number_of_frames: int, thumbnail_resolution: tuple, reversed_list: bool = False, output_frames: np.ndarray = None) -> np.ndarray:
+        """
+        Description: Loads a window of consecutive frames into one contiguous buffer
+
+        Parameters:
+            - start_frame_index: Index of the first frame to load (At the frame rate of the view)
+            - number_of_frames: Amount of frames to load
+            - thumbnail_resolution: Performance Parameter. It's the size to resize frames.
+            - reversed_list: Flag to indicate if the frame list should be reversed
+            - output_frames: uint8 buffer shaped like (n, height, width, 3) to load the frames in. If omited a new one is allocated
+
+        Return Value: Numpy array with the loaded frames, shaped like (number_of_frames, height, width, 3). Reversed lists are a view of the buffer
+        """
+        # The frames of the episode in the window are consecutive too
+        start = self.to_frame(start_frame_index)
+        end = self.to_frame(start_frame_index+number_of_frames-1)
+        loaded_frames = self.episode.load_consecutive_frames(start, end-start+1, thumbnail_resolution)
+
+        positions = [self.to_frame(start_frame_index+i)-start for i in range(number_of_frames)]
+        frames = np.take(loaded_frames, positions, axis=0, out=output_frames[:number_of_frames] if output_frames is not None else None)
+        if reversed_list:
+            return frames[::-1]
+
+        return frames
+
+    def get_keyframes(self) -> list:
+        """
+        Description: Gets the indexes of the keyframes of the episode at the frame rate of the view
+
+        Return Value: Sorted list of frame indexes. None if the frame source can't tell them
+        """
+        keyframes = self.episode.get_keyframes()
+        if keyframes is None:
+            return None
+        return sorted(set(self.from_frame(k) for k in keyframes))
+
+    def prefetch_consecutive_frames(self, start_frame_index: int, number_of_frames: int, thumbnail_resolution: tuple):
+        """
+        Description: Starts loading a window of consecutive frames in the background
+
+        Parameters:
+            - start_frame_index: Index of the first frame to load (At the frame rate of the view)
+            - number_of_frames: Amount of frames to load
+            - thumbnail_resolution: Performance Parameter. It's the size to resize frames.
+        """
+        start = self.to_frame(start_frame_index)
+        end = self.to_frame(start_frame_index+number_of_frames-1)
+        self.episode.prefetch_consecutive_frames(start, end-start+1, thumbnail_resolution)
+
+    def cancel_prefetch_consecutive_frames(self, start_frame_index: int, number_of_frames: int, thumbnail_resolution: tuple):
+        """
+        Description: Discards a window of consecutive frames started by prefetch_consecutive_frames that won't be loaded
+
+        Parameters:
+            - start_frame_index: Index of the first frame of the window (At the frame rate of the view)
+            - number_of_frames: Amount of frames of the window
+            - thumbnail_resolution: Performance Parameter. It's the size to resize frames.
+        """
+        start = self.to_frame(start_frame_index)
+        end = self.to_frame(start_frame_index+number_of_frames-1)
+        self.episode.cancel_prefetch_consecutive_frames(start, end-start+1, thumbnail_resolution)
+
+    def prefetch_frame_list(self, indexes: list, thumbnail_resolution: tuple):
+        """
+        Description: Starts loading the given frames in the background
+
+        Parameters:
+            - indexes: List of frame indexes to load (At the frame rate of the view)
+            - thumbnail_resolution: Thumbnail dimensions for frame processing
+        """
+        self.episode.prefetch_frame_list(self._to_frames(indexes)[0], thumbnail_resolution)
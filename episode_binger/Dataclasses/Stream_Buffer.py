@@ -0,0 +1,40 @@
+from episode_binger.Dataclasses.Episode_Template import Episode_Template
+from episode_binger.Video.Thumbnailer import Thumbnailer
+import numpy as np
+
+class Stream_Buffer(Episode_Template):
+    """
+    Class that holds the thumbnails of the last frames received from a stream, so they can be compared like the frames of an episode. Older frames are discarded to keep memory bounded
+    """
+    def __init__(self, path: str, fps: float, thumbnail_resolution: tuple, max_frames: int):
+        """
+        Description: Creates an empty Stream_Buffer
+
+        Parameters:
+            - path: Name of the stream
+            - fps: Frames per second of the stream
+            - thumbnail_resolution: Resolution of the stored thumbnails
+            - max_frames: Max amount of frames kept
+        """
+        super().__init__(path, 0, None, fps, thumbnail_resolution, {})
+        self.max_frames = max_frames
+
+    def add_frame(self, frame: np.ndarray) -> int:
+        """
+        Description: Stores the thumbnail of the next frame of the stream
+
+        Parameters:
+            - frame: The frame as read by OpenCV (BGR)
+
+        Return Value: Index of the frame in the stream
+        """
+        index = self.frame_count
+        self.frame_shape = frame.shape
+        self.thumbnails[index] = Thumbnailer.create(frame, self.thumbnail_resolution)
+        self.frame_count += 1
+
+        # Discard the oldest frame (Thumbnails are kept in arrival order)
+        if len(self.thumbnails) > self.max_frames:
+            del self.thumbnails[next(iter(self.thumbnails))]
+
+        return index
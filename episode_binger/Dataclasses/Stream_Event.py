@@ -0,0 +1,25 @@
+class Stream_Event():
+    """
+    Class that represents something detected in a stream: The start or end of an opening or ending, or a start whose end was never found
+    """
+    __slots__ = ("kind", "chunk_type", "frame", "seconds", "reliability")
+
+    def __init__(self, kind: str, chunk_type: str, frame: int, seconds: float, reliability: float):
+        """
+        Description: Creates a new Stream_Event
+
+        Parameters:
+            - kind: "start", "end" or "cancel" (The end of the chunk wasn't found where expected, so the start was a false match)
+            - chunk_type: "opening" or "ending"
+            - frame: Frame of the stream where the chunk starts or ends
+            - seconds: Time of that frame from the start of the stream
+            - reliability: Measure of how similar the stream frames are to the reference ones (The closer to 1 the better)
+        """
+        self.kind = kind
+        self.chunk_type = chunk_type
+        self.frame = frame
+        self.seconds = seconds
+        self.reliability = reliability
+
+    def __str__(self):
+        return f"Stream_Event({self.chunk_type} {self.kind}): Frame {self.frame} ({self.seconds:.3f}s), Reliability {self.reliability:.3f}"
@@ -1,2 +1,13 @@
-from episode_binger.Dataclasses.Chunk import Chunk
-from episode_binger.Dataclasses.Episode import Episode
\ No newline at end of file
+from episode_binger.Lazy_Module import make_lazy
+
+# Classes are imported the first time they are requested
+make_lazy(__name__, {
+    "Calibration": "episode_binger.Dataclasses.Calibration",
+    "Chunk": "episode_binger.Dataclasses.Chunk",
+    "Deadline": "episode_binger.Dataclasses.Deadline",
+    "Episode": "episode_binger.Dataclasses.Episode",
+    "Episode_Template": "episode_binger.Dataclasses.Episode_Template",
+    "Retimed_Episode": "episode_binger.Dataclasses.Retimed_Episode",
+    "Stream_Buffer": "episode_binger.Dataclasses.Stream_Buffer",
+    "Stream_Event": "episode_binger.Dataclasses.Stream_Event",
+})
\ No newline at end of file
@@ -1,19 +1,24 @@
 from episode_binger.Algorithms.Chunks import Boundary_Finder_Type
-from episode_binger.Algorithms.Chunks import Zoomin_Boundary_Finder
 from episode_binger.Algorithms.Distance import Distance_Algorithm_Type
-from episode_binger.Algorithms.Distance import Manhattan_Distance
-from episode_binger.Algorithms.Distance import Euclidean_Distance
 from episode_binger.Algorithms.Frames.IdenticalFrameFinder import Identical_Frames_Algorithm_Type
-from episode_binger.Algorithms.Frames.IdenticalFrameFinder import Recursive_Frame_Finder
 from episode_binger.Algorithms.Frames.FrameLocator import Frame_Locator_Type
-from episode_binger.Algorithms.Frames.FrameLocator import Sequential_Frame_Locator
 from episode_binger.Algorithms.Frames import Frame_Algorithm
 from episode_binger.Algorithms import Algorithm_Manager
 from episode_binger.Dataclasses import Episode
 from episode_binger.Dataclasses import Chunk
+from episode_binger.Dataclasses import Deadline
+from episode_binger.Dataclasses import Episode_Template
 from episode_binger.DAO import Episode_DAO
 from episode_binger.Video import Video_Assembler
+from episode_binger.Video import Frame_Source_Type
+from episode_binger.Executors import Executor_Type
+from episode_binger.Memory_Governor import Memory_Governor
 from multiprocessing import Pool
+from queue import Queue, Empty
+from random import Random
+from collections import OrderedDict
+from threading import Lock
+import os
 
 import logging
 
@@ -23,7 +28,7 @@ class Episode_Binger():
     """
     Class to load episodes, find openings and endings and create macro-episodes with only one opening and one ending
     """
-    def __init__(self, distance_algorithm_type: Distance_Algorithm_Type = Distance_Algorithm_Type.MANHATTAN_DISTANCE, identical_frame_algorithm_type: Identical_Frames_Algorithm_Type = Identical_Frames_Algorithm_Type.RECURSIVE_FINDER, frame_locator_algorithm_type: Frame_Locator_Type = Frame_Locator_Type.SEQUENTIAL_FRAME_LOCATOR, boundary_finder_algorithm_type: Boundary_Finder_Type = Boundary_Finder_Type.ZOOMIN_FINDER):
+    def __init__(self, distance_algorithm_type: Distance_Algorithm_Type = Distance_Algorithm_Type.MANHATTAN_DISTANCE, identical_frame_algorithm_type: Identical_Frames_Algorithm_Type = Identical_Frames_Algorithm_Type.RECURSIVE_FINDER, frame_locator_algorithm_type: Frame_Locator_Type = Frame_Locator_Type.SEQUENTIAL_FRAME_LOCATOR, boundary_finder_algorithm_type: Boundary_Finder_Type = Boundary_Finder_Type.ZOOMIN_FINDER, num_processes: int = None, seed: int = None, executor_type: Executor_Type = None, frame_source_type: Frame_Source_Type = Frame_Source_Type.OPENCV, max_rss: int = None):
         """
         Description: Creates an Episode_Binger object.
 
@@ -32,33 +37,92 @@ class Episode_Binger():
             - identical_frame_algorithm_type: An Identical_Frames_Algorithm_Type object to specify which algorithm should be used to find identical frames
             - frame_locator_algorithm_type: An Frame_Locator_Type object to specify which algorithm should be used to locate sets of consecutive frames in episodes
             - boundary_finder_algorithm_type: An Boundary_Finder_Type object to specify which algorithm should be used to find chunk boundaries from an identical pair of frames
+            - num_processes: Amount of processes used to search for the opening and ending at once. If omited, one per CPU core
+            - seed: Seed for every randomized component. With the same seed and episodes the searches and their results are reproducible. If omited they are seeded from system entropy
+            - executor_type: An Executor_Type object to specify how the episodes are distributed when locating their openings and endings. A process pool in this machine, a thread pool in this process (Shares memory, nothing is forked or pickled) or a work queue (work_queue.db) that workers from several hosts can take part in. If omited, threads when the available memory can't hold a process per CPU core and processes otherwise. Replace the executor attribute for a custom configuration
+            - frame_source_type: A Frame_Source_Type object to specify which backend decodes the episodes. PyAV decodes with several threads and lets the searches start with coarse scans of only keyframes (Requires the av package)
+            - max_rss: Ceiling in bytes of the resident memory of every search process together. Loaded windows, comparison tiles and the amount of processes running at once are adapted to stay under it (Searches wait for memory instead of being killed). If omited, 80% of the available memory
         """
+        self.num_processes = num_processes if num_processes else os.cpu_count()
+        self.seed = seed
+
+        # Shared by every algorithm and executor (Its ceiling is split between the workers)
+        self.memory_governor = Memory_Governor(max_rss, task_memory_estimate=Episode_Binger._process_memory_estimate)
+
         # Create the distance algorithm object
+        # Only the selected algorithms are imported
         if distance_algorithm_type == Distance_Algorithm_Type.MANHATTAN_DISTANCE:
-            distance_calculator = Manhattan_Distance()
+            from episode_binger.Algorithms.Distance import Manhattan_Distance
+            distance_calculator = Manhattan_Distance(memory_governor=self.memory_governor)
         elif distance_algorithm_type == Distance_Algorithm_Type.EUCLIDEAN_DISTANCE:
-            distance_calculator = Euclidean_Distance()
+            from episode_binger.Algorithms.Distance import Euclidean_Distance
+            distance_calculator = Euclidean_Distance(memory_governor=self.memory_governor)
+
+        # Keyframes are only cheaper to decode alone with PyAV
+        keyframe_scan = frame_source_type == Frame_Source_Type.PYAV
 
         # Create the identical frames algorithm object
         if identical_frame_algorithm_type == Identical_Frames_Algorithm_Type.RECURSIVE_FINDER:
-            identical_frame_finder = Recursive_Frame_Finder(distance_calculator)
+            from episode_binger.Algorithms.Frames.IdenticalFrameFinder import Recursive_Frame_Finder
+            identical_frame_finder = Recursive_Frame_Finder(distance_calculator, seed=seed, keyframe_scan=keyframe_scan)
+        elif identical_frame_algorithm_type == Identical_Frames_Algorithm_Type.BEST_FIRST_FINDER:
+            from episode_binger.Algorithms.Frames.IdenticalFrameFinder import Best_First_Frame_Finder
+            identical_frame_finder = Best_First_Frame_Finder(distance_calculator)
         if frame_locator_algorithm_type == Frame_Locator_Type.SEQUENTIAL_FRAME_LOCATOR:
-            frame_locator = Sequential_Frame_Locator(distance_calculator, max_loading_frames=5000)
+            from episode_binger.Algorithms.Frames.FrameLocator import Sequential_Frame_Locator
+            frame_locator = Sequential_Frame_Locator(distance_calculator, max_loading_frames=5000, keyframe_scan=keyframe_scan, memory_governor=self.memory_governor)
+        elif frame_locator_algorithm_type == Frame_Locator_Type.CORRELATION_FRAME_LOCATOR:
+            from episode_binger.Algorithms.Frames.FrameLocator import Correlation_Frame_Locator
+            frame_locator = Correlation_Frame_Locator(distance_calculator, max_loading_frames=5000, memory_governor=self.memory_governor)
         frame_algorithm = Frame_Algorithm(identical_frame_finder, frame_locator)
 
         # Create the chunk_algorithm object
         if boundary_finder_algorithm_type == Boundary_Finder_Type.ZOOMIN_FINDER:
+            from episode_binger.Algorithms.Chunks import Zoomin_Boundary_Finder
             boundary_finder = Zoomin_Boundary_Finder(distance_calculator)
 
         # Create the algoritm_manager object
         self.algorithm_manager = Algorithm_Manager(frame_algorithm, boundary_finder)
         
         # Create episode DAO
-        self.episode_dao = Episode_DAO()
+        self.episode_dao = Episode_DAO(seed, frame_source_type)
+
+        # Create the executor for the location phase
+        if executor_type is None:
+            executor_type = self._get_default_executor_type()
+            logger.debug(f"Executor selected: {executor_type}")
+
+        if executor_type == Executor_Type.PROCESS_POOL:
+            from episode_binger.Executors import Process_Pool_Executor
+            self.executor = Process_Pool_Executor(max_processes=self.num_processes, memory_governor=self.memory_governor)
+        elif executor_type == Executor_Type.WORK_QUEUE:
+            from episode_binger.Executors import Work_Queue_Executor
+            self.executor = Work_Queue_Executor(num_local_workers=self.num_processes)
+        elif executor_type == Executor_Type.THREAD_POOL:
+            from episode_binger.Executors import Thread_Pool_Executor
+            self.executor = Thread_Pool_Executor(max_threads=self.num_processes)
+        self.memory_governor.set_workers(self.num_processes, self.executor.shared_memory)
 
         # Create Video Assembler
         self.video_assembler = Video_Assembler()
 
+    # Memory a worker process needs (Interpreter, libraries, decoders and loaded frames)
+    _process_memory_estimate = 256*1024**2
+
+    def _get_default_executor_type(self) -> Executor_Type:
+        """
+        Description: Selects the executor for this machine. Processes need their own copy of everything, threads share the memory of this process
+
+        Return Value: Executor_Type.THREAD_POOL if the available memory can't hold a process per CPU core, Executor_Type.PROCESS_POOL otherwise (Or if the available memory is unknown)
+        """
+        available_memory = Memory_Governor.get_available_memory()
+        if available_memory is None:
+            return Executor_Type.PROCESS_POOL
+
+        if available_memory < self.num_processes*Episode_Binger._process_memory_estimate:
+            return Executor_Type.THREAD_POOL
+        return Executor_Type.PROCESS_POOL
+
     def add_episode(self, episode_path: str):
         """
         Description: Adds an episode to the episode binger object
@@ -67,18 +131,116 @@ class Episode_Binger():
         """
         self.episode_dao.add_episode(episode_path)
 
-    def find_opening_ending(self):
+    def calibrate(self, season: str = None) -> list:
+        """
+        Description: Picks the performance parameters (Thumbnail resolution, subsamples, reshuffles, loaded frames and similarity thresholds) of every season from a few of its episodes: The cheapest ones that keep the matches reliable for their resolution, fps, length and the available memory.
+        Calibrations are stored with the episodes info and every search uses the one of the season of its episodes (Of the reference when locating)
+
+        Parameters:
+            - season: Directory of the season to calibrate. If omited, every season
+
+        Return Value: List of the Calibration objects of the calibrated seasons
+        """
+        from episode_binger.Calibrator import Calibrator
+
+        calibrations = []
+        for s in ([season] if season is not None else self.episode_dao.get_season_list()):
+            calibrator = Calibrator(self.algorithm_manager.frame_algorithm.frame_locator.distance_algorithm, num_workers=self.num_processes, seed=self._derive_seed("calibrate", s))
+            calibration = calibrator.calibrate(self.episode_dao.get_season_episode_list(s))
+            logger.debug(f"Season {s}: {calibration}")
+            self.episode_dao.calibrations[s] = calibration
+            calibrations.append(calibration)
+
+        return calibrations
+
+    def _apply_calibration(self, episode):
+        """
+        Description: Sets the performance parameters of the season of an episode in the algorithms. If the season hasn't been calibrated the algorithms get back the parameters they were created with (Not the ones of the previous season)
+
+        Parameters:
+            - episode: Episode or Episode_Template the search is going to use
+        """
+        calibration = self.episode_dao.get_calibration(episode.path)
+        if calibration is not None:
+            self.algorithm_manager.apply_calibration(calibration)
+        else:
+            self.algorithm_manager.reset_calibration()
+
+    def _derive_seed(self, *keys) -> int:
+        """
+        Description: Derives a seed for a task sent to another process from the Episode_Binger seed. Tasks get different seeds that don't depend on the process that runs them
+
+        Parameters:
+            - keys: Values identifying the task
+
+        Return Value: The derived seed or None if the Episode_Binger has no seed
+        """
+        if self.seed is None:
+            return None
+        return Random(":".join(str(k) for k in (self.seed,)+keys)).getrandbits(64)
+
+    # State of the worker processes. Set once per process by the pool initializer, so tasks only carry compact records (Shared by every task with threads)
+    _worker_algorithm_manager = None
+    _worker_reference = None
+    _worker_episodes = OrderedDict()
+    _max_worker_episodes = 4
+    _worker_lock = Lock()
+
+    def _get_reference_payload(reference):
+        # Episodes are sent as records, templates are sent whole (Their thumbnails are needed)
+        if isinstance(reference, Episode):
+            return reference.to_record()
+        return reference
+
+    def _init_worker_pool(algorithm_manager: Algorithm_Manager, reference = None):
+        Episode_Binger._worker_algorithm_manager = algorithm_manager
+        Episode_Binger._worker_reference = Episode.from_record(reference) if isinstance(reference, tuple) else reference
+        Episode_Binger._worker_episodes = OrderedDict()
+
+    def _get_worker_episode(record: tuple) -> Episode:
+        # Episodes are kept between tasks of the same process (Their open captures are reused)
+        with Episode_Binger._worker_lock:
+            episodes = Episode_Binger._worker_episodes
+            episode = episodes.get(record[0])
+            if episode is None or episode.to_record() != record:
+                episode = Episode.from_record(record)
+                episodes[record[0]] = episode
+                while len(episodes) > Episode_Binger._max_worker_episodes:
+                    _, old_episode = episodes.popitem(last=False)
+                    if old_episode._frame_provider is not None:
+                        old_episode._frame_provider.close()
+            episodes.move_to_end(record[0])
+            return episode
+
+    def _find_common_chunk_pool(args):
+        seed, e1_record, e2_record, from_frames, to_frames, deadline = args
+        obj = Episode_Binger._worker_algorithm_manager
+        # Without a seed it's reseeded from system entropy (Workers inherit the state of the parent, they would repeat the same search)
+        obj.set_seed(seed)
+        chunks = obj.find_common_chunk(Episode_Binger._get_worker_episode(e1_record), Episode_Binger._get_worker_episode(e2_record), from_frames, to_frames, deadline=deadline)
+        if not chunks:
+            return None
+        return chunks[0].to_record(), chunks[1].to_record()
+
+    def find_opening_ending(self, budget = None):
         """
         Description: From the episodes added to the episode binger takes two and compares them to find common regions and identifies them as opening and ending based on their locations.
+        The opening search (first half of the episodes) and the ending search (second half) run concurrently in a pool of processes, several independent attempts at a time. Once both are found the remaining attempts are cancelled.
+
+        Parameters:
+            - budget: Seconds the search can take or a Deadline object (It can be cancelled from another thread). When it runs out the remaining attempts are cancelled and whatever was found is stored (Only the opening or only the ending). If omited the search goes on until both are found
 
         Return Value: True if the opening and ending were found, False otherwise.
         """
+        deadline = Deadline.from_budget(budget)
+
         # Check if there are 2 episodes at least
         if len(self.episode_dao.get_episode_list()) < 2:
             return False
 
         # Get 2 random episodes
         e1, e2 = self.episode_dao.get_random_episodes(2)
+        self._apply_calibration(e1)
 
         openingFound=False
         endingFound=False
@@ -88,60 +250,158 @@ class Episode_Binger():
         ending_chunk_e2 = None
 
         change_episodes_attempts = 0
-        # Search for opening and ending
-        while not (openingFound and endingFound):
-            # Blind Search
-            if not openingFound and not endingFound:
-                chunks = self.algorithm_manager.find_common_chunk(e1,e2)
-            # Ending Search
-            elif openingFound:
-                chunks = self.algorithm_manager.find_common_chunk(e1,e2,(opening_chunk_e1.end_frame+1,opening_chunk_e2.end_frame+1))
-            # Opening Search
-            elif endingFound:
-                chunks = self.algorithm_manager.find_common_chunk(e1,e2,to_frames=(ending_chunk_e1.start_frame,ending_chunk_e2.start_frame))
-
-            # Chunk not found
-            if not chunks:
-                logger.debug("Chunk not found, trying again")
-                change_episodes_attempts+=1
-                if change_episodes_attempts > 20:
-                    # Try again with 2 different episodes
-                    e1, e2 = self.episode_dao.get_random_episodes(2)
-                    openingFound=False
-                    endingFound=False
-                continue
-
-            change_episodes_attempts=0
-
-            e1_chunk, e2_chunk = chunks
-
-            # Check if we are getting an opening or an ending
-            if e1_chunk.isOpening() or e2_chunk.isOpening():
-                opening_chunk_e1 = e1_chunk
-                opening_chunk_e2 = e2_chunk
-                openingFound=True
-            else:
-                ending_chunk_e1 = e1_chunk
-                ending_chunk_e2 = e2_chunk
-                endingFound=True
+        episode_pair = 0        # Increased every time the episodes are changed (Results from previous pairs are discarded)
+        searching_opening = True  # Kind of search of the next attempt (Opening and ending searches alternate)
+        running_attempts = 0
+        next_attempt = 0        # Number of the next attempt to launch
+        next_result = 0         # Number of the next attempt to process
+        finished_attempts = {}  # Results like (pair, searching_opening, chunks) keyed by (attempt, pair)
+        results = Queue()
+
+        # With a seed, the kind and seed of every attempt depend only on its number and results are processed in that order. The search is the same whatever the amount of attempts running at once (It changes with the measured memory)
+        seeded = self.seed is not None
+
+        # Deterministic finders would repeat the same search in every attempt. Only one attempt per range runs at once and a failed one changes the episodes
+        deterministic = self.algorithm_manager.frame_algorithm.identical_frame_finder.deterministic
+        running_searches = set()  # Ranges being searched like (pair, searching_opening). Only with deterministic finders
+
+        e1_record, e2_record = e1.to_record(), e2.to_record()
+
+        with Pool(processes=self.num_processes, initializer=Episode_Binger._init_worker_pool, initargs=(self.algorithm_manager,)) as pool:
+            # Search for opening and ending
+            while not (openingFound and endingFound):
+                # Keep every process busy with attempts for what hasn't been found yet (As many as fit under the memory ceiling)
+                while running_attempts < self.memory_governor.get_concurrency(self.num_processes):
+                    if seeded:
+                        searching_opening = next_attempt % 2 == 0
+                        # Attempts for what was already found are ignored when processed, they don't need to run
+                        if openingFound if searching_opening else endingFound:
+                            finished_attempts[(next_attempt, episode_pair)] = (episode_pair, searching_opening, None)
+                            next_attempt+=1
+                            continue
+                    elif openingFound:
+                        searching_opening = False
+                    elif endingFound:
+                        searching_opening = True
+
+                    if deterministic and (episode_pair, searching_opening) in running_searches:
+                        # Search the other range if it's not being searched too
+                        if seeded or openingFound or endingFound or (episode_pair, not searching_opening) in running_searches:
+                            break
+                        searching_opening = not searching_opening
+
+                    # Opening Search
+                    if searching_opening:
+                        search_range = ((0,0),(e1.frame_count//2,e2.frame_count//2))
+                    # Ending Search
+                    else:
+                        search_range = ((e1.frame_count//2,e2.frame_count//2),(e1.frame_count,e2.frame_count))
+
+                    pool.apply_async(Episode_Binger._find_common_chunk_pool, ((self._derive_seed("find", next_attempt),e1_record,e2_record,*search_range,deadline),),
+                                     callback=lambda chunks, attempt=next_attempt, pair=episode_pair, opening=searching_opening: results.put((attempt, pair, opening, chunks)),
+                                     error_callback=lambda error, attempt=next_attempt, pair=episode_pair, opening=searching_opening: results.put((attempt, pair, opening, error)))
+                    if deterministic:
+                        running_searches.add((episode_pair, searching_opening))
+                    next_attempt+=1
+                    running_attempts+=1
+                    searching_opening = not searching_opening
+
+                # Without a seed, attempts are processed as they finish
+                # Results are waited for in short steps, so an expired or cancelled deadline is noticed
+                while (next_result, episode_pair) not in finished_attempts and not deadline.expired():
+                    try:
+                        attempt, pair, opening, chunks = results.get(timeout=1)
+                    except Empty:
+                        continue
+                    running_attempts-=1
+                    running_searches.discard((pair, opening))
+                    # A failing attempt is an error, not a chunk that wasn't found (The following ones would fail the same way)
+                    if isinstance(chunks, BaseException):
+                        logger.error(f"Attempt {attempt} failed searching the {'opening' if opening else 'ending'}", exc_info=chunks)
+                        raise chunks
+                    if seeded and pair != episode_pair:
+                        continue
+                    finished_attempts[(attempt, pair) if seeded else (next_result, episode_pair)] = (pair, opening, chunks)
+
+                if (next_result, episode_pair) not in finished_attempts:
+                    logger.debug(f"Deadline expired, opening found: {openingFound}, ending found: {endingFound}")
+                    break
+                pair, opening, chunks = finished_attempts.pop((next_result, episode_pair))
+                next_result+=1
+
+                # Attempt made with a previous pair of episodes
+                if pair != episode_pair:
+                    continue
+
+                # Attempt for what was already found
+                if seeded and (openingFound if opening else endingFound):
+                    continue
+
+                # Chunk not found
+                if not chunks:
+                    logger.debug("Chunk not found, trying again")
+                    change_episodes_attempts+=1
+                    if change_episodes_attempts > 20 or deterministic:
+                        # Try again with 2 different episodes
+                        e1, e2 = self.episode_dao.get_random_episodes(2)
+                        e1_record, e2_record = e1.to_record(), e2.to_record()
+                        episode_pair+=1
+                        change_episodes_attempts=0
+                        openingFound=False
+                        endingFound=False
+
+                        # With a seed, the following attempts are launched again with the new episodes (Attempts still running for the previous ones are ignored)
+                        if seeded:
+                            next_attempt = next_result
+                            finished_attempts.clear()
+                    continue
+
+                change_episodes_attempts=0
+
+                # Chunks come from another process as records. Link them to our episodes
+                e1_chunk = Chunk(e1, *chunks[0])
+                e2_chunk = Chunk(e2, *chunks[1])
+
+                # Check if we are getting an opening or an ending
+                if e1_chunk.isOpening() or e2_chunk.isOpening():
+                    opening_chunk_e1 = e1_chunk
+                    opening_chunk_e2 = e2_chunk
+                    openingFound=True
+                else:
+                    ending_chunk_e1 = e1_chunk
+                    ending_chunk_e2 = e2_chunk
+                    endingFound=True
+
+            # Leaving the pool terminates the attempts still running
 
         # Store openings and endings in the episodes
         logger.debug(f"Openings: {opening_chunk_e1} and {opening_chunk_e2}")
         logger.debug(f"Endings: {ending_chunk_e1} and {ending_chunk_e2}")
 
-        # Store openings and endings info
-        self.episode_dao.add_openings([opening_chunk_e1,opening_chunk_e2])
-        self.episode_dao.add_endings([ending_chunk_e1, ending_chunk_e2])
+        # Store openings and endings info (With an expired deadline only what was found)
+        if openingFound:
+            self.episode_dao.add_openings([opening_chunk_e1,opening_chunk_e2])
+        if endingFound:
+            self.episode_dao.add_endings([ending_chunk_e1, ending_chunk_e2])
 
-        return True
+        return openingFound and endingFound
 
     def _locate_episode_pool(args):
-        obj, config = args
-        return obj.locate_episode(*config)
-
-    def locate_opening_ending_every_episode(self):
+        seed, episode_record, budget = args
+        obj = Episode_Binger._worker_algorithm_manager
+        # Without a seed it's reseeded from system entropy (Workers inherit the state of the parent, they would repeat the same search)
+        obj.set_seed(seed)
+        # The budget counts from the start of the task (Tasks might wait in the executor)
+        opening, ending = obj.locate_episode(Episode_Binger._get_worker_episode(episode_record), Episode_Binger._worker_reference, Deadline.from_budget(budget))
+        return opening.to_record() if opening else None, ending.to_record() if ending else None
+
+    def locate_opening_ending_every_episode(self, budget: float = None):
         """
         Description: Given the opening and ending have been identified. Locate them in every added episode.
+        The found chunks keep the reliability of their location
+
+        Parameters:
+            - budget: Seconds every episode can take to be located. When they run out the best locations found so far are used, if they are reliable enough. If omited the searches have no time limit
         """
         # Check if we have episodes with openings and endings located
         unlocated_episodes = self.episode_dao.get_all_unlocated_episodes()
@@ -150,22 +410,33 @@ class Episode_Binger():
             logger.debug(f"\t{e},")
         logger.debug("]")
         
-        # Select reference episode
-        reference_episode = self.episode_dao.get_random_fully_located_episodes(1)[0]
+        # Select reference episode (A loaded template doesn't need to decode any previous episode)
+        if self.episode_dao.template is not None:
+            reference_episode = self.episode_dao.template
+        else:
+            reference_episode = self.episode_dao.get_random_fully_located_episodes(1)[0]
         logger.debug(f"Reference episode: {reference_episode}")
+        self._apply_calibration(reference_episode)
+
+        # Threads share the reference: Its frames are decoded once and kept in memory for every task
+        if self.executor.shared_memory and isinstance(reference_episode, Episode):
+            thumbnail_resolution = getattr(self.algorithm_manager.frame_algorithm.frame_locator, "thumbnail_resolution", (36,64))
+            reference_episode = Episode_Template.from_episode(reference_episode, thumbnail_resolution)
 
         # Try to locate the openings and endings in the remaining episodes
-        with Pool(processes=len(unlocated_episodes)) as pool:
-            results = pool.map(Episode_Binger._locate_episode_pool, [(self.algorithm_manager,(e, reference_episode)) for e in unlocated_episodes])
+        # Workers get the algorithms and the reference once, every task only carries the record of its episode
+        results = self.executor.map(Episode_Binger._locate_episode_pool, [(self._derive_seed("locate", e.path), e.to_record(), budget) for e in unlocated_episodes],
+                                    initializer=Episode_Binger._init_worker_pool, initargs=(self.algorithm_manager, Episode_Binger._get_reference_payload(reference_episode)))
         
         found_openings=[]
         found_endings=[]
-        for r in results:
+        for e, r in zip(unlocated_episodes, results):
             op, en = r
+            # Results are records, link them to our episodes
             if op:
-                found_openings.append(op)
+                found_openings.append(Chunk(e, *op))
             if en:
-                found_endings.append(en)
+                found_endings.append(Chunk(e, *en))
 
 
         logger.debug(f"Found Openings: [")
@@ -184,12 +455,61 @@ class Episode_Binger():
         # Store found endings in their episodes
         self.episode_dao.add_endings(found_endings)
 
-    def create_macro_episode(self, macro_episode_path: str = "macro_episode.mp4"):
+    def _get_episode_sections(self, episode: Episode) -> list:
         """
-        Description: Creates a new video file beggining with an opening, having all the added episodes without their openings and endings and finally, one ending at the end.
+        Description: Splits an episode in consecutive sections based on its opening and ending
 
         Parameters:
-            - macro_episode_path: Path where the output file should be created
+            - episode: Episode to split
+
+        Return Value: List of tuples like (chunk, title) covering the whole episode. Titles are "Prologue", "Opening", "Episode", "Ending" and "Epilogue"
+        """
+        sections = []
+
+        # Check if episode has an opening
+        if episode.opening:
+            # Add section before the opening
+            sections.append((Chunk(episode, 0, episode.opening.start_frame-1), "Prologue"))
+            sections.append((episode.opening, "Opening"))
+
+            # Check if episode has an ending
+            if episode.ending:
+                # Add section between opening and ending
+                sections.append((Chunk(episode, episode.opening.end_frame+1, episode.ending.start_frame-1), "Episode"))
+                sections.append((episode.ending, "Ending"))
+
+                # Add section after the ending
+                sections.append((Chunk(episode, episode.ending.end_frame+1, episode.frame_count-1), "Epilogue"))
+
+            # If there's no ending
+            else:
+                # Add section from the end of the opening until end of episode
+                sections.append((Chunk(episode, episode.opening.end_frame+1, episode.frame_count-1), "Episode"))
+
+        # If there's no opening
+        else:
+            # Check if episode has an ending
+            if episode.ending:
+                # Add section before ending
+                sections.append((Chunk(episode, 0, episode.ending.start_frame-1), "Episode"))
+                sections.append((episode.ending, "Ending"))
+
+                # Add section after ending
+                sections.append((Chunk(episode, episode.ending.end_frame+1, episode.frame_count-1), "Epilogue"))
+
+            # If there's no ending either
+            else:
+                # Add the whole episode
+                sections.append((Chunk(episode, 0, episode.frame_count-1), "Episode"))
+
+        # Remove empty sections (Like the prologue of an episode starting with its opening)
+        return [(chunk, title) for chunk, title in sections if chunk.end_frame >= chunk.start_frame]
+
+    def _get_macro_episode_chunks(self) -> list:
+        """
+        Description: Gets the chunks of a macro-episode: One opening, every episode without their openings and endings and one ending
+
+        Return Value: List of Chunks in playing order
         """
         # Get a random opening and ending
         opening = self.episode_dao.get_random_opening()
@@ -203,60 +523,141 @@ class Episode_Binger():
 
         # Add every episode without opening or ending
         for episode in self.episode_dao.get_episode_list():
-            # Check if episode has an opening
-            if episode.opening:
-                # Add section before the opening
-                chunk_list.append(Chunk(episode, 0, episode.opening.start_frame-1))
+            for chunk, title in self._get_episode_sections(episode):
+                if title not in ("Opening", "Ending"):
+                    chunk_list.append(chunk)
 
-                # Check if episode has an ending
-                if episode.ending:
-                    # Add section between opening and ending
-                    chunk_list.append(Chunk(episode, episode.opening.end_frame+1, episode.ending.start_frame-1))
+        # Add ending
+        chunk_list.append(ending)
 
-                    # Add section after the ending
-                    chunk_list.append(Chunk(episode, episode.ending.end_frame+1, episode.frame_count-1))
+        return chunk_list
 
-                # If there's no ending
-                else:
-                    # Add section from the end of the opening until end of episode
-                    chunk_list.append(Chunk(episode, episode.opening.end_frame+1, episode.frame_count-1))
-            
-            # If there's no opening
-            else:
-                # Check if episode has an ending
-                if episode.ending:
-                    # Add section before ending
-                    chunk_list.append(Chunk(episode, 0, episode.ending.start_frame-1))
-
-                    # Add section after ending
-                    chunk_list.append(Chunk(episode, episode.ending.end_frame+1, episode.frame_count-1))
-                
-                # If there's no ending either
-                else:
-                    # Add the whole episode
-                    chunk_list.append(Chunk(episode, 0, episode.frame_count-1))
+    def create_macro_episode(self, macro_episode_path: str = "macro_episode.mp4"):
+        """
+        Description: Creates a new video file beggining with an opening, having all the added episodes without their openings and endings and finally, one ending at the end.
 
-        # Add ending
-        chunk_list.append(ending)
-        
+        Parameters:
+            - macro_episode_path: Path where the output file should be created
+        """
         # Assemble the video with the requested chunks
-        self.video_assembler.create_video(chunk_list, macro_episode_path)
+        self.video_assembler.create_video(self._get_macro_episode_chunks(), macro_episode_path)
+
+    def create_macro_playlist(self, playlist_path: str = "macro_episode.ffconcat"):
+        """
+        Description: Creates a playlist that plays the macro-episode from the original episode files without rendering a new video. Use the .m3u extension for an M3U playlist (VLC) or any other for an ffconcat one (ffplay, mpv or ffmpeg)
+
+        Parameters:
+            - playlist_path: Path where the playlist should be created
+        """
+        self.video_assembler.create_playlist(self._get_macro_episode_chunks(), playlist_path)
+
+    def create_macro_stream(self, playlist_path: str = "macro_episode.m3u8", segment_seconds: float = 6):
+        """
+        Description: Creates the macro-episode as an HLS stream. It can be played while it's being created: The opening and the first episode are available within seconds and the rest is appended as it's encoded. Segments are reused if the macro-episode is created again
+
+        Parameters:
+            - playlist_path: Path where the HLS playlist should be created. Segments are stored in a directory next to it
+            - segment_seconds: Target duration of every segment in seconds
+        """
+        self.video_assembler.create_stream(self._get_macro_episode_chunks(), playlist_path, segment_seconds=segment_seconds)
+
+    def create_skip_file(self, episode: Episode, output_dir: str = None, skip_opening: bool = True, skip_ending: bool = True):
+        """
+        Description: Creates an EDL file for an episode so players skip its opening and ending. The file is named like the episode with .edl extension
+
+        Parameters:
+            - episode: Episode to create the file for
+            - output_dir: Directory where the file should be created. If omited, next to the episode (Where players look for it)
+            - skip_opening: True to skip the opening of the episode
+            - skip_ending: True to skip the ending of the episode
+        """
+        skip_chunks = []
+        if episode.opening and skip_opening:
+            skip_chunks.append(episode.opening)
+        if episode.ending and skip_ending:
+            skip_chunks.append(episode.ending)
+
+        if not skip_chunks:
+            return
+
+        skip_file_path = os.path.splitext(episode.path)[0]+".edl"
+        if output_dir:
+            skip_file_path = os.path.join(output_dir, os.path.basename(skip_file_path))
+        self.video_assembler.create_skip_file(skip_chunks, skip_file_path)
+
+    def create_skip_files(self, output_dir: str = None, keep_first_opening: bool = True, keep_last_ending: bool = True):
+        """
+        Description: Creates an EDL file for every episode so players skip its opening and ending. Each file is named like its episode with .edl extension
+
+        Parameters:
+            - output_dir: Directory where the files should be created. If omited, next to every episode (Where players look for them)
+            - keep_first_opening: True to not skip the opening of the first episode
+            - keep_last_ending: True to not skip the ending of the last episode
+        """
+        episode_list = self.episode_dao.get_episode_list()
+        for i, episode in enumerate(episode_list):
+            self.create_skip_file(episode, output_dir, not (keep_first_opening and i == 0), not (keep_last_ending and i == len(episode_list)-1))
+
+    def detect_stream(self, source, skip_file_path: str = None, frame_size: tuple = None, fps: float = None):
+        """
+        Description: Detects the opening and ending in a recording that is still growing or in a stream of raw frames, as the frames are received. Needs the opening and ending located in some episode (Or a loaded template)
+
+        Parameters:
+            - source: Path of a video file or a binary file object with raw BGR frames (See Frame_Stream)
+            - skip_file_path: Path of an EDL file that is rewritten every time a chunk is found. If omited, no file is created
+            - frame_size: Size of the raw frames like (height, width). Required for pipes
+            - fps: Frames per second of the stream. Required for pipes
+
+        Return Value: Generator of the Stream_Event objects as they are detected
+        """
+        from episode_binger.Video import Frame_Stream
+        from episode_binger.Stream_Detector import Stream_Detector
+
+        # Select reference episode
+        if self.episode_dao.template is not None:
+            reference_episode = self.episode_dao.template
+        else:
+            reference_episode = self.episode_dao.get_random_fully_located_episodes(1)[0]
+        self._apply_calibration(reference_episode)
+
+        frame_locator = self.algorithm_manager.frame_algorithm.frame_locator
+        frame_stream = Frame_Stream(source, frame_size, fps)
+        detector = Stream_Detector(frame_locator.distance_algorithm, reference_episode, frame_stream.fps, name=frame_stream.path, thumbnail_resolution=getattr(frame_locator, "thumbnail_resolution", (36,64)))
+
+        for event in detector.process(frame_stream):
+            if event.kind == "end" and skip_file_path:
+                self.video_assembler.create_skip_file(detector.get_chunks(), skip_file_path)
+            yield event
+
+    def create_chapter_videos(self, output_dir: str):
+        """
+        Description: Creates a copy of every episode in Matroska format with chapters marking its opening, ending and the rest of sections. The streams are copied, not encoded
+
+        Parameters:
+            - output_dir: Directory where the files should be created (Named like the episodes with .mkv extension)
+        """
+        for episode in self.episode_dao.get_episode_list():
+            result_video_path = os.path.join(output_dir, os.path.splitext(os.path.basename(episode.path))[0]+".mkv")
+            self.video_assembler.create_chapters_video(self._get_episode_sections(episode), result_video_path)
 
-    def save_episodes_info(self, output_path: str = "episode_info.json"):
+    def save_episodes_info(self, output_path: str = "episode_info.json", include_template: bool = False):
         """
         Description: Saves all the found info about the added episodes like openings, endings and their location in every episode in one json file.
 
         Parameters:
             - output_path: Path where the json file should be created
+            - include_template: True to store also a reference template, so new episodes can be located later without the files of the previous ones
         """
-        self.episode_dao.save_episodes_info(output_path)
+        thumbnail_resolution = getattr(self.algorithm_manager.frame_algorithm.frame_locator, "thumbnail_resolution", (36,64))
+        self.episode_dao.save_episodes_info(output_path, include_template, thumbnail_resolution)
 
-    def load_episodes_info(self, input_path: str = "episode_info.json"):
+    def load_episodes_info(self, input_path: str = "episode_info.json", template_only: bool = False):
         """
         Description: Load all the info about a set of episodes like openings, endings and their location from a json file.
 
         Parameters:
             - input_path: Path where the json file is located
+            - template_only: True to load only the reference template (The file must have been saved with include_template). Previous episodes are not opened, new ones can be added and located against the template
         """
-        self.episode_dao.load_episodes_info(input_path)
+        self.episode_dao.load_episodes_info(input_path, template_only)
 
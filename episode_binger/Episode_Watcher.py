@@ -0,0 +1,263 @@
+from episode_binger.Episode_Binger import Episode_Binger
+from episode_binger.Dataclasses import Chunk
+from multiprocessing import Pool
+import cv2 as cv
+import time
+import sys
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Episode_Watcher():
+    """
+    Class that watches directories for new episodes and processes them as they arrive: Once a file is fully written it is added, its opening and ending are located against the stored reference in a background pool of processes and its outputs are updated. Episodes already known are never processed again
+    """
+    def __init__(self, episode_binger: Episode_Binger, directories: list, info_path: str = None, extensions: tuple = (".mp4", ".mkv", ".avi", ".mov", ".ts"), poll_interval: float = 10, stable_polls: int = 2, create_skip_files: bool = True, playlist_path: str = None):
+        """
+        Description: Creates an Episode_Watcher object
+
+        Parameters:
+            - episode_binger: Episode_Binger object with the previous episodes or their reference template loaded. If it has no reference yet, one is searched once two episodes arrive
+            - directories: List of directories to watch. Their subdirectories (Seasons) are watched too
+            - info_path: Path of the json file where the episodes info is saved every time an episode is located. If omited it's not saved
+            - extensions: File extensions of the episodes
+            - poll_interval: Seconds between scans of the directories
+            - stable_polls: Amount of consecutive scans a file must keep its size and modification time to be considered fully written
+            - create_skip_files: True to create the EDL file of every located episode (Next to it)
+            - playlist_path: Path of the macro-episode playlist updated every time an episode is located. If omited it's not created
+        """
+        self.episode_binger = episode_binger
+        self.directories = directories
+        self.info_path = info_path
+        self.extensions = tuple(extension.lower() for extension in extensions)
+        self.poll_interval = poll_interval
+        self.stable_polls = stable_polls
+        self.create_skip_files = create_skip_files
+        self.playlist_path = playlist_path
+
+        # Files being written: path -> (size, modification time, consecutive scans without changes)
+        self._growing_files = {}
+
+        # Episodes being located: path -> AsyncResult
+        self._pending = {}
+
+        # Episodes where the opening and ending couldn't be located (They are not retried)
+        self._failed_paths = set()
+
+        self._pool = None
+        self._running = False
+
+    def _scan(self) -> list:
+        """
+        Description: Scans the watched directories for episode files that are not known yet
+
+        Return Value: List of paths of the new files that are fully written, sorted
+        """
+        known_paths = self.episode_binger.episode_dao.all_paths
+        found_paths = set()
+        ready_paths = []
+
+        for directory in self.directories:
+            for root, dirs, files in os.walk(directory):
+                for file in files:
+                    path = os.path.join(root, file)
+                    if not file.lower().endswith(self.extensions) or path in known_paths:
+                        continue
+
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue    # Removed while scanning
+                    found_paths.add(path)
+
+                    # A file is fully written once it stops changing
+                    size, mtime, stable = self._growing_files.get(path, (None, None, 0))
+                    if (stat.st_size, stat.st_mtime) == (size, mtime) and stat.st_size > 0:
+                        stable += 1
+                    else:
+                        stable = 0
+                    self._growing_files[path] = (stat.st_size, stat.st_mtime, stable)
+
+                    if stable >= self.stable_polls and self._is_readable(path):
+                        ready_paths.append(path)
+
+        # Forget files that disappeared
+        for path in list(self._growing_files):
+            if path not in found_paths:
+                del self._growing_files[path]
+
+        return sorted(ready_paths)
+
+    def _is_readable(self, path: str) -> bool:
+        """
+        Description: Checks if a video file can be opened and has frames (A file whose writing stalled might not be complete yet)
+
+        Parameters:
+            - path: Path of the video file
+
+        Return Value: True if the file is readable
+        """
+        cap = cv.VideoCapture(path)
+        try:
+            return cap.isOpened() and cap.get(cv.CAP_PROP_FRAME_COUNT) > 0
+        finally:
+            cap.release()
+
+    def _get_reference(self):
+        """
+        Description: Gets the reference to locate new episodes against: The loaded template or a fully located episode. If there's none, the opening and ending are searched in the added episodes
+
+        Return Value: An Episode or Episode_Template object or None if there's no reference yet
+        """
+        episode_dao = self.episode_binger.episode_dao
+        if episode_dao.template is not None:
+            return episode_dao.template
+
+        if len(episode_dao.fully_located_paths) == 0:
+            # Wait for two episodes to compare
+            if len(episode_dao.all_paths) < 2 or not self.episode_binger.find_opening_ending():
+                return None
+            self._update_outputs(episode_dao.get_all_located_episodes())
+
+        return episode_dao.get_random_fully_located_episodes(1)[0]
+
+    def _submit(self):
+        """
+        Description: Sends the unlocated episodes that are not being located to the background pool
+        """
+        reference = self._get_reference()
+        if reference is None:
+            return
+
+        # Workers get the algorithms and the reference once, every task only carries the record of its episode
+        if self._pool is None:
+            self.episode_binger._apply_calibration(reference)
+            self._pool = Pool(processes=self.episode_binger.num_processes, initializer=Episode_Binger._init_worker_pool,
+                              initargs=(self.episode_binger.algorithm_manager, Episode_Binger._get_reference_payload(reference)))
+
+        for episode in self.episode_binger.episode_dao.get_all_unlocated_episodes():
+            if episode.path in self._pending or episode.path in self._failed_paths:
+                continue
+            logger.debug(f"Locating {episode.path}")
+            args = (self.episode_binger._derive_seed("locate", episode.path), episode.to_record(), None)
+            self._pending[episode.path] = self._pool.apply_async(Episode_Binger._locate_episode_pool, (args,))
+
+    def _collect(self) -> list:
+        """
+        Description: Stores the openings and endings of the episodes that finished being located
+
+        Return Value: List of the located Episodes
+        """
+        episode_dao = self.episode_binger.episode_dao
+        located_episodes = []
+
+        for path in list(self._pending):
+            result = self._pending[path]
+            if not result.ready():
+                continue
+            del self._pending[path]
+
+            try:
+                opening, ending = result.get()
+            except Exception:
+                logger.exception(f"Couldn't locate {path}")
+                self._failed_paths.add(path)
+                continue
+
+            if not opening and not ending:
+                logger.warning(f"Couldn't locate the opening or the ending of {path}")
+                self._failed_paths.add(path)
+                continue
+
+            # Results are records, link them to the episodes of this process
+            episode = episode_dao.episodes[path]
+            if opening:
+                episode_dao.add_openings([Chunk(episode, *opening)])
+            if ending:
+                episode_dao.add_endings([Chunk(episode, *ending)])
+            logger.info(f"Located {episode}")
+            located_episodes.append(episode)
+
+        return located_episodes
+
+    def _update_outputs(self, located_episodes: list):
+        """
+        Description: Updates the outputs with the newly located episodes. Only their own skip files are written
+
+        Parameters:
+            - located_episodes: List of Episodes located since the last update
+        """
+        if not located_episodes:
+            return
+
+        if self.create_skip_files:
+            for episode in located_episodes:
+                self.episode_binger.create_skip_file(episode)
+
+        if self.playlist_path and len(self.episode_binger.episode_dao.fully_located_paths) > 0:
+            self.episode_binger.create_macro_playlist(self.playlist_path)
+
+        if self.info_path:
+            # The template is kept in the file, the watcher is restarted loading only the template
+            episode_dao = self.episode_binger.episode_dao
+            include_template = episode_dao.template is not None or len(episode_dao.fully_located_paths) > 0
+            self.episode_binger.save_episodes_info(self.info_path, include_template=include_template)
+
+    def poll(self) -> list:
+        """
+        Description: Runs one iteration of the watcher: Adds the new fully written episodes, sends them to be located and stores the ones that finished
+
+        Return Value: List of the Episodes located in this iteration
+        """
+        for path in self._scan():
+            logger.info(f"New episode {path}")
+            del self._growing_files[path]
+            self.episode_binger.add_episode(path)
+
+        self._submit()
+
+        located_episodes = self._collect()
+        self._update_outputs(located_episodes)
+
+        return located_episodes
+
+    def run(self):
+        """
+        Description: Watches the directories until stop is called or the process is interrupted
+        """
+        self._running = True
+        try:
+            while self._running:
+                self.poll()
+                time.sleep(self.poll_interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def stop(self):
+        """
+        Description: Makes run return after the current iteration
+        """
+        self._running = False
+
+    def close(self):
+        """
+        Description: Stops the background pool. Episodes still being located are left unlocated
+        """
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+        self._pending.clear()
+
+if __name__ == "__main__":
+    # Daemon: python -m episode_binger.Episode_Watcher <info_path> <directory> [<directory> ...]
+    logging.basicConfig(level=logging.INFO)
+    info_path, directories = sys.argv[1], sys.argv[2:]
+
+    eb = Episode_Binger()
+    if os.path.exists(info_path):
+        eb.load_episodes_info(info_path)
+    Episode_Watcher(eb, directories, info_path=info_path).run()
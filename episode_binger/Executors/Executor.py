@@ -0,0 +1,23 @@
+from abc import ABC, abstractmethod
+
+class Executor(ABC):
+    """
+    Abstract Class that defines how Executors, which run independent tasks concurrently, should behave
+    """
+    # True if the tasks run in this process and share its objects (Nothing is sent to other processes)
+    shared_memory = False
+
+    @abstractmethod
+    def map(self, function, tasks: list, initializer = None, initargs: tuple = ()) -> list:
+        """
+        Description: Runs a function once for every task. Both the function and the tasks might be sent to other processes or hosts, so they must be picklable
+
+        Parameters:
+            - function: Function taking a task as its only argument
+            - tasks: List of arguments for the function
+            - initializer: Function run once in every worker before its first task, to send data shared by every task only once. If omited nothing is run
+            - initargs: Arguments for the initializer
+
+        Return Value: List with the result of every task in the same order as the tasks
+        """
+        pass
@@ -0,0 +1,89 @@
+from episode_binger.Executors import Executor
+from episode_binger.Memory_Governor import Memory_Governor
+from multiprocessing import Pool
+from queue import Queue
+
+class Process_Pool_Executor(Executor):
+    """
+    Class that holds an specific Executor that runs the tasks in a pool of processes of this machine
+    """
+    def __init__(self, max_processes: int = None, memory_governor: Memory_Governor = None):
+        """
+        Description: Creates a Process_Pool_Executor object
+
+        Parameters:
+            - max_processes: Max amount of processes to run at once. If omited, one process per task
+            - memory_governor: Memory_Governor object. Tasks are launched only while the measured memory of the running ones fits under its ceiling (The rest wait). If omited every process runs tasks all the time
+        """
+        self.max_processes = max_processes
+        self.memory_governor = memory_governor
+
+    def _run_measured_task(args):
+        function, task = args
+        return function(task), Memory_Governor.get_peak_rss()
+
+    def _init_process(memory_governor: Memory_Governor, processes: int, initializer, initargs: tuple):
+        # Every process of the pool takes its part of the ceiling (In its own copy of the governor)
+        memory_governor.set_workers(processes)
+        if initializer is not None:
+            initializer(*initargs)
+
+    def _map_governed(self, pool: Pool, processes: int, function, tasks: list) -> list:
+        """
+        Description: Runs the tasks in the pool keeping as many running as fit under the memory ceiling. The memory of every process is measured after its tasks
+
+        Parameters:
+            - pool: Pool of processes
+            - processes: Amount of processes of the pool
+            - function: Function taking a task as its only argument
+            - tasks: List of arguments for the function
+
+        Return Value: List with the result of every task in the same order as the tasks
+        """
+        results = [None]*len(tasks)
+        finished = Queue()
+        next_task = 0
+        running_tasks = 0
+
+        for _ in range(len(tasks)):
+            # Backpressure: Launch tasks only while they fit
+            while next_task < len(tasks) and running_tasks < self.memory_governor.get_concurrency(processes):
+                pool.apply_async(Process_Pool_Executor._run_measured_task, ((function, tasks[next_task]),),
+                                 callback=lambda result, i=next_task: finished.put((i, result, None)),
+                                 error_callback=lambda error, i=next_task: finished.put((i, None, error)))
+                next_task+=1
+                running_tasks+=1
+
+            i, result, error = finished.get()
+            if error is not None:
+                raise error
+            results[i], rss = result
+            self.memory_governor.add_task_memory(rss)
+            running_tasks-=1
+
+        return results
+
+    def map(self, function, tasks: list, initializer = None, initargs: tuple = ()) -> list:
+        """
+        Description: Runs a function once for every task in a pool of processes
+
+        Parameters:
+            - function: Function taking a task as its only argument
+            - tasks: List of arguments for the function
+            - initializer: Function run once in every process before its first task. If omited nothing is run
+            - initargs: Arguments for the initializer
+
+        Return Value: List with the result of every task in the same order as the tasks
+        """
+        if not tasks:
+            return []
+
+        processes = len(tasks) if self.max_processes is None else min(len(tasks), self.max_processes)
+        if self.memory_governor is None:
+            with Pool(processes=processes, initializer=initializer, initargs=initargs) as pool:
+                return pool.map(function, tasks)
+
+        # Processes that can't run at once aren't created. The ceiling is split between the ones created, the governor of this process is left as it was
+        processes = self.memory_governor.get_concurrency(processes)
+        with Pool(processes=processes, initializer=Process_Pool_Executor._init_process, initargs=(self.memory_governor, processes, initializer, initargs)) as pool:
+            return self._map_governed(pool, processes, function, tasks)
@@ -0,0 +1,40 @@
+from episode_binger.Executors import Executor
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+class Thread_Pool_Executor(Executor):
+    """
+    Class that holds an specific Executor that runs the tasks in a pool of threads of this process. Decoding, resizing and the NumPy comparisons release the GIL, so threads run them in parallel without forking or pickling anything, and every task shares the same memory
+    """
+    # Tasks share the objects of this process
+    shared_memory = True
+
+    def __init__(self, max_threads: int = None):
+        """
+        Description: Creates a Thread_Pool_Executor object
+
+        Parameters:
+            - max_threads: Max amount of threads to run at once. If omited, one per CPU core
+        """
+        self.max_threads = max_threads if max_threads else os.cpu_count()
+
+    def map(self, function, tasks: list, initializer = None, initargs: tuple = ()) -> list:
+        """
+        Description: Runs a function once for every task in a pool of threads
+
+        Parameters:
+            - function: Function taking a task as its only argument
+            - tasks: List of arguments for the function
+            - initializer: Function run once before the first task (Its data is shared by every thread). If omited nothing is run
+            - initargs: Arguments for the initializer
+
+        Return Value: List with the result of every task in the same order as the tasks
+        """
+        if not tasks:
+            return []
+
+        if initializer is not None:
+            initializer(*initargs)
+
+        with ThreadPoolExecutor(max_workers=min(len(tasks), self.max_threads)) as pool:
+            return list(pool.map(function, tasks))
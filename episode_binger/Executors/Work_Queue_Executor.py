@@ -0,0 +1,193 @@
+from episode_binger.Executors import Executor
+from multiprocessing import Process
+import socket
+import sqlite3
+import pickle
+import time
+import uuid
+import sys
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Work_Queue_Executor(Executor):
+    """
+    Class that holds an specific Executor that puts the tasks in a work queue stored in a SQLite file. Worker processes from this machine or from any host that can access the file claim tasks and write their results back
+    """
+    def __init__(self, queue_path: str = "work_queue.db", num_local_workers: int = None, claim_timeout: float = 3600, poll_interval: float = 1):
+        """
+        Description: Creates a Work_Queue_Executor object
+
+        Parameters:
+            - queue_path: Path of the SQLite file holding the queue. To share work between hosts it must be in a shared file system
+            - num_local_workers: Amount of worker processes to launch in this machine for every map call. 0 to rely only on workers from other hosts. If omited, one per CPU core
+            - claim_timeout: Seconds after which a claimed task that didn't finish is considered abandoned (Its worker died) and can be claimed again
+            - poll_interval: Seconds to wait between checks for new tasks or finished ones
+        """
+        self.queue_path = queue_path
+        self.num_local_workers = os.cpu_count() if num_local_workers is None else num_local_workers
+        self.claim_timeout = claim_timeout
+        self.poll_interval = poll_interval
+
+        # Create queue table
+        connection = self._connect()
+        try:
+            connection.execute("CREATE TABLE IF NOT EXISTS tasks (id INTEGER PRIMARY KEY AUTOINCREMENT, batch TEXT, position INTEGER, payload BLOB, status TEXT, worker TEXT, claimed_at REAL, result BLOB, error TEXT)")
+            connection.execute("CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status)")
+            connection.execute("CREATE TABLE IF NOT EXISTS batches (batch TEXT PRIMARY KEY, initializer BLOB)")
+        finally:
+            connection.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Description: Opens a connection to the queue. Transactions are handled explicitly
+
+        Return Value: A sqlite3.Connection object
+        """
+        return sqlite3.connect(self.queue_path, timeout=60, isolation_level=None)
+
+    def _claim_task(self, connection: sqlite3.Connection, worker: str) -> tuple:
+        """
+        Description: Takes the oldest pending or abandoned task of the queue and marks it as claimed by the worker
+
+        Parameters:
+            - connection: Connection to the queue
+            - worker: Name of the worker claiming the task
+
+        Return Value: A tuple like (task_id, batch, payload) or None if there are no tasks to claim
+        """
+        connection.execute("BEGIN IMMEDIATE")   # Lock the queue so no other worker claims the same task
+        try:
+            row = connection.execute("SELECT id, batch, payload FROM tasks WHERE status = 'pending' OR (status = 'claimed' AND claimed_at < ?) ORDER BY id LIMIT 1", (time.time()-self.claim_timeout,)).fetchone()
+            if row:
+                connection.execute("UPDATE tasks SET status = 'claimed', worker = ?, claimed_at = ? WHERE id = ?", (worker, time.time(), row[0]))
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return row
+
+    def run_worker(self, stop_when_empty: bool = False):
+        """
+        Description: Claims and runs tasks from the queue, writing their results back. Run it in every host that should take part in the work
+
+        Parameters:
+            - stop_when_empty: True to stop when there are no tasks left. False to keep waiting for new ones
+        """
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        initialized_batch = None    # Batch whose initializer ran last in this worker
+        connection = self._connect()
+        try:
+            while True:
+                task = self._claim_task(connection, worker)
+                if task is None:
+                    if stop_when_empty:
+                        return
+                    time.sleep(self.poll_interval)
+                    continue
+
+                task_id, batch, payload = task
+                logger.debug(f"Worker {worker} running task {task_id}")
+                try:
+                    # Run the initializer of the batch before its first task in this worker
+                    if batch != initialized_batch:
+                        row = connection.execute("SELECT initializer FROM batches WHERE batch = ?", (batch,)).fetchone()
+                        if row:
+                            initializer, initargs = pickle.loads(row[0])
+                            initializer(*initargs)
+                        initialized_batch = batch
+
+                    function, args = pickle.loads(payload)
+                    result = pickle.dumps(function(args))
+                    connection.execute("UPDATE tasks SET status = 'done', result = ? WHERE id = ? AND status = 'claimed'", (result, task_id))
+                except Exception as e:
+                    logger.debug(f"Task {task_id} failed in worker {worker}: {e!r}")
+                    connection.execute("UPDATE tasks SET status = 'failed', error = ? WHERE id = ? AND status = 'claimed'", (repr(e), task_id))
+        finally:
+            connection.close()
+
+    def _replace_dead_workers(self, connection: sqlite3.Connection, batch: str, workers: list, stopped_workers: list):
+        """
+        Description: Gives the tasks claimed by local workers that died (Killed, crashed) back to the queue and launches new workers while there are tasks left to claim. Other workers stop once nothing is pending, so nobody else would take those tasks until claim_timeout
+
+        Parameters:
+            - connection: Connection to the queue
+            - batch: Batch of the map call
+            - workers: List of running local workers. Stopped ones are moved to stopped_workers and replaced if needed
+            - stopped_workers: List of local workers that stopped
+        """
+        hostname = socket.gethostname()
+        for worker in [w for w in workers if not w.is_alive()]:
+            workers.remove(worker)
+            stopped_workers.append(worker)
+            requeued = connection.execute("UPDATE tasks SET status = 'pending', worker = NULL, claimed_at = NULL WHERE batch = ? AND status = 'claimed' AND worker = ?", (batch, f"{hostname}:{worker.pid}")).rowcount
+            if requeued:
+                logger.warning(f"Local worker {worker.pid} died (Exit code {worker.exitcode}), {requeued} tasks queued again")
+
+        pending = connection.execute("SELECT COUNT(*) FROM tasks WHERE batch = ? AND status = 'pending'", (batch,)).fetchone()[0]
+        for _ in range(min(self.num_local_workers, pending)-len(workers)):
+            worker = Process(target=self.run_worker, args=(True,))
+            worker.start()
+            workers.append(worker)
+
+    def map(self, function, tasks: list, initializer = None, initargs: tuple = ()) -> list:
+        """
+        Description: Puts a task in the queue for every element of tasks, launches the local workers and waits until every task is finished (By any worker)
+
+        Parameters:
+            - function: Function taking a task as its only argument
+            - tasks: List of arguments for the function
+            - initializer: Function run once in every worker before its first task of this call. It's stored once in the queue instead of with every task. If omited nothing is run
+            - initargs: Arguments for the initializer
+
+        Return Value: List with the result of every task in the same order as the tasks
+        """
+        if not tasks:
+            return []
+
+        batch = uuid.uuid4().hex
+        connection = self._connect()
+        try:
+            connection.execute("BEGIN")
+            if initializer is not None:
+                connection.execute("INSERT INTO batches (batch, initializer) VALUES (?, ?)", (batch, pickle.dumps((initializer, initargs))))
+            connection.executemany("INSERT INTO tasks (batch, position, payload, status) VALUES (?, ?, ?, 'pending')",
+                                   [(batch, i, pickle.dumps((function, task))) for i, task in enumerate(tasks)])
+            connection.execute("COMMIT")
+        finally:
+            connection.close()
+
+        # Launch local workers
+        workers = [Process(target=self.run_worker, args=(True,)) for _ in range(min(self.num_local_workers, len(tasks)))]
+        for worker in workers:
+            worker.start()
+
+        # Wait for every task to finish
+        stopped_workers = []
+        connection = self._connect()
+        try:
+            while connection.execute("SELECT COUNT(*) FROM tasks WHERE batch = ? AND status NOT IN ('done', 'failed')", (batch,)).fetchone()[0] > 0:
+                self._replace_dead_workers(connection, batch, workers, stopped_workers)
+                time.sleep(self.poll_interval)
+
+            rows = connection.execute("SELECT status, worker, result, error FROM tasks WHERE batch = ? ORDER BY position", (batch,)).fetchall()
+            connection.execute("DELETE FROM tasks WHERE batch = ?", (batch,))
+            connection.execute("DELETE FROM batches WHERE batch = ?", (batch,))
+        finally:
+            connection.close()
+            for worker in workers+stopped_workers:
+                worker.join()
+
+        results = []
+        for status, worker, result, error in rows:
+            if status == "failed":
+                raise Exception(f"Task failed in worker {worker}: {error}")
+            results.append(pickle.loads(result))
+
+        return results
+
+if __name__ == "__main__":
+    # Worker for other hosts: python -m episode_binger.Executors.Work_Queue_Executor <queue_path>
+    logging.basicConfig(level=logging.DEBUG)
+    Work_Queue_Executor(sys.argv[1] if len(sys.argv) > 1 else "work_queue.db").run_worker()
@@ -0,0 +1,18 @@
+from enum import Enum
+from episode_binger.Lazy_Module import make_lazy
+
+class Executor_Type(Enum):
+    """
+    Enumeration Class with the types of Executors in the project
+    """
+    PROCESS_POOL = 0
+    WORK_QUEUE = 1
+    THREAD_POOL = 2
+
+# Classes are imported the first time they are requested
+make_lazy(__name__, {
+    "Executor": "episode_binger.Executors.Executor",
+    "Process_Pool_Executor": "episode_binger.Executors.Process_Pool_Executor",
+    "Work_Queue_Executor": "episode_binger.Executors.Work_Queue_Executor",
+    "Thread_Pool_Executor": "episode_binger.Executors.Thread_Pool_Executor",
+})
\ No newline at end of file
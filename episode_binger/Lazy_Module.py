@@ -0,0 +1,46 @@
+from types import ModuleType
+import importlib
+import sys
+
+class Lazy_Module(ModuleType):
+    """
+    Module type for packages that import their classes the first time they are requested, like a module __getattr__ (PEP 562). Importing a package only costs the modules that are actually used
+    """
+    def __getattr__(self, name: str):
+        """
+        Description: Imports the module of a class of the package. Only called when the attribute isn't loaded yet
+
+        Parameters:
+            - name: Name of the requested attribute
+
+        Return Value: The requested class
+        """
+        lazy_classes = self.__dict__.get("_lazy_classes", {})
+        if name not in lazy_classes:
+            raise AttributeError(f"module {self.__name__!r} has no attribute {name!r}")
+
+        value = getattr(importlib.import_module(lazy_classes[name]), name)
+        self.__dict__[name] = value
+        return value
+
+    def __setattr__(self, name: str, value):
+        # The import system sets every imported module as attribute of its package, keep the class named like it instead (Like an eager "from module import Class" would)
+        lazy_classes = self.__dict__.get("_lazy_classes", {})
+        if isinstance(value, ModuleType) and lazy_classes.get(name) == value.__name__ and hasattr(value, name):
+            value = getattr(value, name)
+        super().__setattr__(name, value)
+
+    def __dir__(self) -> list:
+        return sorted(set(self.__dict__) | set(self.__dict__.get("_lazy_classes", {})))
+
+def make_lazy(module_name: str, lazy_classes: dict):
+    """
+    Description: Turns an imported package into a Lazy_Module
+
+    Parameters:
+        - module_name: Name of the package (__name__ from its __init__)
+        - lazy_classes: Dictionary relating the class names with the modules they are defined in
+    """
+    module = sys.modules[module_name]
+    module.__dict__["_lazy_classes"] = lazy_classes
+    module.__class__ = Lazy_Module
@@ -0,0 +1,177 @@
+import gc
+import os
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Memory_Governor():
+    """
+    Class that keeps the memory of the searches under a ceiling of resident memory (RSS). Loading windows and comparison tiles are sized from the memory left, tasks wait while the memory is over the ceiling instead of being killed, and executors run only as many tasks at once as fit in it (Measuring what every task takes).
+    The ceiling is shared by every worker: Processes get an equal part of it each, threads share the part of their process
+    """
+    def __init__(self, max_rss: int = None, task_memory_estimate: int = 256*1024**2, max_wait_seconds: float = 60, poll_interval: float = 0.5):
+        """
+        Description: Creates a Memory_Governor object
+
+        Parameters:
+            - max_rss: Ceiling in bytes of the resident memory of every worker together. If omited, 80% of the memory available when it's created (Plus the one this process already takes)
+            - task_memory_estimate: Memory a task is assumed to take until one has been measured (Interpreter, libraries, decoders and loaded frames)
+            - max_wait_seconds: Max seconds a task waits for memory to be freed. Then it goes on with the smallest windows
+            - poll_interval: Seconds between checks of the memory while waiting
+        """
+        if max_rss is None:
+            available_memory = Memory_Governor.get_available_memory()
+            max_rss = int(0.8*(available_memory+(Memory_Governor.get_rss() or 0))) if available_memory is not None else None
+        self.max_rss = max_rss
+        self.task_memory_estimate = task_memory_estimate
+        self.max_wait_seconds = max_wait_seconds
+        self.poll_interval = poll_interval
+
+        # How the ceiling is shared (See set_workers)
+        self.num_processes = 1
+        self.tasks_per_process = 1
+
+        # Largest resident memory reported by a worker after a task
+        self.task_memory = None
+
+    @staticmethod
+    def get_rss() -> int:
+        """
+        Description: Reads the resident memory of this process
+
+        Return Value: Resident memory in bytes. None if it's unknown
+        """
+        try:
+            with open("/proc/self/statm") as statm:
+                return int(statm.read().split()[1])*os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            return None
+
+    @staticmethod
+    def get_peak_rss() -> int:
+        """
+        Description: Reads the largest resident memory this process has taken
+
+        Return Value: Resident memory in bytes. None if it's unknown
+        """
+        try:
+            with open("/proc/self/status") as status:
+                return next(int(line.split()[1])*1024 for line in status if line.startswith("VmHWM:"))
+        except (OSError, StopIteration, ValueError):
+            return None
+
+    @staticmethod
+    def get_available_memory() -> int:
+        """
+        Description: Reads the memory available in this machine
+
+        Return Value: Available memory in bytes. None if it's unknown
+        """
+        try:
+            with open("/proc/meminfo") as meminfo:
+                return next(int(line.split()[1])*1024 for line in meminfo if line.startswith("MemAvailable:"))
+        except (OSError, StopIteration, ValueError):
+            return None
+
+    def set_workers(self, num_workers: int, shared_memory: bool = False):
+        """
+        Description: Sets how many workers share the ceiling
+
+        Parameters:
+            - num_workers: Amount of tasks that can run at once
+            - shared_memory: True if the tasks are threads of one process, False if every task runs in its own process
+        """
+        self.num_processes = 1 if shared_memory else max(1, num_workers)
+        self.tasks_per_process = max(1, num_workers) if shared_memory else 1
+
+    def get_budget(self) -> int:
+        """
+        Description: Gets the memory a task of this process can still take without going over its part of the ceiling
+
+        Return Value: Memory in bytes (0 if it's already over). None if there's no ceiling or the memory is unknown
+        """
+        rss = Memory_Governor.get_rss()
+        if self.max_rss is None or rss is None:
+            return None
+        return max(0, (self.max_rss//self.num_processes - rss)//self.tasks_per_process)
+
+    def get_window(self, requested_frames: int, frame_bytes: int, copies: int = 1, min_frames: int = 1) -> int:
+        """
+        Description: Gets how many frames can be loaded at once
+
+        Parameters:
+            - requested_frames: Amount of frames the algorithm would load
+            - frame_bytes: Memory a loaded frame takes
+            - copies: Amount of windows held at once (In use, prefetched, ...)
+            - min_frames: Smallest window the algorithm can work with
+
+        Return Value: Amount of frames between min_frames and requested_frames
+        """
+        budget = self.get_budget()
+        if budget is None:
+            return requested_frames
+
+        frames = max(min_frames, min(requested_frames, budget//max(1, frame_bytes*copies)))
+        if frames < requested_frames:
+            logger.debug(f"Window reduced from {requested_frames} to {frames} frames ({budget//1024**2} MiB left)")
+        return frames
+
+    def get_tile(self, num_rows: int, row_bytes: int) -> int:
+        """
+        Description: Gets how many rows of a temporary array can be computed at once
+
+        Parameters:
+            - num_rows: Amount of rows of the whole array
+            - row_bytes: Memory a row takes
+
+        Return Value: Amount of rows between 1 and num_rows
+        """
+        return self.get_window(num_rows, row_bytes)
+
+    def wait_for_memory(self):
+        """
+        Description: Backpressure. Waits while this process is over its part of the ceiling (Other tasks of the process might free their memory). Gives up after max_wait_seconds.
+        A task alone in its process doesn't wait: Nothing else would free memory, executors keep those tasks under the ceiling by running fewer at once
+        """
+        if self.get_budget() != 0:
+            return
+
+        gc.collect()
+        if self.tasks_per_process == 1:
+            return
+
+        start_time = time.time()
+        while self.get_budget() == 0:
+            if time.time()-start_time > self.max_wait_seconds:
+                logger.warning(f"Memory still over the ceiling after {self.max_wait_seconds} seconds, going on with the smallest windows")
+                return
+            time.sleep(self.poll_interval)
+
+    def add_task_memory(self, rss: int):
+        """
+        Description: Registers the resident memory of a worker after running a task
+
+        Parameters:
+            - rss: Resident memory in bytes (The peak of the worker). Ignored if None
+        """
+        if rss is not None:
+            self.task_memory = max(self.task_memory or 0, rss)
+
+    def get_concurrency(self, max_workers: int) -> int:
+        """
+        Description: Gets how many tasks in their own processes can run at once without going over the ceiling
+
+        Parameters:
+            - max_workers: Amount of tasks that would run at once
+
+        Return Value: Amount of tasks between 1 and max_workers
+        """
+        if self.max_rss is None:
+            return max_workers
+
+        task_memory = self.task_memory if self.task_memory is not None else self.task_memory_estimate
+        concurrency = max(1, min(max_workers, self.max_rss//max(1, task_memory)))
+        if concurrency < max_workers:
+            logger.debug(f"Running {concurrency} tasks at once instead of {max_workers} ({task_memory//1024**2} MiB per task)")
+        return concurrency
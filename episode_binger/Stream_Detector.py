@@ -0,0 +1,163 @@
+from episode_binger.Algorithms.Distance import Distance_Algorithm
+from episode_binger.Dataclasses import Chunk
+from episode_binger.Dataclasses import Episode_Template
+from episode_binger.Dataclasses import Stream_Buffer
+from episode_binger.Dataclasses import Stream_Event
+import numpy as np
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Stream_Detector():
+    """
+    Class that detects the opening and ending of a reference in a stream, one frame at a time as it's received. Only the frames to locate of the reference and the last frames of the stream are kept in memory.
+    Every chunk is searched by the frames at its start. Once they are found the start is reported and the frames at its end are searched. A later start event of the same chunk replaces the previous one
+    """
+    def __init__(self, distance_algorithm: Distance_Algorithm, reference, fps: float, name: str = "stream", thumbnail_resolution: tuple = (36,64), num_probe_frames: int = 5, max_identical_frames_diff: float = 0.03):
+        """
+        Description: Creates a Stream_Detector object
+
+        Parameters:
+            - distance_algorithm: An instance of the Distance_Algorithm object to compare the stream frames with the reference ones
+            - reference: Episode or Episode_Template with its opening and ending located. Episodes are turned into templates so their frames are decoded only once
+            - fps: Frames per second of the stream
+            - name: Name of the stream
+            - thumbnail_resolution: Performance Parameter. It's the size to resize frames after receiving them
+            - num_probe_frames: Amount of frames at the start and end of every chunk that are searched
+            - max_identical_frames_diff: Max difference percentage (between 0 and 1) between frames to consider them identical
+        """
+        if not isinstance(reference, Episode_Template):
+            reference = Episode_Template.from_episode(reference, thumbnail_resolution, num_probe_frames)
+
+        self.distance_algorithm = distance_algorithm
+        self.reference = reference
+        self.thumbnail_resolution = thumbnail_resolution
+        self.num_probe_frames = num_probe_frames
+        self.max_identical_frames_diff = max_identical_frames_diff
+
+        # Last frames of the stream (Enough for one probe). Named uniquely so cached frame data of other streams is never used
+        self.name = name
+        self.buffer = Stream_Buffer(f"{name}#{uuid.uuid4().hex[:8]}", fps, thumbnail_resolution, num_probe_frames)
+
+        # Search state of every chunk
+        self._searches = {
+            "opening": {"chunk": reference.opening, "phase": "start", "start": None, "start_diff": None, "candidates": [], "confirm_until": None},
+            "ending": {"chunk": reference.ending, "phase": "start", "start": None, "start_diff": None, "candidates": [], "confirm_until": None}
+        }
+
+        # Found chunks like (chunk_type, start_frame, end_frame)
+        self.chunks = []
+
+    def _match(self, probe: list, window: list) -> tuple:
+        """
+        Description: Compares frames of the reference with the same amount of consecutive stream frames
+
+        Parameters:
+            - probe: Frame indexes of the reference
+            - window: Frame indexes of the stream
+
+        Return Value: A tuple like (diagonal_diff, min_frame_diff): The mean difference of the frames and the smallest difference of one of them
+        """
+        distance_matrix = self.distance_algorithm.calculate_distance(self.reference, self.buffer, probe, window, self.thumbnail_resolution, True, False)
+        diagonal = distance_matrix[np.arange(len(probe)), np.arange(len(probe))]
+        return diagonal.mean(), diagonal.min()
+
+    def _step(self, chunk_type: str, frame_index: int, window: list) -> Stream_Event:
+        """
+        Description: Advances the search of a chunk with a new frame. The first match isn't reported right away: The best match of the following frames is taken (Static scenes match several consecutive frames)
+
+        Parameters:
+            - chunk_type: "opening" or "ending"
+            - frame_index: Index of the new frame
+            - window: Frame indexes of the last frames of the stream
+
+        Return Value: A Stream_Event object or None if there's nothing to report
+        """
+        search = self._searches[chunk_type]
+        chunk = search["chunk"]
+        m = self.num_probe_frames
+        fps = self.buffer.fps
+
+        start_probe = [chunk.start_frame+i for i in range(m)]
+        end_probe = [chunk.end_frame-m+1+i for i in range(m)]
+
+        # Single similar frames can match before the real start: A better match of the start frames replaces it
+        if search["phase"] == "end" and search["confirm_until"] is None:
+            diagonal_diff, min_frame_diff = self._match(start_probe, window)
+            if diagonal_diff <= self.max_identical_frames_diff and diagonal_diff < search["start_diff"]:
+                search["start"] = frame_index-m+1
+                search["start_diff"] = diagonal_diff
+                return Stream_Event("start", chunk_type, search["start"], search["start"]/fps, 1-min_frame_diff)
+
+        diagonal_diff, min_frame_diff = self._match(start_probe if search["phase"] == "start" else end_probe, window)
+        if diagonal_diff <= self.max_identical_frames_diff or min_frame_diff < 0.01:
+            search["candidates"].append((diagonal_diff, frame_index, min_frame_diff))
+            if search["confirm_until"] is None:
+                search["confirm_until"] = frame_index + m
+
+        # Report the best match once the following frames are checked
+        if search["confirm_until"] is not None and frame_index >= search["confirm_until"]:
+            diagonal_diff, best_index, min_frame_diff = min(search["candidates"])
+            search["candidates"] = []
+            search["confirm_until"] = None
+
+            if search["phase"] == "start":
+                search["phase"] = "end"
+                search["start"] = best_index-m+1
+                search["start_diff"] = diagonal_diff
+                return Stream_Event("start", chunk_type, search["start"], search["start"]/fps, 1-min_frame_diff)
+
+            search["phase"] = "start"
+            self.chunks.append((chunk_type, search["start"], best_index))
+            return Stream_Event("end", chunk_type, best_index, best_index/fps, 1-min_frame_diff)
+
+        # The end should have been found by now (The reference might have another frame rate)
+        if search["phase"] == "end" and search["confirm_until"] is None and frame_index - search["start"] > 2*(chunk.end_frame-chunk.start_frame)*fps/self.reference.fps:
+            search["phase"] = "start"
+            return Stream_Event("cancel", chunk_type, frame_index, frame_index/fps, 0.0)
+
+        return None
+
+    def push_frame(self, frame: np.ndarray) -> list:
+        """
+        Description: Processes the next frame of the stream
+
+        Parameters:
+            - frame: The frame as read by OpenCV (BGR)
+
+        Return Value: List of Stream_Event objects detected with this frame
+        """
+        frame_index = self.buffer.add_frame(frame)
+        if frame_index+1 < self.num_probe_frames:
+            return []
+
+        window = list(range(frame_index-self.num_probe_frames+1, frame_index+1))
+        events = []
+        for chunk_type in self._searches:
+            event = self._step(chunk_type, frame_index, window)
+            if event:
+                logger.debug(f"{self.name}: {event}")
+                events.append(event)
+
+        return events
+
+    def process(self, frames):
+        """
+        Description: Processes every frame of a stream as it's received
+
+        Parameters:
+            - frames: Iterable of frames, like a Frame_Stream object
+
+        Return Value: Generator of the Stream_Event objects as they are detected
+        """
+        for frame in frames:
+            yield from self.push_frame(frame)
+
+    def get_chunks(self) -> list:
+        """
+        Description: Gets the chunks found so far in the stream
+
+        Return Value: List of Chunk objects (Their episode is the stream buffer)
+        """
+        return [Chunk(self.buffer, start_frame, end_frame) for _, start_frame, end_frame in self.chunks]
@@ -0,0 +1,188 @@
+from episode_binger.Video import Frame_Source_Type
+from episode_binger.Video.Frame_Source import Frame_Source
+from threading import Condition
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Pooled_Capture():
+    """
+    Class that wraps an open frame source of a Capture_Pool and keeps track of the frame it will read next
+    """
+    def __init__(self, pool, cap):
+        """
+        Description: Creates a Pooled_Capture object
+
+        Parameters:
+            - pool: Capture_Pool object the handle belongs to
+            - cap: Open Frame_Source object
+        """
+        self.pool = pool
+        self.cap = cap
+        self.position = 0
+        self.generation = pool._generation
+
+    def seek(self, frame_index: int):
+        """
+        Description: Moves the capture to the given frame. Nothing is done if the capture is already there and close frames ahead are reached by skipping instead of seeking
+
+        Parameters:
+            - frame_index: Index of the next frame to read
+        """
+        # Unknown position (After reading keyframes alone)
+        gap = frame_index - self.position if self.position is not None else -1
+        if gap == 0:
+            self.pool._count("sequential_reads")
+            return
+
+        # Skipping a few frames is cheaper than seeking (Seeking decodes from the previous keyframe)
+        if 0 < gap <= self.pool.max_skip_frames:
+            for _ in range(gap):
+                self.cap.grab()
+            self.pool._count("skips")
+        else:
+            self.cap.seek(frame_index)
+            self.pool._count("seeks")
+        self.position = frame_index
+
+    def read(self) -> tuple:
+        """
+        Description: Reads the next frame of the capture
+
+        Return Value: A tuple like the one returned by cv.VideoCapture.read: (ret, frame)
+        """
+        ret, frame = self.cap.read()
+        self.position += 1
+        return ret, frame
+
+    def read_keyframes(self, indexes: list) -> list:
+        """
+        Description: Reads the given keyframes without decoding the frames between them
+
+        Parameters:
+            - indexes: Sorted list of keyframe indexes
+
+        Return Value: List with the frame of every index. Keyframes that couldn't be read are None
+        """
+        frames = self.cap.read_keyframes(indexes)
+        self.position = None
+        self.pool._count("keyframe_reads")
+        return frames
+
+class Capture_Pool():
+    """
+    Class that holds a bounded amount of open capture handles of a video file so they can be reused between reads from different threads
+    """
+    def __init__(self, path: str, max_captures: int = 4, max_skip_frames: int = 30, frame_source_type: Frame_Source_Type = Frame_Source_Type.OPENCV):
+        """
+        Description: Creates a Capture_Pool object
+
+        Parameters:
+            - path: Valid path of the video file
+            - max_captures: Max amount of capture handles open at once. Threads asking for more wait until one is released
+            - max_skip_frames: Max amount of frames to skip reading forward before seeking instead
+            - frame_source_type: A Frame_Source_Type object to specify which backend decodes the file
+        """
+        self.path = path
+        self.frame_source_type = frame_source_type
+        self.max_captures = max_captures
+        self.max_skip_frames = max_skip_frames
+        self._reset()
+
+    def _reset(self):
+        """
+        Description: Forgets every open capture handle and statistic. Used on creation and after a fork, since handles inherited from the parent process can't be shared
+        """
+        self._pid = os.getpid()
+        self._generation = getattr(self, "_generation", -1) + 1
+        self._condition = Condition()
+        self._free_captures = []
+        self._num_open_captures = 0
+        self._stats = {"opened": 0, "reused": 0, "sequential_reads": 0, "skips": 0, "seeks": 0, "keyframe_reads": 0}
+
+    def _check_process(self):
+        """
+        Description: Recreates the pool state if it's being used in a different process than the one that created it
+        """
+        if self._pid != os.getpid():
+            logger.debug(f"Capture pool of {self.path} used in a new process. Reopening captures")
+            self._reset()
+
+    def _count(self, stat: str):
+        with self._condition:
+            self._stats[stat] += 1
+
+    def acquire(self, frame_index: int = None) -> Pooled_Capture:
+        """
+        Description: Takes a capture handle from the pool. Handles already positioned in the requested frame are preferred. A new handle is opened if none is free and the pool isn't full, otherwise it waits for one to be released
+
+        Parameters:
+            - frame_index: Index of the next frame that is going to be read. If omited any free capture is taken
+
+        Return Value: A Pooled_Capture object. It must be given back with release
+        """
+        self._check_process()
+        with self._condition:
+            while not self._free_captures and self._num_open_captures >= self.max_captures:
+                self._condition.wait()
+
+            if self._free_captures:
+                self._stats["reused"] += 1
+
+                # Take the capture closest behind the requested frame (Read forward instead of seeking)
+                best = len(self._free_captures)-1
+                if frame_index is not None:
+                    for i, capture in enumerate(self._free_captures):
+                        if capture.position is None:
+                            continue
+                        gap = frame_index - capture.position
+                        best_position = self._free_captures[best].position
+                        best_gap = frame_index - best_position if best_position is not None else -1
+                        if 0 <= gap and (best_gap < 0 or gap < best_gap):
+                            best = i
+                return self._free_captures.pop(best)
+
+            self._num_open_captures += 1
+            self._stats["opened"] += 1
+
+        return Pooled_Capture(self, Frame_Source.create(self.path, self.frame_source_type))
+
+    def release(self, capture: Pooled_Capture):
+        """
+        Description: Gives back a capture handle to the pool
+
+        Parameters:
+            - capture: The Pooled_Capture object taken with acquire
+        """
+        # Captures from the parent process are not taken back
+        self._check_process()
+        if capture.pool is not self or capture.generation != self._generation:
+            return
+
+        with self._condition:
+            self._free_captures.append(capture)
+            self._condition.notify()
+
+    def get_stats(self) -> dict:
+        """
+        Description: Gets the usage statistics of the pool
+
+        Return Value: Dictionary with the amount of opened and reused captures and how many reads continued sequentially, skipped frames, seeked or read keyframes alone
+        """
+        with self._condition:
+            return dict(self._stats)
+
+    def close(self):
+        """
+        Description: Releases every free capture handle of the pool
+        """
+        if self._pid != os.getpid():
+            return
+
+        with self._condition:
+            logger.debug(f"Capture pool of {self.path} stats: {self._stats}")
+            for capture in self._free_captures:
+                capture.cap.release()
+            self._num_open_captures -= len(self._free_captures)
+            self._free_captures.clear()
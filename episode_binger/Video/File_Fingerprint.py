@@ -0,0 +1,36 @@
+import hashlib
+import os
+
+class File_Fingerprint():
+    """
+    Class that identifies video files by their content instead of their path. The fingerprint hashes the size of the file and a few blocks sampled along it, so it's computed reading a small part of the file. Moved, renamed or copied files keep their fingerprint
+    """
+    # Amount of sampled blocks and their size in bytes
+    num_samples = 16
+    sample_size = 64*1024
+
+    @staticmethod
+    def compute(path: str) -> str:
+        """
+        Description: Computes the fingerprint of a file
+
+        Parameters:
+            - path: Valid path of the file
+
+        Return Value: Hexadecimal string with the fingerprint
+        """
+        size = os.path.getsize(path)
+        digest = hashlib.blake2b(str(size).encode("ascii"), digest_size=16)
+
+        with open(path, "rb") as file:
+            # Small files are hashed whole
+            if size <= File_Fingerprint.num_samples*File_Fingerprint.sample_size:
+                digest.update(file.read())
+            # Blocks evenly spaced from the start to the end of the file (Both included)
+            else:
+                step = (size-File_Fingerprint.sample_size)/(File_Fingerprint.num_samples-1)
+                for i in range(File_Fingerprint.num_samples):
+                    file.seek(int(i*step))
+                    digest.update(file.read(File_Fingerprint.sample_size))
+
+        return digest.hexdigest()
@@ -0,0 +1,302 @@
+from episode_binger.Video import Frame_Source_Type
+from episode_binger.Video.Capture_Pool import Capture_Pool
+from episode_binger.Video.Thumbnailer import Thumbnailer
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+import numpy as np
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Frame_Provider():
+    """
+    Class that serves the frames of an episode. It keeps its capture handles open between calls and reads ahead in a background worker the frame windows that will be requested next
+    """
+    # Keyframes of every known file content, shared by the providers of this process. Keyed by the file fingerprint
+    _keyframe_index = {}
+    _keyframe_index_lock = Lock()
+
+    def __init__(self, path: str, max_prefetched_windows: int = 2, max_captures: int = 4, frame_source_type: Frame_Source_Type = Frame_Source_Type.OPENCV, fingerprint: str = None):
+        """
+        Description: Creates a Frame_Provider object
+
+        Parameters:
+            - path: Valid path of the episode to serve frames from
+            - max_prefetched_windows: Max amount of frame windows that can be read ahead and waiting to be requested at once
+            - max_captures: Max amount of capture handles of the episode open at once
+            - frame_source_type: A Frame_Source_Type object to specify which backend decodes the episode
+            - fingerprint: Fingerprint of the episode file (See File_Fingerprint). Keyframes already read from the same content are reused. If omited they are always read from the file
+        """
+        self.path = path
+        self.fingerprint = fingerprint
+        self.max_prefetched_windows = max_prefetched_windows
+
+        # Open capture handles ready to be reused
+        self.capture_pool = Capture_Pool(path, max_captures, frame_source_type=frame_source_type)
+
+        # Keyframes of the episode, read the first time they are requested
+        self._keyframes = None
+        self._keyframe_set = None
+        self._keyframes_lock = Lock()
+
+        self._start_prefetcher()
+
+    def _start_prefetcher(self):
+        """
+        Description: Creates the background decoder and the register of the windows it is reading ahead
+        """
+        self._pid = os.getpid()
+        self._prefetcher = ThreadPoolExecutor(max_workers=1)
+        self._prefetched = {}
+        self._prefetched_lock = Lock()
+
+    def _check_process(self):
+        """
+        Description: Restarts the background decoder if the provider is being used in a different process than the one that created it (Threads don't survive a fork)
+        """
+        if self._pid != os.getpid():
+            self._start_prefetcher()
+
+    def _get_buffer(self, number_of_frames: int, thumbnail_resolution: tuple, output_frames: np.ndarray = None) -> np.ndarray:
+        """
+        Description: Gets the buffer where the frames should be loaded
+
+        Parameters:
+            - number_of_frames: Amount of frames to load
+            - thumbnail_resolution: Thumbnail dimensions for frame processing
+            - output_frames: Buffer given by the caller. If omited a new one is allocated
+
+        Return Value: A uint8 numpy array shaped like (number_of_frames, height, width, 3)
+        """
+        if output_frames is None:
+            return np.empty((number_of_frames, thumbnail_resolution[0], thumbnail_resolution[1], 3), dtype=np.uint8)
+
+        # Buffers with room for more frames can be reused for smaller loads
+        if output_frames.dtype != np.uint8 or output_frames.shape[1:] != (thumbnail_resolution[0], thumbnail_resolution[1], 3) or len(output_frames) < number_of_frames:
+            raise Exception(f"Output buffer with shape {output_frames.shape} can't hold {number_of_frames} frames of {thumbnail_resolution}")
+        return output_frames[:number_of_frames]
+
+    def _read_frame_list(self, indexes: tuple, thumbnail_resolution: tuple, output_frames: np.ndarray = None) -> np.ndarray:
+        """
+        Description: Decodes the given frames and resizes them to the thumbnail resolution
+
+        Parameters:
+            - indexes: Frame indexes to load
+            - thumbnail_resolution: Thumbnail dimensions for frame processing
+            - output_frames: Buffer where the frames should be loaded. If omited a new one is allocated
+
+        Return Value: Numpy array with the loaded frames
+        """
+        frames = self._get_buffer(len(indexes), thumbnail_resolution, output_frames)
+        capture = self.capture_pool.acquire(indexes[0] if indexes else None)
+        try:
+            # Only keyframes (Coarse scans): The frames between them aren't decoded
+            if indexes and self._keyframe_set is not None and self._keyframe_set.issuperset(indexes) and list(indexes) == sorted(indexes):
+                keyframes = capture.read_keyframes(list(indexes))
+                if all(frame is not None for frame in keyframes):
+                    for i, frame in enumerate(keyframes):
+                        frames[i]=Thumbnailer.create(frame, thumbnail_resolution)
+                    return frames
+
+            for i, index in enumerate(indexes):
+                capture.seek(index)
+                ret, frame = capture.read()
+                frames[i]=Thumbnailer.create(frame, thumbnail_resolution)
+        finally:
+            self.capture_pool.release(capture)
+
+        return frames
+
+    def _read_consecutive_frames(self, start_frame_index: int, number_of_frames: int, thumbnail_resolution: tuple, output_frames: np.ndarray = None) -> np.ndarray:
+        """
+        Description: Decodes a window of consecutive frames and resizes them to the thumbnail resolution
+
+        Parameters:
+            - start_frame_index: Index of the first frame to load
+            - number_of_frames: Amount of frames to load
+            - thumbnail_resolution: Thumbnail dimensions for frame processing
+            - output_frames: Buffer where the frames should be loaded. If omited a new one is allocated
+
+        Return Value: Numpy array with the loaded frames
+        """
+        frames = self._get_buffer(number_of_frames, thumbnail_resolution, output_frames)
+        capture = self.capture_pool.acquire(start_frame_index)
+        try:
+            capture.seek(start_frame_index)    # Set frame to start
+            for i in range(number_of_frames):
+                ret, frame = capture.read()
+                frames[i]=Thumbnailer.create(frame, thumbnail_resolution)
+        finally:
+            self.capture_pool.release(capture)
+
+        return frames
+
+    def get_keyframes(self) -> list:
+        """
+        Description: Gets the indexes of the keyframes of the episode. Once they are known, lists of only keyframes are loaded decoding just them
+
+        Return Value: Sorted list of frame indexes. None if the frame source can't tell them
+        """
+        with self._keyframes_lock:
+            if self._keyframe_set is None:
+                self._keyframes = Frame_Provider.get_known_keyframes(self.fingerprint)
+                if self._keyframes is None:
+                    capture = self.capture_pool.acquire()
+                    try:
+                        self._keyframes = capture.cap.get_keyframes()
+                    finally:
+                        self.capture_pool.release(capture)
+                    Frame_Provider.add_known_keyframes(self.fingerprint, self._keyframes)
+                self._keyframe_set = set(self._keyframes) if self._keyframes is not None else frozenset()
+            return self._keyframes
+
+    @staticmethod
+    def get_known_keyframes(fingerprint: str) -> list:
+        """
+        Description: Gets the keyframes read before from a file content
+
+        Parameters:
+            - fingerprint: Fingerprint of the file
+
+        Return Value: Sorted list of frame indexes. None if they are unknown
+        """
+        if fingerprint is None:
+            return None
+        with Frame_Provider._keyframe_index_lock:
+            return Frame_Provider._keyframe_index.get(fingerprint)
+
+    @staticmethod
+    def add_known_keyframes(fingerprint: str, keyframes: list):
+        """
+        Description: Stores the keyframes of a file content, so they are not read again (By any provider of this process)
+
+        Parameters:
+            - fingerprint: Fingerprint of the file
+            - keyframes: Sorted list of frame indexes. Nothing is stored if it's None
+        """
+        if fingerprint is None or keyframes is None:
+            return
+        with Frame_Provider._keyframe_index_lock:
+            Frame_Provider._keyframe_index[fingerprint] = list(keyframes)
+
+    def _prefetch(self, key: tuple, function, *args):
+        """
+        Description: Schedules a read in the background decoder unless it is already scheduled. If there are too many windows waiting the oldest one is discarded
+
+        Parameters:
+            - key: Identifier of the requested window
+            - function: Read function to run in the background
+            - args: Arguments for the read function
+        """
+        self._check_process()
+        with self._prefetched_lock:
+            if key in self._prefetched:
+                return
+
+            # Discard the oldest windows (They were never requested)
+            while len(self._prefetched) >= self.max_prefetched_windows:
+                oldest_key = next(iter(self._prefetched))
+                self._prefetched.pop(oldest_key).cancel()
+
+            # Closed while other threads still use it: Start a new background decoder
+            if self._prefetcher is None:
+                self._prefetcher = ThreadPoolExecutor(max_workers=1)
+
+            self._prefetched[key] = self._prefetcher.submit(function, *args)
+
+    def _take_prefetched(self, key: tuple):
+        """
+        Description: Takes a window out of the read ahead ones
+
+        Parameters:
+            - key: Identifier of the requested window
+
+        Return Value: The future holding the window or None if it wasn't read ahead
+        """
+        self._check_process()
+        with self._prefetched_lock:
+            return self._prefetched.pop(key, None)
+
+    def prefetch_frame_list(self, indexes: list, thumbnail_resolution: tuple):
+        """
+        Description: Starts reading the given frames in the background so a later load_frame_list call with the same arguments doesn't have to wait for them
+
+        Parameters:
+            - indexes: List of frame indexes to load
+            - thumbnail_resolution: Thumbnail dimensions for frame processing
+        """
+        indexes = tuple(indexes)
+        self._prefetch(("list", indexes, tuple(thumbnail_resolution)), self._read_frame_list, indexes, thumbnail_resolution)
+
+    def prefetch_consecutive_frames(self, start_frame_index: int, number_of_frames: int, thumbnail_resolution: tuple):
+        """
+        Description: Starts reading a window of consecutive frames in the background so a later load_consecutive_frames call with the same arguments doesn't have to wait for them
+
+        Parameters:
+            - start_frame_index: Index of the first frame to load
+            - number_of_frames: Amount of frames to load
+            - thumbnail_resolution: Thumbnail dimensions for frame processing
+        """
+        self._prefetch(("consecutive", start_frame_index, number_of_frames, tuple(thumbnail_resolution)), self._read_consecutive_frames, start_frame_index, number_of_frames, thumbnail_resolution)
+
+    def cancel_prefetch_consecutive_frames(self, start_frame_index: int, number_of_frames: int, thumbnail_resolution: tuple):
+        """
+        Description: Discards a window of consecutive frames read ahead that won't be requested. If it's still waiting it's never decoded
+
+        Parameters:
+            - start_frame_index: Index of the first frame of the window
+            - number_of_frames: Amount of frames of the window
+            - thumbnail_resolution: Thumbnail dimensions for frame processing
+        """
+        prefetched = self._take_prefetched(("consecutive", start_frame_index, number_of_frames, tuple(thumbnail_resolution)))
+        if prefetched is not None:
+            prefetched.cancel()
+
+    def load_frame_list(self, indexes: list, thumbnail_resolution: tuple, output_frames: np.ndarray = None) -> np.ndarray:
+        """
+        Description: Loads the given frames. If they were read ahead they are taken from the background decoder
+
+        Parameters:
+            - indexes: List of frame indexes to load
+            - thumbnail_resolution: Thumbnail dimensions for frame processing
+            - output_frames: Buffer where the frames should be loaded. If omited a new one is allocated. Frames that were read ahead are returned in their own buffer
+
+        Return Value: Numpy array with the loaded frames
+        """
+        indexes = tuple(indexes)
+        prefetched = self._take_prefetched(("list", indexes, tuple(thumbnail_resolution)))
+        if prefetched is not None:
+            return prefetched.result()
+        return self._read_frame_list(indexes, thumbnail_resolution, output_frames)
+
+    def load_consecutive_frames(self, start_frame_index: int, number_of_frames: int, thumbnail_resolution: tuple, output_frames: np.ndarray = None) -> np.ndarray:
+        """
+        Description: Loads a window of consecutive frames. If it was read ahead it is taken from the background decoder
+
+        Parameters:
+            - start_frame_index: Index of the first frame to load
+            - number_of_frames: Amount of frames to load
+            - thumbnail_resolution: Thumbnail dimensions for frame processing
+            - output_frames: Buffer where the frames should be loaded. If omited a new one is allocated. Frames that were read ahead are returned in their own buffer
+
+        Return Value: Numpy array with the loaded frames
+        """
+        prefetched = self._take_prefetched(("consecutive", start_frame_index, number_of_frames, tuple(thumbnail_resolution)))
+        if prefetched is not None:
+            return prefetched.result()
+        return self._read_consecutive_frames(start_frame_index, number_of_frames, thumbnail_resolution, output_frames)
+
+    def close(self):
+        """
+        Description: Stops the background decoder and releases every open capture handle. The provider can still be used (Threads that were using it continue opening new ones)
+        """
+        self._check_process()
+        with self._prefetched_lock:
+            for future in self._prefetched.values():
+                future.cancel()
+            self._prefetched.clear()
+            prefetcher, self._prefetcher = self._prefetcher, None
+        if prefetcher is not None:
+            prefetcher.shutdown(wait=True)
+        self.capture_pool.close()
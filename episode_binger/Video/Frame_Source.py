@@ -0,0 +1,84 @@
+from abc import ABC, abstractmethod
+from episode_binger.Video import Frame_Source_Type
+import numpy as np
+
+class Frame_Source(ABC):
+    """
+    Abstract Class that defines how the decoders of video files should behave. Every source reads the frames of one file in order, from the frame it's moved to
+    """
+    # Information of the video, set when the file is opened
+    frame_count = 0
+    frame_shape = None
+    fps = 0
+
+    @staticmethod
+    def create(path: str, source_type: Frame_Source_Type):
+        """
+        Description: Opens a video file with the given kind of source. Only the selected backend is imported
+
+        Parameters:
+            - path: Valid path of the video file
+            - source_type: A Frame_Source_Type object to specify which backend should decode the file
+
+        Return Value: An instance of a Frame_Source object
+        """
+        if source_type == Frame_Source_Type.PYAV:
+            from episode_binger.Video.PyAV_Frame_Source import PyAV_Frame_Source
+            return PyAV_Frame_Source(path)
+
+        from episode_binger.Video.OpenCV_Frame_Source import OpenCV_Frame_Source
+        return OpenCV_Frame_Source(path)
+
+    @abstractmethod
+    def seek(self, frame_index: int):
+        """
+        Description: Moves the source to the given frame
+
+        Parameters:
+            - frame_index: Index of the next frame to read
+        """
+        pass
+
+    @abstractmethod
+    def grab(self) -> bool:
+        """
+        Description: Skips the next frame (It isn't converted to an image)
+
+        Return Value: True if there was a frame, False otherwise
+        """
+        pass
+
+    @abstractmethod
+    def read(self) -> tuple:
+        """
+        Description: Reads the next frame
+
+        Return Value: A tuple like the one returned by cv.VideoCapture.read: (ret, frame). The frame is a BGR image
+        """
+        pass
+
+    def get_keyframes(self) -> list:
+        """
+        Description: Gets the indexes of the keyframes of the video (Frames decoded without the previous ones, so reading them alone is cheap)
+
+        Return Value: Sorted list of frame indexes. None if the source can't tell them
+        """
+        return None
+
+    def read_keyframes(self, indexes: list) -> list:
+        """
+        Description: Reads the given keyframes without decoding the frames between them
+
+        Parameters:
+            - indexes: Sorted list of keyframe indexes (Taken from get_keyframes)
+
+        Return Value: List with the frame of every index (BGR images). Keyframes that couldn't be read are None
+        """
+        raise Exception(f"{type(self).__name__} can't read keyframes alone")
+
+    @abstractmethod
+    def release(self):
+        """
+        Description: Closes the video file
+        """
+        pass
@@ -0,0 +1,92 @@
+import cv2 as cv
+import numpy as np
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Frame_Stream():
+    """
+    Class that reads frames as they become available: From a video file that is still being written (Like a recording in progress) or raw frames from a pipe
+    """
+    def __init__(self, source, frame_size: tuple = None, fps: float = None, poll_interval: float = 1, idle_timeout: float = 30):
+        """
+        Description: Creates a Frame_Stream object
+
+        Parameters:
+            - source: Path of a video file or a binary file object with raw BGR frames, like the standard input fed by "ffmpeg -i <input> -f rawvideo -pix_fmt bgr24 -". Growing files must be in a format readable before it's finished, like MPEG-TS or Matroska
+            - frame_size: Size of the raw frames like (height, width). Required for pipes
+            - fps: Frames per second of the stream. Read from the file if omited (Required for pipes)
+            - poll_interval: Seconds to wait for a growing file to have new frames
+            - idle_timeout: Seconds without new frames after which a growing file is considered finished
+        """
+        self.source = source
+        self.frame_size = frame_size
+        self.fps = fps
+        self.poll_interval = poll_interval
+        self.idle_timeout = idle_timeout
+
+        if isinstance(source, str):
+            self.path = source
+            if self.fps is None:
+                cap = cv.VideoCapture(source)
+                self.fps = cap.get(cv.CAP_PROP_FPS)
+                cap.release()
+        else:
+            self.path = getattr(source, "name", "pipe")
+            if frame_size is None or fps is None:
+                raise Exception("Frame size and fps are required to read raw frames from a pipe")
+
+    def __iter__(self):
+        if isinstance(self.source, str):
+            return self._read_file()
+        return self._read_pipe()
+
+    def _read_file(self):
+        """
+        Description: Reads the frames of a video file. When there are no more frames it waits for the file to grow and continues from the last frame read
+
+        Return Value: Generator of frames (BGR)
+        """
+        frames_read = 0
+        last_frame_time = time.time()
+        while True:
+            cap = cv.VideoCapture(self.source)
+            if frames_read:
+                cap.set(cv.CAP_PROP_POS_FRAMES, frames_read)
+
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                frames_read += 1
+                last_frame_time = time.time()
+                yield frame
+            cap.release()
+
+            if time.time() - last_frame_time > self.idle_timeout:
+                logger.debug(f"No new frames in {self.source} for {self.idle_timeout}s, {frames_read} frames read")
+                return
+            time.sleep(self.poll_interval)
+
+    def _read_pipe(self):
+        """
+        Description: Reads raw BGR frames from a binary file object until it's closed
+
+        Return Value: Generator of frames (BGR)
+        """
+        height, width = self.frame_size
+        frame_bytes = height*width*3
+        while True:
+            data = self.source.read(frame_bytes)
+
+            # Pipes might return less bytes than requested
+            while data and len(data) < frame_bytes:
+                more = self.source.read(frame_bytes-len(data))
+                if not more:
+                    break
+                data += more
+
+            if len(data) < frame_bytes:
+                return
+            yield np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3)
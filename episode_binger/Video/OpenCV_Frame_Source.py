@@ -0,0 +1,33 @@
+from episode_binger.Video.Frame_Source import Frame_Source
+import cv2 as cv
+
+class OpenCV_Frame_Source(Frame_Source):
+    """
+    Class that holds an specific Frame Source that decodes the video with OpenCV
+    """
+    def __init__(self, path: str):
+        """
+        Description: Creates an OpenCV_Frame_Source object
+
+        Parameters:
+            - path: Valid path of the video file
+        """
+        self.path = path
+        self.cap = cv.VideoCapture(path)
+        width = self.cap.get(cv.CAP_PROP_FRAME_WIDTH)
+        height = self.cap.get(cv.CAP_PROP_FRAME_HEIGHT)
+        self.frame_count = int(self.cap.get(cv.CAP_PROP_FRAME_COUNT))
+        self.frame_shape = (int(height), int(width), 3)
+        self.fps = self.cap.get(cv.CAP_PROP_FPS)
+
+    def seek(self, frame_index: int):
+        self.cap.set(cv.CAP_PROP_POS_FRAMES, frame_index)
+
+    def grab(self) -> bool:
+        return self.cap.grab()
+
+    def read(self) -> tuple:
+        return self.cap.read()
+
+    def release(self):
+        self.cap.release()
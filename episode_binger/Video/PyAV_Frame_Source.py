@@ -0,0 +1,163 @@
+from episode_binger.Video.Frame_Source import Frame_Source
+import av
+import logging
+
+logger = logging.getLogger(__name__)
+
+class PyAV_Frame_Source(Frame_Source):
+    """
+    Class that holds an specific Frame Source that decodes the video with PyAV (FFmpeg libraries). Frames are decoded by several threads of the codec, seeks go to exact timestamps and keyframes can be decoded alone, skipping the rest of frames
+    """
+    def __init__(self, path: str, thread_count: int = 0):
+        """
+        Description: Creates a PyAV_Frame_Source object
+
+        Parameters:
+            - path: Valid path of the video file
+            - thread_count: Amount of decoding threads. 0 lets the codec decide (Usually one per CPU core)
+        """
+        self.path = path
+        self.container = av.open(path)
+        self.stream = self.container.streams.video[0]
+
+        # Frame and slice threading, whatever the codec supports
+        self.stream.thread_type = "AUTO"
+        self.stream.thread_count = thread_count
+
+        codec_context = self.stream.codec_context
+        self.frame_shape = (codec_context.height, codec_context.width, 3)
+        self.fps = float(self.stream.average_rate or self.stream.guessed_rate)
+        self._keyframes = None      # Keyframes found while counting the frames
+
+        # Matroska and MPEG-TS don't store the amount of frames, it's taken from the durations or from the packets
+        self.frame_count = self.stream.frames
+        if not self.frame_count and self.stream.duration:
+            self.frame_count = int(self.stream.duration * self.stream.time_base * self.fps)
+        if not self.frame_count and self.container.duration:
+            self.frame_count = int(self.container.duration / av.time_base * self.fps)
+        if not self.frame_count:
+            self.frame_count = self._scan_packets()
+        if not self.frame_count:
+            self.container.close()
+            raise Exception(f"Couldn't get the amount of frames of {path}")
+
+        self._start_pts = self.stream.start_time or 0
+        self._frames = None         # Decoder, created on the first read after every seek
+        self._next_frame = None     # Frame already decoded while seeking
+
+    def _get_pts(self, frame_index: int) -> int:
+        """
+        Description: Converts a frame index into a timestamp of the stream
+
+        Parameters:
+            - frame_index: Index of the frame
+
+        Return Value: Timestamp in time base units
+        """
+        return self._start_pts + round(frame_index / self.fps / self.stream.time_base)
+
+    def _get_index(self, pts: int) -> int:
+        """
+        Description: Converts a timestamp of the stream into a frame index
+
+        Parameters:
+            - pts: Timestamp in time base units
+
+        Return Value: Index of the frame
+        """
+        return round((pts - self._start_pts) * self.stream.time_base * self.fps)
+
+    def _decode_next(self):
+        """
+        Description: Decodes the next frame
+
+        Return Value: An av.VideoFrame object or None if there are no more frames
+        """
+        if self._next_frame is not None:
+            frame, self._next_frame = self._next_frame, None
+            return frame
+
+        if self._frames is None:
+            self._frames = self.container.decode(self.stream)
+        return next(self._frames, None)
+
+    def seek(self, frame_index: int):
+        # Seek to the keyframe before the timestamp and decode until the frame is reached
+        self.container.seek(self._get_pts(frame_index), stream=self.stream, backward=True)
+        self._frames = self.container.decode(self.stream)
+        self._next_frame = None
+
+        for frame in self._frames:
+            if frame.pts is None or self._get_index(frame.pts) >= frame_index:
+                self._next_frame = frame
+                break
+
+    def grab(self) -> bool:
+        return self._decode_next() is not None
+
+    def read(self) -> tuple:
+        frame = self._decode_next()
+        if frame is None:
+            return False, None
+        return True, frame.to_ndarray(format="bgr24")
+
+    def _scan_packets(self) -> int:
+        """
+        Description: Reads every packet of the video stream to count the frames and find the keyframes. Only the packets are read, nothing is decoded. Another container is used so the position of this one isn't lost
+
+        Return Value: Amount of frames of the video
+        """
+        start_pts = self.stream.start_time or 0
+        num_frames = 0
+        keyframes = set()
+        with av.open(self.path) as container:
+            stream = container.streams.video[0]
+            for packet in container.demux(stream):
+                if packet.pts is None:
+                    continue
+                num_frames += 1
+                if packet.is_keyframe:
+                    keyframes.add(round((packet.pts - start_pts) * stream.time_base * self.fps))
+        self._keyframes = sorted(keyframes)
+        return num_frames
+
+    def get_keyframes(self) -> list:
+        if self._keyframes is None:
+            self._scan_packets()
+        return self._keyframes
+
+    def read_keyframes(self, indexes: list) -> list:
+        """
+        Description: Reads the given keyframes decoding only the keyframes between them (The codec skips the rest of frames)
+
+        Parameters:
+            - indexes: Sorted list of keyframe indexes
+
+        Return Value: List with the frame of every index (BGR images). Keyframes that couldn't be read are None
+        """
+        frames = {}
+        wanted = set(indexes)
+        codec_context = self.stream.codec_context
+        codec_context.skip_frame = "NONKEY"
+        try:
+            self.container.seek(self._get_pts(indexes[0]), stream=self.stream, backward=True)
+            for frame in self.container.decode(self.stream):
+                # Frames without a timestamp can't be placed (Only keyframes are decoded, so it can't be guessed from the previous one)
+                if frame.pts is None:
+                    continue
+                index = self._get_index(frame.pts)
+                if index in wanted:
+                    frames[index] = frame.to_ndarray(format="bgr24")
+                if index >= indexes[-1]:
+                    break
+        finally:
+            codec_context.skip_frame = "DEFAULT"
+
+            # The position is lost, the next read needs a seek
+            self._frames = None
+            self._next_frame = None
+
+        return [frames.get(index) for index in indexes]
+
+    def release(self):
+        self.container.close()
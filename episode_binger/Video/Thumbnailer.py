@@ -0,0 +1,33 @@
+import cv2 as cv
+import numpy as np
+
+class Thumbnailer():
+    """
+    Class that turns frames into the thumbnails the algorithms compare. Frames are cropped to the aspect ratio of the thumbnail (Centered) before they are resized, so sources with different resolutions and aspect ratios give comparable thumbnails
+    """
+    @staticmethod
+    def create(frame: np.ndarray, thumbnail_resolution: tuple) -> np.ndarray:
+        """
+        Description: Creates the thumbnail of a frame
+
+        Parameters:
+            - frame: Frame shaped like (height, width, 3)
+            - thumbnail_resolution: Size of the thumbnail like (height, width)
+
+        Return Value: The thumbnail shaped like (thumbnail_height, thumbnail_width, 3)
+        """
+        height, width = frame.shape[:2]
+        thumbnail_height, thumbnail_width = thumbnail_resolution
+
+        # Wider than the thumbnail: Crop the sides
+        if width*thumbnail_height > height*thumbnail_width:
+            crop_width = round(height*thumbnail_width/thumbnail_height)
+            x = (width-crop_width)//2
+            frame = frame[:, x:x+crop_width]
+        # Taller than the thumbnail: Crop the top and bottom
+        elif width*thumbnail_height < height*thumbnail_width:
+            crop_height = round(width*thumbnail_height/thumbnail_width)
+            y = (height-crop_height)//2
+            frame = frame[y:y+crop_height]
+
+        return cv.resize(frame,(thumbnail_width,thumbnail_height),interpolation=cv.INTER_AREA)
@@ -1,4 +1,9 @@
-import ffmpeg
+import subprocess
+import tempfile
+import hashlib
+import math
+import time
+import os
 
 class Video_Assembler:
     """
@@ -15,6 +20,8 @@ class Video_Assembler:
             - chunk_list: A list of Chunk objects that define what chunks of video should be included and their order
             - result_video_path: A valid path to save the result video
         """
+        import ffmpeg   # Only imported when rendering
+
         # Create video clips and audio clips
         video_clips = []
 
@@ -34,3 +41,198 @@ class Video_Assembler:
 
         # Write the video into a file
         ffmpeg.output(final_video,result_video_path, preset='veryfast').overwrite_output().run()
+
+    def create_playlist(self, chunk_list: list, playlist_path: str):
+        """
+        Description: Creates a playlist that plays the specified video chunks from the original files, without encoding anything. The format depends on the extension: M3U for .m3u/.m3u8 (Start and stop times as VLC options) and ffconcat for any other (Playable with ffplay/mpv or joinable with ffmpeg using stream copy)
+
+        Parameters:
+            - chunk_list: A list of Chunk objects that define what chunks of video should be included and their order
+            - playlist_path: A valid path to save the playlist
+        """
+        if os.path.splitext(playlist_path)[1].lower() in (".m3u", ".m3u8"):
+            lines = ["#EXTM3U"]
+            for chunk in chunk_list:
+                start = chunk.start_frame/chunk.episode.fps
+                end = chunk.end_frame/chunk.episode.fps
+                lines.append(f"#EXTINF:{int(end-start)},{os.path.basename(chunk.episode.path)}")
+                lines.append(f"#EXTVLCOPT:start-time={start:.3f}")
+                lines.append(f"#EXTVLCOPT:stop-time={end:.3f}")
+                lines.append(os.path.abspath(chunk.episode.path))
+        else:
+            lines = ["ffconcat version 1.0"]
+            for chunk in chunk_list:
+                path = os.path.abspath(chunk.episode.path).replace("'", "'\\''")
+                lines.append(f"file '{path}'")
+                lines.append(f"inpoint {chunk.start_frame/chunk.episode.fps:.3f}")
+                lines.append(f"outpoint {chunk.end_frame/chunk.episode.fps:.3f}")
+
+        with open(playlist_path, "w") as file:
+            file.write("\n".join(lines)+"\n")
+
+    def create_skip_file(self, chunk_list: list, skip_file_path: str, action: int = 3):
+        """
+        Description: Creates an EDL file (Kodi/MPlayer/mpv format) telling players which chunks of an episode to skip
+
+        Parameters:
+            - chunk_list: A list of Chunk objects from the same episode that should be skipped
+            - skip_file_path: A valid path to save the EDL file. Players find it automatically if it has the name of the episode with .edl extension
+            - action: EDL action for the chunks. 0 cuts them out and 3 marks them as commercial breaks (Skipped automatically by Kodi)
+        """
+        lines = []
+        for chunk in sorted(chunk_list, key=lambda c: c.start_frame):
+            lines.append(f"{chunk.start_frame/chunk.episode.fps:.3f}\t{chunk.end_frame/chunk.episode.fps:.3f}\t{action}")
+
+        with open(skip_file_path, "w") as file:
+            file.write("\n".join(lines)+"\n")
+
+    def create_chapters_video(self, chapter_list: list, result_video_path: str):
+        """
+        Description: Creates a copy of an episode with chapter marks, copying the streams without encoding them. Use the .mkv extension for the result
+
+        Parameters:
+            - chapter_list: A list of tuples like (chunk, title) from the same episode. Each chunk becomes a chapter with the given title
+            - result_video_path: A valid path to save the result video. It can't be the path of the episode
+        """
+        episode = chapter_list[0][0].episode
+
+        # Build FFMETADATA file with the chapters (Times in milliseconds)
+        metadata = [";FFMETADATA1"]
+        for chunk, title in chapter_list:
+            metadata.append("[CHAPTER]")
+            metadata.append("TIMEBASE=1/1000")
+            metadata.append(f"START={int(chunk.start_frame*1000/episode.fps)}")
+            metadata.append(f"END={int((chunk.end_frame+1)*1000/episode.fps)}")
+            metadata.append(f"title={title}")
+
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as file:
+            file.write("\n".join(metadata)+"\n")
+            metadata_path = file.name
+
+        # ffmpeg-python can't map an input without streams, so ffmpeg is called directly
+        try:
+            subprocess.run(["ffmpeg", "-i", episode.path, "-i", metadata_path, "-map", "0", "-map_metadata", "1", "-map_chapters", "1", "-c", "copy", "-y", result_video_path], check=True, capture_output=True)
+        finally:
+            os.remove(metadata_path)
+
+    def _read_segments(self, chunk_playlist_path: str) -> list:
+        """
+        Description: Reads the segments listed in the playlist of a chunk
+
+        Parameters:
+            - chunk_playlist_path: Path of the playlist of the chunk
+
+        Return Value: List of tuples like (duration, segment_file_name) in playing order. Empty if the playlist doesn't exist yet
+        """
+        if not os.path.exists(chunk_playlist_path):
+            return []
+
+        segments = []
+        with open(chunk_playlist_path, "r") as file:
+            lines = [line.strip() for line in file if line.strip()]
+        for i, line in enumerate(lines):
+            if line.startswith("#EXTINF:") and i+1 < len(lines):
+                segments.append((float(line[len("#EXTINF:"):].split(",")[0]), lines[i+1]))
+
+        return segments
+
+    def _create_chunk_segments(self, chunk, segment_dir: str, segment_seconds: float):
+        """
+        Description: Encodes a chunk into HLS segments. Segments are named after the content of the episode (Its fingerprint) and the chunk frames, so if they were created before (And finished) they are reused
+
+        Parameters:
+            - chunk: The Chunk object to encode
+            - segment_dir: Directory where the segments are stored
+            - segment_seconds: Target duration of every segment
+
+        Return Value: Generator of lists of tuples like (duration, segment_file_name) in playing order. Every list has the segments written since the previous one, so they can be played while the rest of the chunk is encoded
+        """
+        import ffmpeg   # Only imported when rendering
+
+        # Files with the same name in other directories, or replaced by other contents, get their own segments
+        content_key = chunk.episode.fingerprint or hashlib.blake2b(os.path.abspath(chunk.episode.path).encode(), digest_size=16).hexdigest()
+        chunk_name = f"{os.path.splitext(os.path.basename(chunk.episode.path))[0]}_{content_key[:16]}_{chunk.start_frame}_{chunk.end_frame}"
+        chunk_playlist_path = os.path.join(segment_dir, chunk_name+".m3u8")
+
+        # Reuse the chunk if a finished playlist for it already exists
+        if os.path.exists(chunk_playlist_path):
+            with open(chunk_playlist_path, "r") as file:
+                if "#EXT-X-ENDLIST" in file.read():
+                    yield self._read_segments(chunk_playlist_path)
+                    return
+
+        # Leftovers of an interrupted encoding are not segments of this one
+        if os.path.exists(chunk_playlist_path):
+            os.remove(chunk_playlist_path)
+
+        # ffmpeg rewrites the playlist of the chunk after every segment it finishes
+        start = chunk.start_frame/chunk.episode.fps
+        end = chunk.end_frame/chunk.episode.fps
+        video = ffmpeg.input(chunk.episode.path, ss=start, t=end-start)
+        process = ffmpeg.output(video.video, video.audio, chunk_playlist_path, format="hls", hls_time=segment_seconds, hls_playlist_type="event",
+                                hls_segment_filename=os.path.join(segment_dir, chunk_name+"_%05d.ts"), force_key_frames=f"expr:gte(t,n_forced*{segment_seconds})",
+                                preset="veryfast").overwrite_output().run_async()
+        try:
+            num_segments = 0
+            while True:
+                finished = process.poll() is not None
+                segments = self._read_segments(chunk_playlist_path)
+                if len(segments) > num_segments:
+                    yield segments[num_segments:]
+                    num_segments = len(segments)
+                if finished:
+                    break
+                time.sleep(1)
+        finally:
+            # The stream was abandoned (Or failed) before the chunk was encoded
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+
+        if process.returncode != 0:
+            raise Exception(f"ffmpeg failed encoding {chunk} (Exit code {process.returncode})")
+
+    def _write_playlist_atomically(self, lines: list, playlist_path: str):
+        """
+        Description: Writes a playlist so that players reading it never find it half written
+
+        Parameters:
+            - lines: Lines of the playlist
+            - playlist_path: A valid path to save the playlist
+        """
+        with open(playlist_path+".tmp", "w") as file:
+            file.write("\n".join(lines)+"\n")
+        os.replace(playlist_path+".tmp", playlist_path)
+
+    def create_stream(self, chunk_list: list, playlist_path: str, segment_dir: str = None, segment_seconds: float = 6):
+        """
+        Description: Creates an HLS stream with the specified video chunks. The playlist grows as every segment is encoded, so it can be played as soon as the first segment is ready. Every chunk is encoded into its own segments, which are reused if the stream is created again with the same chunks
+
+        Parameters:
+            - chunk_list: A list of Chunk objects that define what chunks of video should be included and their order
+            - playlist_path: A valid path to save the HLS playlist (.m3u8)
+            - segment_dir: Directory where the segments should be stored. If omited, a directory next to the playlist named like it
+            - segment_seconds: Target duration of every segment in seconds
+        """
+        if segment_dir is None:
+            segment_dir = os.path.splitext(playlist_path)[0]+"_segments"
+        os.makedirs(segment_dir, exist_ok=True)
+        relative_segment_dir = os.path.relpath(segment_dir, os.path.dirname(os.path.abspath(playlist_path)))
+
+        # Event playlists can only grow: Players keep reloading them until they end
+        lines = ["#EXTM3U", "#EXT-X-VERSION:3", f"#EXT-X-TARGETDURATION:{math.ceil(segment_seconds)+1}", "#EXT-X-PLAYLIST-TYPE:EVENT", "#EXT-X-MEDIA-SEQUENCE:0"]
+
+        for i, chunk in enumerate(chunk_list):
+            # Chunks come from different files (Timestamps and encoding parameters change)
+            if i > 0:
+                lines.append("#EXT-X-DISCONTINUITY")
+
+            # Segments are added as soon as ffmpeg writes them
+            for segments in self._create_chunk_segments(chunk, segment_dir, segment_seconds):
+                for duration, segment in segments:
+                    lines.append(f"#EXTINF:{duration:.6f},")
+                    lines.append(os.path.join(relative_segment_dir, segment).replace(os.sep, "/"))
+                self._write_playlist_atomically(lines, playlist_path)
+
+        lines.append("#EXT-X-ENDLIST")
+        self._write_playlist_atomically(lines, playlist_path)
@@ -1 +1,22 @@
-from episode_binger.Video.Video_Assembler import Video_Assembler
\ No newline at end of file
+from enum import Enum
+from episode_binger.Lazy_Module import make_lazy
+
+class Frame_Source_Type(Enum):
+    """
+    Enumeration Class with the types of Frame Sources (Video decoders) in the project
+    """
+    OPENCV = 0
+    PYAV = 1
+
+# Classes are imported the first time they are requested
+make_lazy(__name__, {
+    "Video_Assembler": "episode_binger.Video.Video_Assembler",
+    "Capture_Pool": "episode_binger.Video.Capture_Pool",
+    "Frame_Provider": "episode_binger.Video.Frame_Provider",
+    "Frame_Stream": "episode_binger.Video.Frame_Stream",
+    "File_Fingerprint": "episode_binger.Video.File_Fingerprint",
+    "Thumbnailer": "episode_binger.Video.Thumbnailer",
+    "Frame_Source": "episode_binger.Video.Frame_Source",
+    "OpenCV_Frame_Source": "episode_binger.Video.OpenCV_Frame_Source",
+    "PyAV_Frame_Source": "episode_binger.Video.PyAV_Frame_Source",
+})
\ No newline at end of file
@@ -1,5 +1,14 @@
-from episode_binger.Episode_Binger import Episode_Binger
+from episode_binger.Lazy_Module import make_lazy
 
 import logging
 
-logger = logging.getLogger(__name__)
\ No newline at end of file
+logger = logging.getLogger(__name__)
+
+# Classes are imported the first time they are requested
+make_lazy(__name__, {
+    "Calibrator": "episode_binger.Calibrator",
+    "Episode_Binger": "episode_binger.Episode_Binger",
+    "Episode_Watcher": "episode_binger.Episode_Watcher",
+    "Memory_Governor": "episode_binger.Memory_Governor",
+    "Stream_Detector": "episode_binger.Stream_Detector",
+})
\ No newline at end of file
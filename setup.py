@@ -9,6 +9,9 @@ setup(
         "ffmpeg-python",
         "opencv-python"
     ],
+    extras_require={
+        "pyav": ["av"]
+    },
     author="Iago Loureiro Blanco",
     author_email="iagoloureiroblanco@gmail.com",
     description="A python package to take episodes, remove openings and endings and join them all with an initial opening and a last ending",